@@ -0,0 +1,314 @@
+"""
+Caching
+In-process LRU cache with per-entry TTL and coalescing of concurrent identical
+loads, optionally backed by a cache shared between worker processes
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # Optional: only needed for a shared Redis cache
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """
+    Key/value store that several AsyncTTLCache instances (typically one per
+    worker process) can share.
+
+    Values must be JSON-serializable. Backend failures are logged and treated
+    as misses so a cache outage never fails a request.
+    """
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Values for the keys that are present"""
+        raise NotImplementedError
+
+    async def set_many(self, items: List[Tuple[str, Any, Optional[float]]]):
+        """Store (key, value, ttl) entries; a TTL of None never expires"""
+        raise NotImplementedError
+
+    async def close(self):
+        """Release connections"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Process-local backend, mostly useful as a stand-in for Redis in tests"""
+
+    def __init__(self):
+        # key -> (JSON payload, expires_at or None)
+        self._entries: Dict[str, Tuple[str, Optional[float]]] = {}
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        found = {}
+        now = time.monotonic()
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            payload, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                continue
+            found[key] = json.loads(payload)
+        return found
+
+    async def set_many(self, items: List[Tuple[str, Any, Optional[float]]]):
+        now = time.monotonic()
+        for key, value, ttl in items:
+            self._entries[key] = (json.dumps(value), now + ttl if ttl is not None else None)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend on a Redis server (or anything speaking the Redis protocol).
+
+    Keys are namespaced with `prefix` so several deployments can share one
+    server.
+    """
+
+    def __init__(self, client: Any, prefix: str = "polalfa"):
+        """
+        Args:
+            client: redis.asyncio.Redis (or compatible, e.g. fakeredis) client
+            prefix: Namespace for all keys
+        """
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "polalfa") -> "RedisCacheBackend":
+        """Connect to e.g. redis://localhost:6379/0"""
+        if redis_asyncio is None:
+            raise RuntimeError("The redis package is required for a Redis cache backend")
+        return cls(redis_asyncio.from_url(url), prefix=prefix)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        try:
+            payloads = await self.client.mget([self._key(key) for key in keys])
+        except Exception as e:
+            logger.warning(f"Shared cache read failed: {str(e)}")
+            return {}
+        return {
+            key: json.loads(payload)
+            for key, payload in zip(keys, payloads)
+            if payload is not None
+        }
+
+    async def set_many(self, items: List[Tuple[str, Any, Optional[float]]]):
+        if not items:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value, ttl in items:
+                    # Redis expiries have millisecond resolution and must be positive
+                    px = max(int(ttl * 1000), 1) if ttl is not None else None
+                    pipe.set(self._key(key), json.dumps(value), px=px)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Shared cache write failed: {str(e)}")
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class AsyncTTLCache:
+    """
+    Size-bounded LRU cache whose entries can expire.
+
+    Each entry carries its own TTL; a TTL of None means the entry never expires
+    and only leaves the cache through LRU eviction. Concurrent `get_or_load`
+    calls for the same key share a single in-flight load.
+
+    With a `shared` backend the local entries act as a first level: local
+    misses are looked up in the shared backend before loading, and loaded
+    values are written to it, so other workers find them too.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 5000,
+        name: str = "cache",
+        shared: Optional[CacheBackend] = None
+    ):
+        self.max_size = max_size
+        self.name = name
+        self.shared = shared
+
+        # key -> (value, expires_at or None); most recently used last
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        # Load task -> callers currently awaiting it
+        self._waiters: Dict[asyncio.Task, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self.shared_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh cached value, or None on a miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            # Expired: drop it and treat as a miss
+            del self._entries[key]
+
+        self.misses += 1
+        return None
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh cached value without touching LRU order or stats"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                return value
+        return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entries if full"""
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _shared_key(self, key: Hashable) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return ":".join([self.name, *map(str, parts)])
+
+    async def get_many_shared(
+        self,
+        keys: Iterable[Hashable],
+        ttl_for: Callable[[Any], Optional[float]] = lambda value: None,
+    ) -> Dict[Hashable, Any]:
+        """
+        Look keys up in the shared backend and keep the hits locally.
+
+        Returns:
+            Dict[key, value] for the keys the shared backend holds
+        """
+        keys = list(keys)
+        if self.shared is None or not keys:
+            return {}
+        shared_keys = {self._shared_key(key): key for key in keys}
+        found = await self.shared.get_many(list(shared_keys))
+        values = {}
+        for shared_key, value in found.items():
+            key = shared_keys[shared_key]
+            self.set(key, value, ttl_for(value))
+            values[key] = value
+        self.shared_hits += len(values)
+        return values
+
+    async def set_many_shared(self, items: Iterable[Tuple[Hashable, Any, Optional[float]]]):
+        """Store (key, value, ttl) entries locally and in the shared backend"""
+        items = list(items)
+        for key, value, ttl in items:
+            self.set(key, value, ttl)
+        if self.shared is not None:
+            await self.shared.set_many(
+                [(self._shared_key(key), value, ttl) for key, value, ttl in items]
+            )
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_for: Callable[[Any], Optional[float]] = lambda value: None,
+    ) -> Optional[Any]:
+        """
+        Return the cached value for key, loading it on a miss.
+
+        Args:
+            key: Cache key
+            loader: Coroutine factory producing the value; None results are not cached
+            ttl_for: Maps a loaded value to its TTL in seconds (None = never expires)
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._load(key, loader, ttl_for))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget_in_flight(key, done))
+
+        # Shield so one cancelled waiter does not cancel the load for the
+        # others, but cancel it once nobody is waiting for it any more
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # Forget it now so a caller arriving before the done
+                    # callback runs starts a fresh load instead of joining
+                    self._forget_in_flight(key, task)
+                    task.cancel()
+
+    def _forget_in_flight(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    async def _load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_for: Callable[[Any], Optional[float]],
+    ) -> Optional[Any]:
+        if self.shared is not None:
+            found = await self.get_many_shared([key], ttl_for)
+            if key in found:
+                return found[key]
+
+        value = await loader()
+        if value is not None:
+            await self.set_many_shared([(key, value, ttl_for(value))])
+        return value
+
+    def stats(self) -> Dict:
+        """Counters for monitoring cache effectiveness"""
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "coalesced": self.coalesced,
+            "shared_hits": self.shared_hits,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,87 @@
+"""
+Circuit breaker for upstream APIs
+Fails fast while an API is down instead of spending requests and retries on it
+"""
+import logging
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} circuit open, retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed: requests flow; `failure_threshold` consecutive failures open it.
+    open: requests fail immediately with CircuitOpenError for `reset_timeout`
+        seconds.
+    half-open: a single probe request is let through; success closes the
+        circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+
+    def before_request(self):
+        """Raise CircuitOpenError unless a request may be sent now"""
+        if self.state == self.CLOSED:
+            return
+
+        now = time.monotonic()
+        retry_in = self._opened_at + self.reset_timeout - now
+        if self.state == self.OPEN and retry_in <= 0:
+            self.state = self.HALF_OPEN
+            self._probing = False
+
+        # Let exactly one probe through (another if it never reported back)
+        if self.state == self.HALF_OPEN and (
+            not self._probing or now - self._probe_started > self.reset_timeout
+        ):
+            self._probing = True
+            self._probe_started = now
+            return
+
+        raise CircuitOpenError(self.name, max(retry_in, 0.0))
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"{self.name} circuit closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    f"{self.name} circuit opened after {self.failures} failures"
+                )
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+    def stats(self) -> Dict:
+        return {"state": self.state, "consecutive_failures": self.failures}
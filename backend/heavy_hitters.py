@@ -0,0 +1,76 @@
+"""
+Heavy Hitters
+Bounded-memory top-K over a stream of weighted keys (Space-Saving algorithm)
+"""
+import heapq
+from typing import Dict, Hashable, List, NamedTuple, Tuple
+
+
+class HeavyHitter(NamedTuple):
+    key: Hashable
+    weight: float  # estimated total weight (never an underestimate)
+    error: float  # weight possibly inherited from evicted keys
+    count: int  # estimated number of updates
+
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving sketch.
+
+    Tracks at most `capacity` keys. When a new key arrives and the sketch is
+    full, the key with the smallest weight is replaced and the newcomer
+    inherits that weight as its error bound. Every key whose true weight
+    exceeds total_weight / capacity is guaranteed to be tracked, so with a
+    capacity a few times larger than K the top K are found in one pass with
+    constant memory.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.total_weight = 0.0
+
+        # key -> [weight, error, count]
+        self._counters: Dict[Hashable, List] = {}
+        # Lazy min-heap of (weight, key); entries go stale when a key's weight grows
+        self._heap: List[Tuple[float, Hashable]] = []
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def add(self, key: Hashable, weight: float = 1.0):
+        """Record one occurrence of key with the given weight"""
+        self.total_weight += weight
+        counter = self._counters.get(key)
+
+        if counter is None:
+            if len(self._counters) < self.capacity:
+                counter = [0.0, 0.0, 0]
+            else:
+                min_weight, min_key = self._pop_min()
+                evicted = self._counters.pop(min_key)
+                counter = [min_weight, min_weight, evicted[2]]
+            self._counters[key] = counter
+
+        counter[0] += weight
+        counter[2] += 1
+        heapq.heappush(self._heap, (counter[0], key))
+
+        # Drop stale heap entries once they dominate the heap
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c[0], k) for k, c in self._counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[float, Hashable]:
+        """Remove and return the live heap entry with the smallest weight"""
+        while True:
+            weight, key = heapq.heappop(self._heap)
+            counter = self._counters.get(key)
+            if counter is not None and counter[0] == weight:
+                return weight, key
+
+    def top(self, k: int) -> List[HeavyHitter]:
+        """The k heaviest keys, heaviest first"""
+        ranked = heapq.nlargest(k, self._counters.items(), key=lambda item: item[1][0])
+        return [HeavyHitter(key, weight, error, count) for key, (weight, error, count) in ranked]
@@ -0,0 +1,329 @@
+"""
+Batch Analysis Jobs
+SQLite-backed queue of large wallet lists, analyzed by background workers
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from polymarket_client import UpstreamUnavailableError
+from wallet_analyzer import WalletAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    Persistent batch analysis jobs.
+
+    A job is a wallet list plus a time range. Every wallet is a row that moves
+    from pending to running to done/failed, so a job survives restarts and can
+    be inspected while it runs. `run()` starts `workers` tasks that claim one
+    pending wallet at a time and analyze it through the shared analyzer, so
+    jobs draw from the same rate budget and result cache as interactive
+    requests. Workers do not take the analyzer's WALLET_CONCURRENCY slots, so
+    interactive requests never queue behind a job; `workers` is how many
+    wallets jobs add to the ones analyzed at once.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            time_range TEXT NOT NULL,
+            status TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS job_wallets (
+            job_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            wallet TEXT NOT NULL,
+            status TEXT NOT NULL,
+            claimed_at REAL,
+            trader_score REAL,
+            result TEXT,
+            error TEXT,
+            PRIMARY KEY (job_id, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_job_wallets_status ON job_wallets (status, job_id, position);
+    """
+
+    # Job states
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+
+    # Wallet states
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(
+        self,
+        analyzer: WalletAnalyzer,
+        path: str,
+        workers: int = 2,
+        lease_timeout: float = 600.0,
+        poll_interval: float = 1.0
+    ):
+        """
+        Args:
+            analyzer: Analyzer used for every wallet
+            path: SQLite database file (":memory:" for a throwaway queue)
+            workers: Wallets analyzed concurrently across all jobs
+            lease_timeout: Seconds after which a wallet still marked running
+                (worker crashed or restarted) is handed out again
+            poll_interval: Seconds idle workers wait before looking for jobs
+                submitted by other processes
+        """
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self.analyzer = analyzer
+        self.path = path
+        self.workers = workers
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(self.SCHEMA)
+        self._wakeup = asyncio.Event()
+
+    def submit(self, wallet_addresses: List[str], time_range: str) -> Dict:
+        """
+        Queue a job for a wallet list (duplicates and blanks are dropped).
+
+        Returns:
+            The new job's status (see get)
+
+        Raises:
+            ValueError: If no wallet address is left
+        """
+        wallets = list(dict.fromkeys(
+            address.strip() for address in wallet_addresses if address.strip()
+        ))
+        if not wallets:
+            raise ValueError("No wallet addresses provided")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        with self._db:
+            self._db.execute(
+                "INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, time_range, self.QUEUED, len(wallets), now, now),
+            )
+            self._db.executemany(
+                "INSERT INTO job_wallets (job_id, position, wallet, status) VALUES (?, ?, ?, ?)",
+                [(job_id, position, wallet, self.PENDING) for position, wallet in enumerate(wallets)],
+            )
+
+        logger.info(f"Queued job {job_id} with {len(wallets)} wallets for range {time_range}")
+        self._wakeup.set()
+        return self.get(job_id)
+
+    def get(self, job_id: str, offset: int = 0, limit: int = 0) -> Optional[Dict]:
+        """
+        Status and progress of a job, or None if it does not exist.
+
+        Args:
+            job_id: Job identifier returned by submit
+            offset: Skip this many finished results
+            limit: Include up to this many finished results, ranked by
+                trader score (0 returns progress only)
+        """
+        job = self._db.execute(
+            "SELECT time_range, status, total, created_at, updated_at FROM jobs WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        if job is None:
+            return None
+        time_range, status, total, created_at, updated_at = job
+
+        counts = dict(self._db.execute(
+            "SELECT status, COUNT(*) FROM job_wallets WHERE job_id = ? GROUP BY status",
+            (job_id,),
+        ).fetchall())
+
+        wallets = []
+        if limit > 0:
+            rows = self._db.execute(
+                """
+                SELECT result FROM job_wallets
+                WHERE job_id = ? AND status = ?
+                ORDER BY trader_score DESC, position
+                LIMIT ? OFFSET ?
+                """,
+                (job_id, self.DONE, limit, offset),
+            ).fetchall()
+            wallets = [json.loads(result) for (result,) in rows]
+
+        failures = self._db.execute(
+            "SELECT wallet, error FROM job_wallets WHERE job_id = ? AND status = ? ORDER BY position",
+            (job_id, self.FAILED),
+        ).fetchall()
+
+        return {
+            "job_id": job_id,
+            "range": time_range,
+            "status": status,
+            "total": total,
+            "completed": counts.get(self.DONE, 0),
+            "failed": counts.get(self.FAILED, 0),
+            "pending": counts.get(self.PENDING, 0) + counts.get(self.RUNNING, 0),
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "wallets": wallets,
+            "failures": [{"wallet": wallet, "detail": error} for wallet, error in failures],
+        }
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Stop a job: wallets not yet analyzed are skipped, finished results are kept"""
+        with self._db:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ? AND status IN (?, ?)",
+                (self.CANCELLED, time.time(), job_id, self.QUEUED, self.RUNNING),
+            )
+            if cursor.rowcount:
+                self._db.execute(
+                    "DELETE FROM job_wallets WHERE job_id = ? AND status = ?",
+                    (job_id, self.PENDING),
+                )
+        return self.get(job_id)
+
+    def _claim(self) -> Optional[tuple]:
+        """Mark the next wallet of the oldest unfinished job as running"""
+        now = time.time()
+        with self._db:
+            # The conditional UPDATE makes the claim atomic when several
+            # processes share the database
+            row = self._db.execute(
+                """
+                UPDATE job_wallets SET status = ?, claimed_at = ?
+                WHERE rowid = (
+                    SELECT job_wallets.rowid FROM job_wallets
+                    JOIN jobs ON jobs.job_id = job_wallets.job_id
+                    WHERE jobs.status IN (?, ?) AND (
+                        job_wallets.status = ?
+                        OR (job_wallets.status = ? AND job_wallets.claimed_at < ?)
+                    )
+                    ORDER BY jobs.created_at, job_wallets.position
+                    LIMIT 1
+                )
+                RETURNING job_id, position, wallet
+                """,
+                (
+                    self.RUNNING, now,
+                    self.QUEUED, self.RUNNING,
+                    self.PENDING, self.RUNNING, now - self.lease_timeout,
+                ),
+            ).fetchone()
+            if row is None:
+                return None
+
+            job_id = row[0]
+            self._db.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ? AND status = ?",
+                (self.RUNNING, now, job_id, self.QUEUED),
+            )
+            time_range = self._db.execute(
+                "SELECT time_range FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+        return row + (time_range,)
+
+    def _finish(
+        self,
+        job_id: str,
+        position: int,
+        result: Optional[Dict] = None,
+        error: Optional[str] = None
+    ):
+        """Store a wallet's outcome and complete the job after its last wallet"""
+        now = time.time()
+        with self._db:
+            if result is not None:
+                self._db.execute(
+                    """
+                    UPDATE job_wallets SET status = ?, trader_score = ?, result = ?
+                    WHERE job_id = ? AND position = ?
+                    """,
+                    (self.DONE, result["trader_score"], json.dumps(result), job_id, position),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE job_wallets SET status = ?, error = ? WHERE job_id = ? AND position = ?",
+                    (self.FAILED, error, job_id, position),
+                )
+
+            remaining = self._db.execute(
+                "SELECT COUNT(*) FROM job_wallets WHERE job_id = ? AND status IN (?, ?)",
+                (job_id, self.PENDING, self.RUNNING),
+            ).fetchone()[0]
+            self._db.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ? AND status = ?",
+                (self.COMPLETED if remaining == 0 else self.RUNNING, now, job_id, self.RUNNING),
+            )
+
+        if remaining == 0:
+            logger.info(f"Job {job_id} completed")
+
+    def _release(self, job_id: str, position: int):
+        """Hand a claimed wallet back to the queue"""
+        with self._db:
+            self._db.execute(
+                "UPDATE job_wallets SET status = ?, claimed_at = NULL WHERE job_id = ? AND position = ?",
+                (self.PENDING, job_id, position),
+            )
+
+    async def _work(self):
+        """Analyze claimed wallets until cancelled"""
+        while True:
+            claimed = self._claim()
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id, position, wallet, time_range = claimed
+            try:
+                result = await self.analyzer.analyze_wallet_shared(wallet, time_range)
+            except asyncio.CancelledError:
+                self._release(job_id, position)
+                raise
+            except UpstreamUnavailableError as e:
+                # Not the wallet's fault: retry it once the API is back
+                self._release(job_id, position)
+                logger.warning(f"Job {job_id} waiting for upstream: {e}")
+                await asyncio.sleep(max(e.retry_after or 0, self.poll_interval))
+                continue
+            except Exception as e:
+                logger.error(f"Job {job_id} failed to analyze wallet {wallet}: {e}")
+                self._finish(job_id, position, error=str(e))
+                continue
+
+            self._finish(job_id, position, result=result)
+
+    async def run(self):
+        """Process queued jobs with `workers` concurrent workers until cancelled"""
+        tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self):
+        """Close the database connection"""
+        self._db.close()
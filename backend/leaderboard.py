@@ -0,0 +1,202 @@
+"""
+Precomputed Leaderboard
+Background worker that keeps ranked wallet snapshots for every time range
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Dict, List, Optional, Tuple
+
+from cache import CacheBackend
+from wallet_analyzer import WalletAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+class Leaderboard:
+    """
+    In-memory ranked wallet snapshots for 7d/30d/90d.
+
+    `run()` recomputes every range on a schedule; endpoints read pages from the
+    latest snapshot instead of running the ranking pipeline per request.
+
+    With a shared cache backend, snapshots are published there too, so
+    workers that do not run `run()` serve the elected worker's snapshots
+    instead of ranking themselves. They only rank on their own when no
+    snapshot is at least two refresh intervals fresh.
+    """
+
+    RANGES = ("7d", "30d", "90d")
+
+    def __init__(
+        self,
+        analyzer: WalletAnalyzer,
+        size: int = 100,
+        refresh_interval: float = 1800.0,
+        shared: Optional[CacheBackend] = None
+    ):
+        """
+        Args:
+            analyzer: Analyzer used to rank wallets
+            size: Number of ranked wallets kept per range
+            refresh_interval: Seconds between full refreshes
+            shared: Optional cache shared with other worker processes
+        """
+        self.analyzer = analyzer
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.shared = shared
+
+        # range -> {"generated_at": ISO timestamp, "wallets": ranked analyses}
+        self._snapshots: Dict[str, Dict] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    def snapshot(self, time_range: str) -> Optional[Dict]:
+        """Latest snapshot for a range, or None before the first refresh"""
+        return self._snapshots.get(time_range)
+
+    async def refresh(self, time_range: str) -> Dict:
+        """
+        Recompute the ranking for a range and publish it as the new snapshot.
+
+        Concurrent calls for the same range share one computation.
+        """
+        task = self._refreshing.get(time_range)
+        if task is None:
+            task = self._track(time_range, self._compute(time_range))
+
+        # Shield so a cancelled caller does not abort the shared refresh
+        return await asyncio.shield(task)
+
+    def _track(self, time_range: str, work: Awaitable[Dict]) -> asyncio.Task:
+        """Register work as the in-flight refresh of a range"""
+        task = asyncio.ensure_future(work)
+        self._refreshing[time_range] = task
+
+        def forget(done: asyncio.Task):
+            if self._refreshing.get(time_range) is done:
+                del self._refreshing[time_range]
+            if not done.cancelled():
+                done.exception()  # Raised to the waiters, if there are any
+
+        task.add_done_callback(forget)
+        return task
+
+    async def _compute(self, time_range: str) -> Dict:
+        started = datetime.utcnow()
+        wallets = await self.analyzer.rank_wallets(
+            time_range=time_range,
+            limit=self.size,
+            offset=0,
+        )
+        snapshot = {
+            "generated_at": started.isoformat() + "Z",
+            "wallets": wallets,
+        }
+        await self._publish({time_range: snapshot})
+
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        logger.info(
+            f"Leaderboard {time_range} refreshed with {len(wallets)} wallets in {elapsed:.1f}s"
+        )
+        return snapshot
+
+    async def refresh_all(self) -> Dict[str, Dict]:
+        """
+        Recompute every range from one pass over the candidates' histories.
+
+        Candidates are analyzed once for all ranges (see
+        WalletAnalyzer.rank_wallets_windows) rather than once per range. The
+        pass is registered as the in-flight refresh of every range, so
+        get_page waits for it instead of starting another ranking.
+        """
+        task = asyncio.ensure_future(self._compute_all())
+
+        async def range_snapshot(time_range: str) -> Dict:
+            return (await asyncio.shield(task))[time_range]
+
+        for time_range in self.RANGES:
+            if time_range not in self._refreshing:
+                self._track(time_range, range_snapshot(time_range))
+
+        return await task
+
+    async def _compute_all(self) -> Dict[str, Dict]:
+        started = datetime.utcnow()
+        ranked = await self.analyzer.rank_wallets_windows(
+            time_ranges=self.RANGES,
+            limit=self.size,
+        )
+        generated_at = started.isoformat() + "Z"
+        await self._publish({
+            time_range: {"generated_at": generated_at, "wallets": wallets}
+            for time_range, wallets in ranked.items()
+        })
+
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        logger.info(
+            f"Leaderboard {', '.join(self.RANGES)} refreshed in {elapsed:.1f}s"
+        )
+        return self._snapshots
+
+    @staticmethod
+    def _shared_key(time_range: str) -> str:
+        return f"leaderboard:{time_range}"
+
+    async def _publish(self, snapshots: Dict[str, Dict]):
+        """Make new snapshots current here and for the other workers"""
+        self._snapshots.update(snapshots)
+        if self.shared is not None:
+            await self.shared.set_many([
+                (self._shared_key(time_range), snapshot, None)
+                for time_range, snapshot in snapshots.items()
+            ])
+
+    def _age(self, snapshot: Dict) -> float:
+        generated_at = datetime.fromisoformat(snapshot["generated_at"].rstrip("Z"))
+        return (datetime.utcnow() - generated_at).total_seconds()
+
+    async def _latest(self, time_range: str) -> Optional[Dict]:
+        """Local snapshot, replaced by the shared one when that is newer"""
+        snapshot = self._snapshots.get(time_range)
+        if self.shared is None or (snapshot is not None and self._age(snapshot) < self.refresh_interval):
+            return snapshot
+
+        key = self._shared_key(time_range)
+        published = (await self.shared.get_many([key])).get(key)
+        if published is not None and (
+            snapshot is None or published["generated_at"] > snapshot["generated_at"]
+        ):
+            self._snapshots[time_range] = snapshot = published
+        return snapshot
+
+    async def get_page(
+        self,
+        time_range: str,
+        limit: int,
+        offset: int
+    ) -> Tuple[Optional[str], List[Dict]]:
+        """
+        Page of the ranked wallets for a range.
+
+        Waits for a refresh if no snapshot exists yet, or if the newest one
+        is more than two refresh intervals old (the worker running `run()`
+        went away).
+
+        Returns:
+            (snapshot generation time, wallets)
+        """
+        snapshot = await self._latest(time_range)
+        if snapshot is None or self._age(snapshot) > 2 * self.refresh_interval:
+            snapshot = await self.refresh(time_range)
+
+        return snapshot["generated_at"], snapshot["wallets"][offset : offset + limit]
+
+    async def run(self):
+        """Refresh all ranges together forever"""
+        while True:
+            try:
+                await self.refresh_all()
+            except Exception as e:
+                logger.error(f"Leaderboard refresh failed: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
@@ -2,23 +2,173 @@
 PolAlfa Backend API
 FastAPI application for analyzing Polymarket trader wallets
 """
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional
+import asyncio
+import hashlib
+import json
 import logging
-
-from polymarket_client import PolymarketClient
+import os
+
+from cache import RedisCacheBackend
+from job_queue import JobQueue
+from metrics import CIRCUIT_OPEN, RATE_LIMIT_TOKENS, REGISTRY, record_cache_stats
+from leaderboard import Leaderboard
+from polymarket_client import PolymarketClient, UpstreamUnavailableError
+from trade_store import TradeStore
+from tracing import DEBUG_MODES, check_debug_mode, run_traced
 from wallet_analyzer import WalletAnalyzer
+from worker_lock import WorkerLock
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Local SQLite copy of wallet trades (empty path disables it)
+TRADE_STORE_PATH = os.getenv("TRADE_STORE_PATH", "data/trades.db")
+
+# Seconds a finished wallet analysis is reused for identical requests
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "60"))
+
+# Redis URL of a cache shared by all workers (empty keeps caches per process)
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", "")
+
+# Where the upstream rate-limit buckets live: a directory shares them between
+# all workers on this host, a redis:// URL across hosts, empty keeps them per process
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "data/ratelimit")
+
+# Initialize services
+shared_cache = RedisCacheBackend.from_url(SHARED_CACHE_URL) if SHARED_CACHE_URL else None
+polymarket_client = PolymarketClient(
+    shared_cache=shared_cache,
+    rate_limit_store=RATE_LIMIT_STORE
+)
+# How the leaderboard finds candidates: "trades" scans the window's trade
+# stream, "holders" reads the holders of the most traded open markets
+DISCOVERY_MODE = os.getenv("DISCOVERY_MODE", "trades")
+
+trade_store = TradeStore(TRADE_STORE_PATH) if TRADE_STORE_PATH else None
+wallet_analyzer = WalletAnalyzer(
+    polymarket_client,
+    trade_store=trade_store,
+    result_ttl=ANALYSIS_CACHE_TTL,
+    shared_cache=shared_cache,
+    discovery=DISCOVERY_MODE
+)
+
+# Seconds between background leaderboard refreshes (0 ranks on every request)
+LEADERBOARD_REFRESH_INTERVAL = float(os.getenv("LEADERBOARD_REFRESH_INTERVAL", "1800"))
+leaderboard = Leaderboard(
+    wallet_analyzer,
+    refresh_interval=LEADERBOARD_REFRESH_INTERVAL,
+    shared=shared_cache
+)
+
+# Seconds between refreshes of the open-market metadata index (0 disables)
+MARKET_PREFETCH_INTERVAL = float(os.getenv("MARKET_PREFETCH_INTERVAL", "900"))
+
+# SQLite file holding batch analysis jobs (empty disables the job API)
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "data/jobs.db")
+
+# Wallets analyzed concurrently by the batch job workers
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Largest wallet list accepted by one batch job
+JOB_MAX_WALLETS = int(os.getenv("JOB_MAX_WALLETS", "5000"))
+
+job_queue = JobQueue(wallet_analyzer, JOB_STORE_PATH, workers=JOB_WORKERS) if JOB_STORE_PATH else None
+
+# Whether this host runs the background loops (leaderboard refresh, market
+# prefetch, batch job workers); set to 0 on all but one host sharing a Redis
+BACKGROUND_TASKS = os.getenv("BACKGROUND_TASKS", "1") == "1"
+
+# File lock electing the one worker on this host that runs them (empty: every
+# worker runs them); the others take over when that worker exits
+BACKGROUND_LOCK_PATH = os.getenv("BACKGROUND_LOCK_PATH", "data/background.lock")
+BACKGROUND_LOCK_RETRY = 30.0
+background_lock = WorkerLock(BACKGROUND_LOCK_PATH) if BACKGROUND_LOCK_PATH else None
+
+# Directory receiving traces and profiles of ?debug= requests (empty: only
+# returned in the response)
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+# Accepted ?debug= values; validate_debug checks the mode can run here
+DEBUG_PATTERN = f"^({'|'.join(DEBUG_MODES)})$"
+
+
+async def refresh_market_index():
+    """Keep the market metadata cache warm with the open-market listing"""
+    while True:
+        try:
+            await polymarket_client.prefetch_markets()
+        except Exception as e:
+            logger.error(f"Market prefetch failed: {str(e)}")
+        await asyncio.sleep(MARKET_PREFETCH_INTERVAL)
+
+
+async def run_background_tasks():
+    """
+    Run the background loops once this worker holds the background lock.
+
+    Only one worker per host refreshes the leaderboard, prefetches markets
+    and works on batch jobs, so background upstream traffic does not grow
+    with the number of workers.
+    """
+    if background_lock is not None:
+        while not background_lock.try_acquire():
+            await asyncio.sleep(BACKGROUND_LOCK_RETRY)
+        logger.info(f"Running background tasks in worker {os.getpid()}")
+
+    loops = []
+    if MARKET_PREFETCH_INTERVAL > 0:
+        loops.append(asyncio.create_task(refresh_market_index()))
+    if LEADERBOARD_REFRESH_INTERVAL > 0:
+        loops.append(asyncio.create_task(leaderboard.run()))
+    if job_queue is not None:
+        loops.append(asyncio.create_task(job_queue.run()))
+
+    try:
+        await asyncio.gather(*loops)
+    finally:
+        for task in loops:
+            task.cancel()
+        await asyncio.gather(*loops, return_exceptions=True)
+        if background_lock is not None:
+            background_lock.release()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background tasks on startup and stop them on shutdown"""
+    await polymarket_client.start()
+
+    background = asyncio.create_task(run_background_tasks()) if BACKGROUND_TASKS else None
+
+    yield
+
+    if background is not None:
+        background.cancel()
+        await asyncio.gather(background, return_exceptions=True)
+
+    await polymarket_client.close()
+    if trade_store is not None:
+        trade_store.close()
+    if job_queue is not None:
+        job_queue.close()
+    if shared_cache is not None:
+        await shared_cache.close()
+
+
 app = FastAPI(
     title="PolAlfa API",
     description="Analyze Polymarket traders and rank wallets by profitability",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration - allow frontend
@@ -30,9 +180,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-polymarket_client = PolymarketClient()
-wallet_analyzer = WalletAnalyzer(polymarket_client)
+# How often long-running endpoints check whether the client went away
+DISCONNECT_POLL_INTERVAL = 1.0
+
+# Seconds of silence after which a streaming response sends a heartbeat,
+# keeping proxies (nginx proxy_read_timeout) from closing slow streams
+STREAM_HEARTBEAT_INTERVAL = 15.0
 
 
 class AnalyzeWalletsRequest(BaseModel):
@@ -53,6 +206,7 @@ class TopWallet(BaseModel):
 class TopWalletsResponse(BaseModel):
     range: str
     wallets: List[TopWallet]
+    generated_at: Optional[str] = None
 
 
 class MarketDetail(BaseModel):
@@ -79,6 +233,7 @@ class WalletAnalysis(BaseModel):
     resolved_markets: int
     profitable_markets: int
     markets: List[MarketDetail]
+    analyzed_at: Optional[str] = None
 
 
 class AnalyzeWalletsResponse(BaseModel):
@@ -86,6 +241,25 @@ class AnalyzeWalletsResponse(BaseModel):
     wallets: List[WalletAnalysis]
 
 
+class JobFailure(BaseModel):
+    wallet: str
+    detail: Optional[str]
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    range: str
+    status: str  # "queued", "running", "completed" or "cancelled"
+    total: int
+    completed: int
+    failed: int
+    pending: int
+    created_at: float
+    updated_at: float
+    wallets: List[WalletAnalysis]
+    failures: List[JobFailure]
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -99,19 +273,194 @@ async def root():
 @app.get("/health")
 async def health():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "market_cache": polymarket_client.market_cache.stats(),
+        "analysis_cache": wallet_analyzer.result_cache.stats(),
+        "rate_limits": await polymarket_client.rate_limit_stats(),
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics of this worker process.
+
+    Upstream request counts, latencies and 429s per endpoint, rate-limit
+    waits, cache hit ratios and per-stage timings of analysis and ranking.
+    """
+    for cache in (polymarket_client.market_cache, wallet_analyzer.result_cache):
+        record_cache_stats(cache.stats())
+    for api, stats in (await polymarket_client.rate_limit_stats()).items():
+        RATE_LIMIT_TOKENS.set(stats["tokens"], api=api)
+        CIRCUIT_OPEN.set(int(stats["circuit"]["state"] != "closed"), api=api)
+
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+async def run_until_disconnected(http_request: Request, work: Awaitable[Any]) -> Any:
+    """
+    Await work, cancelling it as soon as the HTTP client disconnects.
+
+    Keeps abandoned requests (closed tab, proxy timeout) from spending the
+    shared upstream rate budget.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                logger.info(f"Client disconnected, cancelling {http_request.url.path}")
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def upstream_unavailable(e: UpstreamUnavailableError) -> HTTPException:
+    """503 telling the client when the upstream API may be back"""
+    headers = {"Retry-After": str(max(1, round(e.retry_after)))} if e.retry_after else None
+    return HTTPException(
+        status_code=503,
+        detail=f"Polymarket API unavailable: {str(e)}",
+        headers=headers,
+    )
+
+
+def conditional_response(
+    http_request: Request,
+    body: BaseModel,
+    last_modified: Optional[datetime] = None
+) -> Response:
+    """
+    JSON response with ETag/Last-Modified validators.
+
+    Answers 304 Not Modified when the client's If-None-Match (or, without
+    one, If-Modified-Since) shows it already holds this exact body.
+    """
+    response = JSONResponse(content=body.model_dump(mode="json"))
+    headers = {"ETag": f'"{hashlib.sha1(response.body).hexdigest()}"'}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if_none_match = http_request.headers.get("if-none-match")
+    if_modified_since = http_request.headers.get("if-modified-since")
+    not_modified = False
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        not_modified = "*" in tags or headers["ETag"] in tags
+    elif if_modified_since is not None and last_modified is not None:
+        try:
+            not_modified = last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            not_modified = False
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return response
+
+
+def validate_debug(debug: Optional[str]):
+    """400 unless the requested debug mode can run in this process"""
+    if debug is None:
+        return
+    try:
+        check_debug_mode(debug)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def debug_response(body: BaseModel, trace: Dict) -> JSONResponse:
+    """Response body with the request's trace attached (never cached)"""
+    return JSONResponse(
+        {**body.model_dump(mode="json"), "trace": trace},
+        headers={"X-Trace-Id": trace["trace_id"], "Cache-Control": "no-store"},
+    )
+
+
+def stream_event(stream_format: str, kind: str, data: Optional[Dict] = None) -> str:
+    """Encode one event as an NDJSON line or a Server-Sent Event"""
+    if stream_format == "sse":
+        if kind == "heartbeat":
+            return ": heartbeat\n\n"
+        return f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"type": kind, "data": data}) + "\n"
+
+
+async def stream_wallet_analyses(
+    wallets: List[str],
+    time_range: str,
+    stream_format: str
+) -> AsyncIterator[str]:
+    """
+    Events for a streaming /api/analyze-wallets response.
+
+    A "wallet" event per analysis as soon as it completes (or an "error"
+    event for a wallet that failed), heartbeats while nothing is ready, and
+    a final "summary" event with every result ranked by trader score.
+    """
+    results: List[Dict] = []
+    analyses = wallet_analyzer.iter_wallet_analyses(wallets, time_range)
+    next_analysis = asyncio.ensure_future(analyses.__anext__())
+
+    try:
+        while True:
+            done, _ = await asyncio.wait({next_analysis}, timeout=STREAM_HEARTBEAT_INTERVAL)
+            if not done:
+                yield stream_event(stream_format, "heartbeat")
+                continue
+
+            try:
+                wallet, analysis, error = next_analysis.result()
+            except StopAsyncIteration:
+                break
+            next_analysis = asyncio.ensure_future(analyses.__anext__())
+
+            if analysis is None:
+                yield stream_event(stream_format, "error", {"wallet": wallet, "detail": str(error)})
+                continue
+            results.append(analysis)
+            yield stream_event(
+                stream_format, "wallet", WalletAnalysis(**analysis).model_dump(mode="json")
+            )
+
+        results.sort(key=lambda x: x["trader_score"], reverse=True)
+        summary = AnalyzeWalletsResponse(range=time_range, wallets=results)
+        yield stream_event(stream_format, "summary", summary.model_dump(mode="json"))
+    finally:
+        # Client went away (or the stream ended): stop unfinished analyses
+        if not next_analysis.done():
+            next_analysis.cancel()
+            await asyncio.gather(next_analysis, return_exceptions=True)
+        await analyses.aclose()
 
 
 @app.post("/api/analyze-wallets", response_model=AnalyzeWalletsResponse)
-async def analyze_wallets(request: AnalyzeWalletsRequest):
+async def analyze_wallets(
+    request: AnalyzeWalletsRequest,
+    http_request: Request,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|sse)$"),
+    debug: Optional[str] = Query(None, pattern=DEBUG_PATTERN),
+):
     """
     Analyze multiple wallets for profitability and consistency.
 
     Args:
         request: Contains list of wallet addresses and time range
+        stream: "ndjson" or "sse" to receive each wallet's result as soon as
+            it is ready, followed by a ranked summary (see stream_wallet_analyses)
+        debug: "trace" attaches a span tree of the request (wallets, upstream
+            calls, rate-limit waits, stages) under "trace"; "cprofile" and
+            "pyinstrument" add a CPU profile (see tracing.run_traced)
 
     Returns:
-        Analysis results with metrics and trader scores
+        Analysis results with metrics and trader scores. Identical concurrent
+        requests share one computation per wallet, and results are reused for
+        ANALYSIS_CACHE_TTL seconds; the response carries ETag/Last-Modified.
     """
     try:
         # Validate inputs
@@ -130,32 +479,59 @@ async def analyze_wallets(request: AnalyzeWalletsRequest):
                 detail="Invalid range. Must be '7d', '30d', or '90d'"
             )
 
+        validate_debug(debug)
+        if debug is not None and stream is not None:
+            raise HTTPException(status_code=400, detail="debug cannot be combined with stream")
+
         logger.info(f"Analyzing {len(request.wallets)} wallets for range {request.range}")
+        wallets = [wallet.strip() for wallet in request.wallets]
 
-        # Analyze each wallet
-        results = []
-        for wallet in request.wallets:
-            try:
-                analysis = await wallet_analyzer.analyze_wallet(
-                    wallet_address=wallet.strip(),
-                    time_range=request.range
-                )
-                results.append(analysis)
-            except Exception as e:
-                logger.error(f"Error analyzing wallet {wallet}: {str(e)}")
-                # Continue with other wallets even if one fails
-                continue
+        if stream is not None:
+            return StreamingResponse(
+                stream_wallet_analyses(wallets, request.range, stream),
+                media_type="text/event-stream" if stream == "sse" else "application/x-ndjson",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        # Analyze wallets concurrently; failed wallets are skipped
+        def analyze() -> Awaitable[List[Dict]]:
+            return run_until_disconnected(
+                http_request,
+                wallet_analyzer.analyze_wallets(wallets, time_range=request.range),
+            )
+
+        trace = None
+        if debug is None:
+            results = await analyze()
+        else:
+            results, trace = await run_traced(
+                analyze, debug, "analyze_wallets", TRACE_DIR,
+                wallets=wallets, range=request.range,
+            )
 
         # Sort by trader_score descending
         results.sort(key=lambda x: x["trader_score"], reverse=True)
 
-        return AnalyzeWalletsResponse(
-            range=request.range,
-            wallets=results
+        body = AnalyzeWalletsResponse(range=request.range, wallets=results)
+        if trace is not None:
+            return debug_response(body, trace)
+
+        analyzed_at = [
+            datetime.fromisoformat(result["analyzed_at"].replace("Z", "")).replace(tzinfo=timezone.utc)
+            for result in results
+            if result.get("analyzed_at")
+        ]
+
+        return conditional_response(
+            http_request,
+            body,
+            last_modified=max(analyzed_at, default=None),
         )
 
     except HTTPException:
         raise
+    except UpstreamUnavailableError as e:
+        raise upstream_unavailable(e)
     except Exception as e:
         logger.error(f"Error in analyze_wallets: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -163,27 +539,121 @@ async def analyze_wallets(request: AnalyzeWalletsRequest):
 
 @app.get("/api/top-wallets", response_model=TopWalletsResponse)
 async def top_wallets(
+    http_request: Request,
     range: str = Query("30d", pattern="^(7d|30d|90d)$"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    debug: Optional[str] = Query(None, pattern=DEBUG_PATTERN),
 ):
-    """Rank and return top-performing wallets for a time window."""
+    """
+    Rank and return top-performing wallets for a time window.
+
+    Pages are served from the background leaderboard snapshot (top
+    `leaderboard.size` wallets); the ranking only runs inline when background
+    refreshes are disabled. `debug` works as for /api/analyze-wallets.
+    """
     try:
-        logger.info(f"Ranking top wallets for range {range} with limit {limit} offset {offset}")
-        ranked = await wallet_analyzer.rank_wallets(
-            time_range=range,
-            limit=limit,
-            offset=offset,
-        )
+        validate_debug(debug)
+
+        async def rank() -> TopWalletsResponse:
+            if LEADERBOARD_REFRESH_INTERVAL > 0:
+                generated_at, ranked = await run_until_disconnected(
+                    http_request,
+                    leaderboard.get_page(range, limit=limit, offset=offset),
+                )
+                return TopWalletsResponse(range=range, wallets=ranked, generated_at=generated_at)
+
+            logger.info(f"Ranking top wallets for range {range} with limit {limit} offset {offset}")
+            ranked = await run_until_disconnected(
+                http_request,
+                wallet_analyzer.rank_wallets(
+                    time_range=range,
+                    limit=limit,
+                    offset=offset,
+                ),
+            )
+            return TopWalletsResponse(range=range, wallets=ranked)
 
-        return TopWalletsResponse(range=range, wallets=ranked)
+        if debug is None:
+            return await rank()
+        body, trace = await run_traced(
+            rank, debug, "top_wallets", TRACE_DIR,
+            range=range, limit=limit, offset=offset,
+        )
+        return debug_response(body, trace)
     except HTTPException:
         raise
+    except UpstreamUnavailableError as e:
+        raise upstream_unavailable(e)
     except Exception as e:
         logger.error(f"Error in top_wallets: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+def require_job_queue() -> JobQueue:
+    if job_queue is None:
+        raise HTTPException(status_code=404, detail="Batch jobs are disabled")
+    return job_queue
+
+
+@app.post("/api/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(request: AnalyzeWalletsRequest):
+    """
+    Queue a batch analysis of up to JOB_MAX_WALLETS wallets.
+
+    Returns immediately with the job id; poll GET /api/jobs/{job_id} for
+    progress and results. Jobs are stored in JOB_STORE_PATH and resume
+    after a restart.
+    """
+    queue = require_job_queue()
+
+    if not request.wallets:
+        raise HTTPException(status_code=400, detail="No wallets provided")
+
+    if not any(wallet.strip() for wallet in request.wallets):
+        raise HTTPException(status_code=422, detail="Wallet addresses must not be blank")
+
+    if len(request.wallets) > JOB_MAX_WALLETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {JOB_MAX_WALLETS} wallets allowed per job"
+        )
+
+    if request.range not in ["7d", "30d", "90d"]:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid range. Must be '7d', '30d', or '90d'"
+        )
+
+    return queue.submit(request.wallets, request.range)
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    limit: int = Query(100, ge=0, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Progress of a batch job plus a page of its finished analyses.
+
+    Results are ranked by trader score and grow while the job runs.
+    """
+    job = require_job_queue().get(job_id, offset=offset, limit=limit)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.delete("/api/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """Cancel a batch job; wallets already analyzed stay available"""
+    job = require_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,280 @@
+"""
+Metrics
+In-process counters and latency histograms, exposed in the Prometheus text format
+"""
+import bisect
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from tracing import span
+
+# Latency buckets in seconds, from cached lookups to slow paginated scans
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """A named metric family with a fixed set of label names"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic count per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels):
+        """Mirror a count that is kept elsewhere (e.g. cache hit counters)"""
+        self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Current value per label combination"""
+
+    kind = "gauge"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (durations) in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the enclosed block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def total(self, **labels) -> float:
+        entry = self._values.get(self._key(labels))
+        return entry[1] if entry else 0.0
+
+    def _samples(self) -> Iterator[str]:
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.label_names + ("le",), key + (_format_value(bound),)
+                )
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.label_names, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """The metrics of one process, rendered together for a scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "polalfa_upstream_requests_total",
+    "Polymarket API requests by endpoint and outcome (HTTP status or error)",
+    ("api", "endpoint", "status"),
+)
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "polalfa_upstream_request_seconds",
+    "Network time of Polymarket API requests, per attempt",
+    ("api", "endpoint"),
+)
+UPSTREAM_THROTTLED = REGISTRY.counter(
+    "polalfa_upstream_throttled_total",
+    "Polymarket API responses with status 429",
+    ("api", "endpoint"),
+)
+RATE_LIMIT_WAIT = REGISTRY.histogram(
+    "polalfa_rate_limit_wait_seconds",
+    "Time requests waited for a rate-limit token",
+    ("api",),
+)
+RATE_LIMIT_TOKENS = REGISTRY.gauge(
+    "polalfa_rate_limit_tokens",
+    "Tokens currently available in an API's rate-limit bucket",
+    ("api",),
+)
+CIRCUIT_OPEN = REGISTRY.gauge(
+    "polalfa_circuit_open",
+    "1 while an API's circuit breaker is open or half-open",
+    ("api",),
+)
+RETRY_SLEEP = REGISTRY.counter(
+    "polalfa_upstream_retry_sleep_seconds_total",
+    "Backoff time spent between retries of failed requests",
+    ("api",),
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "polalfa_stage_seconds",
+    "Duration of analysis and ranking stages (stages nest within their callers)",
+    ("stage",),
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "polalfa_cache_lookups_total",
+    "Cache lookups by cache and result",
+    ("cache", "result"),
+)
+CACHE_SHARED_HITS = REGISTRY.counter(
+    "polalfa_cache_shared_hits_total",
+    "Local cache misses answered by the shared (Redis) cache",
+    ("cache",),
+)
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "polalfa_cache_hit_ratio",
+    "Share of cache lookups answered from the cache",
+    ("cache",),
+)
+CACHE_SIZE = REGISTRY.gauge(
+    "polalfa_cache_entries",
+    "Entries held in the local cache",
+    ("cache",),
+)
+
+
+def timed_stage(stage: str) -> Callable:
+    """
+    Decorator recording a function's duration under STAGE_SECONDS, and as a
+    span when the request is traced
+    """
+    def decorate(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with STAGE_SECONDS.time(stage=stage), span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with STAGE_SECONDS.time(stage=stage), span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def record_cache_stats(stats: Dict):
+    """Copy an AsyncTTLCache.stats() snapshot into the cache metrics"""
+    cache = stats["name"]
+    CACHE_LOOKUPS.set(stats["hits"], cache=cache, result="hit")
+    CACHE_LOOKUPS.set(stats["misses"], cache=cache, result="miss")
+    CACHE_SHARED_HITS.set(stats["shared_hits"], cache=cache)
+    CACHE_HIT_RATIO.set(stats["hit_ratio"], cache=cache)
+    CACHE_SIZE.set(stats["size"], cache=cache)
@@ -3,14 +3,81 @@ Polymarket API Client
 Uses official Polymarket endpoints from https://docs.polymarket.com
 """
 import aiohttp
+import json
 import logging
-from typing import Dict, List, Optional
+import random
+import sys
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit
 import asyncio
+import time
+
+from cache import AsyncTTLCache, CacheBackend
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from metrics import RATE_LIMIT_WAIT, RETRY_SLEEP, UPSTREAM_LATENCY, UPSTREAM_REQUESTS, UPSTREAM_THROTTLED
+from rate_limiter import TokenBucket, create_bucket
+from tracing import annotate, span
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # Optional: orjson decodes large trade pages several times faster
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
 
+class UpstreamUnavailableError(Exception):
+    """A Polymarket API could not be reached (retries exhausted or circuit open)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Share one copy of strings repeated across many trades (ids, sides)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(slots=True)
+class Trade:
+    """
+    Compact trade record parsed once from a Data API trade object.
+
+    Only the fields the analysis needs are kept; numeric fields are parsed
+    to floats at ingest. A missing price is kept as None because stake/PnL
+    and volume default it differently.
+    """
+
+    market: Optional[str]
+    asset_id: str
+    side: str
+    size: float
+    price: Optional[float]
+    timestamp: Optional[int]
+    maker: Optional[str]
+    trade_id: Optional[str] = None
+
+    @classmethod
+    def from_api(cls, trade: Dict) -> "Trade":
+        """Build a Trade from a raw /trades object"""
+        price = trade.get("price")
+        return cls(
+            market=_intern(trade.get("market") or trade.get("condition_id")),
+            asset_id=_intern(trade.get("asset_id", "")),
+            side=_intern(trade.get("side", "")),
+            size=float(trade.get("size", 0)),
+            price=float(price) if price is not None else None,
+            timestamp=trade.get("timestamp"),
+            maker=_intern(trade.get("maker")),
+            trade_id=trade.get("id") or trade.get("transactionHash"),
+        )
+
+
 class PolymarketClient:
     """
     Client for interacting with Polymarket's official APIs:
@@ -22,45 +89,272 @@ class PolymarketClient:
     GAMMA_API_BASE = "https://gamma-api.polymarket.com"
     DATA_API_BASE = "https://data-api.polymarket.com"
 
-    def __init__(self):
+    # Rate limiting: 100 requests per 60 seconds per IP, for both APIs together
+    # https://docs.polymarket.com/quickstart/introduction/rate-limits
+    RATE_LIMIT_REQUESTS = 100
+    RATE_LIMIT_PERIOD = 60.0
+    RATE_LIMIT_BURST = 10
+    # Part of that budget given to Gamma (market metadata: batched and cached);
+    # the Data API, which pages through trade histories, gets the rest
+    GAMMA_RATE_SHARE = 0.3
+
+    # Upper bound on requests awaiting a response at the same time; also the
+    # connection pool size, so every in-flight request gets a kept-alive socket
+    MAX_IN_FLIGHT = 20
+
+    # Connection reuse: resolved hosts and idle sockets are kept this long
+    DNS_CACHE_TTL = 300
+    KEEPALIVE_TIMEOUT = 60.0
+
+    # Request timeouts (seconds): whole request, connection setup, each read
+    REQUEST_TIMEOUT = 30.0
+    CONNECT_TIMEOUT = 5.0
+    READ_TIMEOUT = 20.0
+
+    # Retries for 429/5xx/connection errors: full-jitter exponential backoff
+    MAX_RETRIES = 4
+    RETRY_BASE_DELAY = 0.5
+    RETRY_MAX_DELAY = 30.0
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    # Consecutive failures that open an API's circuit, and how long it stays open
+    CIRCUIT_FAILURE_THRESHOLD = 5
+    CIRCUIT_RESET_TIMEOUT = 30.0
+
+    # Market metadata cache: resolved markets never change, so they never expire;
+    # open markets are refreshed after a short TTL
+    MARKET_CACHE_SIZE = 20000
+    OPEN_MARKET_TTL = 300.0
+
+    # Open markets loaded by one prefetch, most traded first. Kept at a quarter
+    # of MARKET_CACHE_SIZE so refreshes cannot evict the resolved markets
+    PREFETCH_PAGE_SIZE = 500
+    PREFETCH_MAX_PAGES = 10
+
+    def __init__(
+        self,
+        shared_cache: Optional[CacheBackend] = None,
+        rate_limit_store: str = ""
+    ):
+        """
+        Args:
+            shared_cache: Optional cache shared with other worker processes,
+                used behind the in-process market metadata cache
+            rate_limit_store: Where the token buckets live: "" per process, a
+                directory (file lock, shared by all processes on this host) or
+                a redis:// URL (shared across hosts); see create_bucket
+        """
         self.session: Optional[aiohttp.ClientSession] = None
-        # Rate limiting: 100 requests per 60 seconds per IP
-        # https://docs.polymarket.com/quickstart/introduction/rate-limits
-        self.rate_limit_delay = 0.6  # 600ms between requests to stay safe
+        # The per-IP budget is split between two token buckets, so Gamma
+        # lookups and Data API pages do not starve each other but together
+        # stay within it
+        gamma_requests = round(self.RATE_LIMIT_REQUESTS * self.GAMMA_RATE_SHARE)
+        gamma_burst = round(self.RATE_LIMIT_BURST * self.GAMMA_RATE_SHARE)
+        self.gamma_limiter = create_bucket(
+            rate_limit_store, "gamma",
+            gamma_requests, self.RATE_LIMIT_PERIOD, burst=gamma_burst
+        )
+        self.data_limiter = create_bucket(
+            rate_limit_store, "data",
+            self.RATE_LIMIT_REQUESTS - gamma_requests, self.RATE_LIMIT_PERIOD,
+            burst=self.RATE_LIMIT_BURST - gamma_burst
+        )
+        self.gamma_breaker = CircuitBreaker(
+            "gamma", self.CIRCUIT_FAILURE_THRESHOLD, self.CIRCUIT_RESET_TIMEOUT
+        )
+        self.data_breaker = CircuitBreaker(
+            "data", self.CIRCUIT_FAILURE_THRESHOLD, self.CIRCUIT_RESET_TIMEOUT
+        )
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self.market_cache = AsyncTTLCache(
+            max_size=self.MARKET_CACHE_SIZE, name="markets", shared=shared_cache
+        )
 
     async def _ensure_session(self):
         """Ensure aiohttp session is created"""
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
+            # One pool for both API hosts: the token buckets admit at most a
+            # few requests per second, so MAX_IN_FLIGHT sockets kept alive
+            # between them are never the bottleneck and avoid new handshakes
+            connector = aiohttp.TCPConnector(
+                limit=self.MAX_IN_FLIGHT,
+                limit_per_host=self.MAX_IN_FLIGHT,
+                ttl_dns_cache=self.DNS_CACHE_TTL,
+                keepalive_timeout=self.KEEPALIVE_TIMEOUT,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=self.REQUEST_TIMEOUT,
+                connect=self.CONNECT_TIMEOUT,
+                sock_read=self.READ_TIMEOUT,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=timeout,
+                headers={"Accept": "application/json"},
+            )
+        if self._in_flight is None:
+            self._in_flight = asyncio.Semaphore(self.MAX_IN_FLIGHT)
+
+    async def start(self):
+        """Open the HTTP session (called on application startup)"""
+        await self._ensure_session()
+
+    def _limiter_for(self, url: str) -> TokenBucket:
+        """Pick the token bucket for the API a URL belongs to"""
+        if url.startswith(self.GAMMA_API_BASE):
+            return self.gamma_limiter
+        return self.data_limiter
+
+    def _breaker_for(self, url: str) -> CircuitBreaker:
+        """Pick the circuit breaker for the API a URL belongs to"""
+        if url.startswith(self.GAMMA_API_BASE):
+            return self.gamma_breaker
+        return self.data_breaker
+
+    def _metric_labels(self, url: str) -> Tuple[str, str]:
+        """(api, endpoint) metric labels, with ids collapsed out of the path"""
+        api = "gamma" if url.startswith(self.GAMMA_API_BASE) else "data"
+        path = urlsplit(url).path.rstrip("/") or "/"
+        head, _, rest = path.lstrip("/").partition("/")
+        endpoint = f"/{head}/{{id}}" if rest else f"/{head}"
+        return api, endpoint
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Retry-After when the upstream gave one, else full-jitter exponential backoff"""
+        if retry_after is not None:
+            return min(retry_after, self.RETRY_MAX_DELAY)
+        return random.uniform(0, min(self.RETRY_MAX_DELAY, self.RETRY_BASE_DELAY * 2 ** attempt))
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Retry-After header as seconds (delta-seconds or HTTP date)"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+        except (TypeError, ValueError):
+            return None
 
     async def _get(self, url: str, params: Optional[Dict] = None) -> Dict:
         """
-        Make GET request with rate limiting.
+        Make GET request with rate limiting, retries and a circuit breaker.
 
         Rate limits: 100 requests per 60 seconds per IP
         https://docs.polymarket.com/quickstart/introduction/rate-limits
-        """
-        await self._ensure_session()
 
-        # Apply rate limiting delay
-        await asyncio.sleep(self.rate_limit_delay)
+        Each call takes a token from its API's bucket, so bursts go out
+        immediately and concurrent callers share the budget.
 
-        try:
-            async with self.session.get(url, params=params) as response:
-                response.raise_for_status()
-                return await response.json()
-        except aiohttp.ClientResponseError as e:
-            logger.error(f"HTTP error {e.status} for {url}: {e.message}")
-            raise
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {str(e)}")
-            raise
+        429, 5xx, connection errors and timeouts are retried up to
+        MAX_RETRIES times with jittered exponential backoff, honouring
+        Retry-After. A 429 also pauses and slows down the API's bucket, which
+        speeds up again as requests succeed. Repeated 5xx/connection failures
+        open the API's circuit breaker, after which calls fail fast.
+
+        Raises:
+            UpstreamUnavailableError: retries exhausted or circuit open
+            aiohttp.ClientResponseError: non-retryable HTTP error (e.g. 404)
+        """
+        await self._ensure_session()
+        limiter = self._limiter_for(url)
+        breaker = self._breaker_for(url)
+        api, endpoint = self._metric_labels(url)
+
+        with span("upstream", api=api, endpoint=endpoint, url=url, params=params):
+            for attempt in range(self.MAX_RETRIES + 1):
+                try:
+                    breaker.before_request()
+                except CircuitOpenError as e:
+                    raise UpstreamUnavailableError(str(e), retry_after=e.retry_in) from e
+
+                # Wait for a rate limit token before taking an in-flight slot
+                with RATE_LIMIT_WAIT.time(api=api), span("rate_limit_wait"):
+                    await limiter.acquire()
+
+                retry_after: Optional[float] = None
+                answered = False
+                try:
+                    async with self._in_flight:
+                        started = time.perf_counter()
+                        try:
+                            with span("attempt", attempt=attempt + 1):
+                                async with self.session.get(url, params=params) as response:
+                                    UPSTREAM_REQUESTS.inc(api=api, endpoint=endpoint, status=response.status)
+                                    annotate(status=response.status)
+                                    answered = True
+                                    if response.status not in self.RETRY_STATUSES:
+                                        response.raise_for_status()
+                                        body = await response.read()
+                                        try:
+                                            data = _json_loads(body)
+                                        except ValueError as e:
+                                            # Same outcome as response.json() on a non-JSON body
+                                            raise aiohttp.ContentTypeError(
+                                                response.request_info,
+                                                response.history,
+                                                status=response.status,
+                                                message=f"Invalid JSON body: {e}",
+                                                headers=response.headers,
+                                            ) from e
+                                        breaker.record_success()
+                                        await limiter.speed_up()
+                                        return data
+
+                                    status = response.status
+                                    retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+                                    error = f"HTTP {status}"
+                        finally:
+                            UPSTREAM_LATENCY.observe(
+                                time.perf_counter() - started, api=api, endpoint=endpoint
+                            )
+                except aiohttp.ClientResponseError as e:
+                    # Upstream answered, so it is up; the request itself is bad
+                    breaker.record_success()
+                    logger.error(f"HTTP error {e.status} for {url}: {e.message}")
+                    raise
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    status = None
+                    error = str(e) or type(e).__name__
+                    if not answered:
+                        UPSTREAM_REQUESTS.inc(api=api, endpoint=endpoint, status=type(e).__name__)
+
+                delay = self._retry_delay(attempt, retry_after)
+                if status == 429:
+                    UPSTREAM_THROTTLED.inc(api=api, endpoint=endpoint)
+                    await limiter.slow_down()
+                    # Every caller of this API waits out the pause, not just this one
+                    await limiter.pause(delay)
+                else:
+                    breaker.record_failure()
+
+                if attempt == self.MAX_RETRIES:
+                    logger.error(f"Giving up on {url} after {attempt + 1} attempts: {error}")
+                    raise UpstreamUnavailableError(
+                        f"{url} failed after {attempt + 1} attempts: {error}",
+                        retry_after=retry_after,
+                    )
+
+                logger.warning(f"{error} for {url}, retry {attempt + 1} in {delay:.1f}s")
+                # After a 429 the paused bucket already makes the next acquire wait
+                if status != 429:
+                    RETRY_SLEEP.inc(delay, api=api)
+                    with span("retry_sleep"):
+                        await asyncio.sleep(delay)
 
     async def get_markets(
         self,
         limit: int = 100,
         offset: int = 0,
-        active: Optional[bool] = None
+        active: Optional[bool] = None,
+        closed: Optional[bool] = None,
+        condition_ids: Optional[List[str]] = None,
+        order: Optional[str] = None,
+        ascending: Optional[bool] = None
     ) -> List[Dict]:
         """
         Get markets from Gamma Markets API.
@@ -68,6 +362,12 @@ class PolymarketClient:
         Endpoint: GET https://gamma-api.polymarket.com/markets
         Docs: https://docs.polymarket.com/developers/gamma-markets-api/overview
 
+        Query params:
+        - limit, offset: pagination
+        - active, closed: status filters
+        - condition_ids: only return these markets (repeated query param)
+        - order, ascending: sort field (e.g. "volume24hr") and direction
+
         Returns list of market objects with:
         - condition_id, question_id, market_slug
         - question (title)
@@ -81,30 +381,174 @@ class PolymarketClient:
         }
         if active is not None:
             params["active"] = str(active).lower()
+        if closed is not None:
+            params["closed"] = str(closed).lower()
+        if condition_ids:
+            params["condition_ids"] = list(condition_ids)
+        if order is not None:
+            params["order"] = order
+        if ascending is not None:
+            params["ascending"] = str(ascending).lower()
 
         url = f"{self.GAMMA_API_BASE}/markets"
         logger.info(f"Fetching markets from Gamma API: {url}")
 
-        try:
-            response = await self._get(url, params)
-            # Response is a list of market objects
-            return response if isinstance(response, list) else []
-        except Exception as e:
-            logger.error(f"Error fetching markets: {str(e)}")
-            return []
+        response = await self._get(url, params)
+        # Response is a list of market objects
+        return response if isinstance(response, list) else []
+
+    @staticmethod
+    def market_condition_id(market: Dict) -> Optional[str]:
+        """Condition id of a market object (Gamma uses camelCase in listings)"""
+        return market.get("condition_id") or market.get("conditionId")
+
+    def _market_entries(self, markets: List[Dict]) -> List[Tuple[str, Dict, Optional[float]]]:
+        """(condition_id, market, ttl) cache entries for market objects"""
+        return [
+            (condition_id, market, self._market_ttl(market))
+            for market in markets
+            if (condition_id := self.market_condition_id(market))
+        ]
+
+    def cache_markets(self, markets: List[Dict]) -> int:
+        """
+        Store market objects in the local metadata cache.
+
+        Returns:
+            Number of markets cached
+        """
+        entries = self._market_entries(markets)
+        for condition_id, market, ttl in entries:
+            self.market_cache.set(condition_id, market, ttl)
+        return len(entries)
+
+    async def share_markets(self, markets: List[Dict]) -> int:
+        """
+        Store market objects in the metadata cache, including the shared
+        cache if there is one.
+
+        Returns:
+            Number of markets cached
+        """
+        entries = self._market_entries(markets)
+        await self.market_cache.set_many_shared(entries)
+        return len(entries)
+
+    async def prefetch_markets(
+        self,
+        closed: Optional[bool] = False,
+        page_size: Optional[int] = None,
+        max_pages: Optional[int] = None
+    ) -> int:
+        """
+        Page through the Gamma /markets listing and load it into the cache.
+
+        By default only open markets are fetched: resolved markets are cached
+        without expiry once seen, so periodic refreshes only need to revisit
+        markets that can still change. Markets come most traded first and at
+        most PREFETCH_PAGE_SIZE * PREFETCH_MAX_PAGES are loaded, leaving most
+        of the cache to the resolved markets.
+
+        Returns:
+            Number of markets cached
+        """
+        page_size = page_size or self.PREFETCH_PAGE_SIZE
+        max_pages = max_pages or self.PREFETCH_MAX_PAGES
+        cached = 0
+        for page in range(max_pages):
+            markets = await self.get_markets(
+                limit=page_size,
+                offset=page * page_size,
+                closed=closed,
+                order="volume24hr",
+                ascending=False
+            )
+            cached += await self.share_markets(markets)
+            if len(markets) < page_size:
+                break
+
+        logger.info(f"Prefetched {cached} markets into the metadata cache")
+        return cached
+
+    async def get_markets_by_ids(
+        self,
+        condition_ids: List[str],
+        batch_size: int = 50
+    ) -> Dict[str, Dict]:
+        """
+        Resolve many markets with as few Gamma requests as possible.
+
+        Cached markets are answered locally (or from the shared cache); the
+        rest are requested in batches through the `condition_ids` filter of
+        /markets and cached.
+
+        Returns:
+            Dict[condition_id, market] for every market that was found
+        """
+        found: Dict[str, Dict] = {}
+        missing: List[str] = []
+        for condition_id in dict.fromkeys(condition_ids):
+            market = self.market_cache.get(condition_id)
+            if market is not None:
+                found[condition_id] = market
+            else:
+                missing.append(condition_id)
+
+        if missing:
+            found.update(await self.market_cache.get_many_shared(missing, self._market_ttl))
+            missing = [condition_id for condition_id in missing if condition_id not in found]
+
+        batches = [
+            missing[i:i + batch_size] for i in range(0, len(missing), batch_size)
+        ]
+        pages = await asyncio.gather(*(
+            self.get_markets(limit=len(batch), condition_ids=batch)
+            for batch in batches
+        ))
+
+        for markets in pages:
+            await self.share_markets(markets)
+            for market in markets:
+                condition_id = self.market_condition_id(market)
+                if condition_id:
+                    found[condition_id] = market
+
+        return found
+
+    def cached_market(self, condition_id: str) -> Optional[Dict]:
+        """Market metadata if already cached locally; never makes a request"""
+        return self.market_cache.peek(condition_id)
 
     async def get_market_by_id(self, condition_id: str) -> Optional[Dict]:
         """
         Get a single market by condition_id from Gamma Markets API.
 
         Endpoint: GET https://gamma-api.polymarket.com/markets/{condition_id}
+
+        Results are served from `market_cache` when possible, and concurrent
+        lookups of the same market share one request.
         """
+        return await self.market_cache.get_or_load(
+            condition_id,
+            lambda: self._fetch_market(condition_id),
+            ttl_for=self._market_ttl,
+        )
+
+    def _market_ttl(self, market: Dict) -> Optional[float]:
+        """Cache lifetime for a market: forever once resolved, short while open"""
+        if market.get("resolved"):
+            return None
+        return self.OPEN_MARKET_TTL
+
+    async def _fetch_market(self, condition_id: str) -> Optional[Dict]:
+        """Fetch a single market from the Gamma API, bypassing the cache"""
         url = f"{self.GAMMA_API_BASE}/markets/{condition_id}"
         logger.info(f"Fetching market {condition_id}")
 
         try:
             return await self._get(url)
-        except Exception as e:
+        except aiohttp.ClientResponseError as e:
+            # Unknown market (404) or malformed response: no metadata
             logger.error(f"Error fetching market {condition_id}: {str(e)}")
             return None
 
@@ -116,7 +560,7 @@ class PolymarketClient:
         offset: int = 0,
         start_ts: Optional[int] = None,
         end_ts: Optional[int] = None
-    ) -> List[Dict]:
+    ) -> List[Trade]:
         """
         Get trades from Data API.
 
@@ -129,13 +573,17 @@ class PolymarketClient:
         - limit, offset: pagination
         - start_ts, end_ts: Unix timestamps in seconds
 
-        Returns list of trade objects with:
+        Raw trade objects contain:
         - id, market, asset_id
         - maker, taker
         - size, price
         - side (BUY/SELL)
         - timestamp
         - etc.
+
+        Returns them parsed into compact Trade records. Failed requests raise
+        instead of returning an empty page, so an outage can never pass for
+        a wallet without trades.
         """
         params = {
             "limit": limit,
@@ -153,12 +601,85 @@ class PolymarketClient:
         url = f"{self.DATA_API_BASE}/trades"
         logger.info(f"Fetching trades for maker={maker}, market={market}")
 
-        try:
-            response = await self._get(url, params)
-            return response if isinstance(response, list) else []
-        except Exception as e:
-            logger.error(f"Error fetching trades: {str(e)}")
+        response = await self._get(url, params)
+        if not isinstance(response, list):
             return []
+        return [Trade.from_api(trade) for trade in response]
+
+    async def _iter_pages(
+        self,
+        fetch_page: Callable[[int], Awaitable[List[Dict]]],
+        page_size: int,
+        max_pages: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield every item of an offset-paginated endpoint.
+
+        The request for the next page is started before the current page is
+        handed to the consumer, so network time overlaps with processing.
+        Iteration stops at the first short page (or after max_pages).
+        """
+        offset = 0
+        pages = 0
+        next_page: Optional[asyncio.Future] = asyncio.ensure_future(fetch_page(offset))
+
+        try:
+            while next_page is not None:
+                page = await next_page
+                pages += 1
+                next_page = None
+
+                if len(page) >= page_size and (max_pages is None or pages < max_pages):
+                    offset += page_size
+                    next_page = asyncio.ensure_future(fetch_page(offset))
+
+                for item in page:
+                    yield item
+        finally:
+            # Consumer stopped early: don't leave the prefetch running
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+    def iter_trades(
+        self,
+        market: Optional[str] = None,
+        maker: Optional[str] = None,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        page_size: int = 1000,
+        max_pages: Optional[int] = None
+    ) -> AsyncIterator[Trade]:
+        """
+        Stream all trades matching the filters, one page at a time.
+
+        Same filters as get_trades; pages through the full result set
+        instead of returning a single page.
+        """
+        return self._iter_pages(
+            lambda offset: self.get_trades(
+                market=market,
+                maker=maker,
+                limit=page_size,
+                offset=offset,
+                start_ts=start_ts,
+                end_ts=end_ts
+            ),
+            page_size,
+            max_pages
+        )
+
+    def iter_activity(
+        self,
+        user: str,
+        page_size: int = 1000,
+        max_pages: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """Stream all activity events for a wallet, one page at a time."""
+        return self._iter_pages(
+            lambda offset: self.get_activity(user=user, limit=page_size, offset=offset),
+            page_size,
+            max_pages
+        )
 
     async def get_activity(
         self,
@@ -191,12 +712,8 @@ class PolymarketClient:
         url = f"{self.DATA_API_BASE}/activity"
         logger.info(f"Fetching activity for user {user}")
 
-        try:
-            response = await self._get(url, params)
-            return response if isinstance(response, list) else []
-        except Exception as e:
-            logger.error(f"Error fetching activity for {user}: {str(e)}")
-            return []
+        response = await self._get(url, params)
+        return response if isinstance(response, list) else []
 
     async def get_holders(
         self,
@@ -213,10 +730,12 @@ class PolymarketClient:
         - market: condition_id (required)
         - limit: number of holders
 
-        Returns list of holder objects with:
-        - user: wallet address
-        - balance: token balance
+        Returns one entry per outcome token, each with a `holders` list of
+        objects with:
+        - proxyWallet: wallet address
+        - amount: token balance
         - etc.
+        (see holder_balances)
         """
         params = {
             "market": market,
@@ -226,14 +745,42 @@ class PolymarketClient:
         url = f"{self.DATA_API_BASE}/holders"
         logger.info(f"Fetching holders for market {market}")
 
-        try:
-            response = await self._get(url, params)
-            return response if isinstance(response, list) else []
-        except Exception as e:
-            logger.error(f"Error fetching holders for market {market}: {str(e)}")
-            return []
+        response = await self._get(url, params)
+        return response if isinstance(response, list) else []
+
+    @staticmethod
+    def holder_balances(response: List[Dict]) -> List[Tuple[str, float]]:
+        """
+        (wallet, balance) pairs from a /holders response.
+
+        Accepts the per-token grouping ({"token", "holders": [...]}) as well
+        as a flat list of holders, with either proxyWallet/amount or
+        user/balance fields.
+        """
+        balances = []
+        for entry in response:
+            holders = entry.get("holders") if isinstance(entry.get("holders"), list) else [entry]
+            for holder in holders:
+                wallet = holder.get("proxyWallet") or holder.get("user")
+                if not wallet:
+                    continue
+                try:
+                    balance = float(holder.get("amount", holder.get("balance")) or 0)
+                except (TypeError, ValueError):
+                    balance = 0.0
+                balances.append((wallet, balance))
+        return balances
+
+    async def rate_limit_stats(self) -> Dict[str, Dict]:
+        """Token levels and circuit state of both APIs"""
+        return {
+            "gamma": {**await self.gamma_limiter.stats(), "circuit": self.gamma_breaker.stats()},
+            "data": {**await self.data_limiter.stats(), "circuit": self.data_breaker.stats()},
+        }
 
     async def close(self):
-        """Close the aiohttp session"""
+        """Close the aiohttp session and rate limiter resources"""
         if self.session and not self.session.closed:
             await self.session.close()
+        await self.gamma_limiter.close()
+        await self.data_limiter.close()
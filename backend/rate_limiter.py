@@ -0,0 +1,387 @@
+"""
+Async rate limiting for Polymarket API calls
+Token buckets that allow short bursts while respecting the per-IP budget,
+either per process or shared by every process on a host (file lock) or
+across hosts (Redis)
+"""
+import asyncio
+import logging
+import os
+import struct
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # Optional: only needed for Redis-backed buckets
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Async token bucket shared by every request to one upstream API.
+
+    The bucket holds up to `burst` tokens and refills continuously. Each request
+    takes one token; when the bucket is empty callers wait (in FIFO order) until
+    a token becomes available. Waiting never holds a connection, so many requests
+    can be in flight at once as long as tokens are available.
+
+    To never exceed `max_requests` in any sliding `period` window the refill rate
+    is `(max_requests - burst) / period`: a full burst plus one period of refill
+    adds up to exactly `max_requests`.
+
+    The refill rate adapts to upstream feedback: `slow_down()` (on a 429)
+    halves it, down to MIN_RATE_FACTOR of nominal, and every `speed_up()`
+    (on a success) adds back RECOVERY_STEP of nominal until it is restored.
+    `pause()` empties the bucket for a Retry-After period. Shared buckets
+    keep the rate next to the tokens, so a 429 seen by one worker slows
+    every worker drawing from the bucket.
+    """
+
+    BACKEND = "memory"
+
+    MIN_RATE_FACTOR = 0.1
+    RECOVERY_STEP = 0.05
+
+    def __init__(self, max_requests: int, period: float, burst: int = 10):
+        if burst >= max_requests:
+            raise ValueError("burst must be smaller than max_requests")
+
+        self.max_requests = max_requests
+        self.period = period
+        self.capacity = float(burst)
+        self.refill_rate = (max_requests - burst) / period  # tokens per second
+        self.nominal_rate = self.refill_rate
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self):
+        """Add the tokens accrued since the last update"""
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+
+    @property
+    def tokens(self) -> float:
+        """Current number of available tokens"""
+        self._refill()
+        return self._tokens
+
+    async def available(self) -> float:
+        """Current number of available tokens"""
+        return self.tokens
+
+    async def _try_take(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            0 when a token was taken, otherwise seconds until one is available
+        """
+        self._refill()
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.refill_rate
+
+    async def pause(self, seconds: float):
+        """Hand out no tokens for the next `seconds` (e.g. a Retry-After)"""
+        if seconds > 0:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.refill_rate)
+
+    def _adjusted_rate(self, rate: float, adjust: int) -> float:
+        """Refill rate after a slow_down (adjust < 0) or speed_up (adjust > 0)"""
+        if adjust < 0:
+            return max(self.nominal_rate * self.MIN_RATE_FACTOR, rate / 2)
+        if adjust > 0:
+            return min(self.nominal_rate, rate + self.nominal_rate * self.RECOVERY_STEP)
+        return rate
+
+    def _log_slow_down(self, before: float):
+        if self.refill_rate < before:
+            logger.warning(f"Rate limit backing off to {self.refill_rate:.2f} requests/s")
+
+    async def slow_down(self):
+        """Halve the refill rate after the upstream pushed back"""
+        before = self.refill_rate
+        self._refill()
+        self.refill_rate = self._adjusted_rate(self.refill_rate, -1)
+        self._log_slow_down(before)
+
+    async def speed_up(self):
+        """Step the refill rate back towards nominal after a success"""
+        if self.refill_rate < self.nominal_rate:
+            self._refill()
+            self.refill_rate = self._adjusted_rate(self.refill_rate, 1)
+
+    async def acquire(self) -> float:
+        """
+        Take one token, waiting for a refill if necessary.
+
+        Returns:
+            Seconds spent waiting for the token
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        started = time.monotonic()
+        # The lock keeps waiters in arrival order; only the head of the queue sleeps.
+        async with self._lock:
+            while True:
+                wait = await self._try_take()
+                if wait <= 0:
+                    return time.monotonic() - started
+                await asyncio.sleep(wait)
+
+    async def stats(self) -> Dict:
+        """Current level and shape of the bucket, for monitoring"""
+        return {
+            "backend": self.BACKEND,
+            "tokens": round(await self.available(), 3),
+            "capacity": self.capacity,
+            "refill_rate": round(self.refill_rate, 4),
+            "nominal_rate": round(self.nominal_rate, 4),
+        }
+
+    async def close(self):
+        """Release shared resources"""
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket shared by every process on a host.
+
+    The bucket state (tokens, last update, refill rate) lives in a small
+    file and each take happens under an exclusive flock, so all workers draw
+    from one budget at one rate. Wall-clock time is used because it is
+    comparable between processes.
+    """
+
+    BACKEND = "file"
+    _STATE = struct.Struct("ddd")
+
+    def __init__(self, path: str, max_requests: int, period: float, burst: int = 10):
+        """
+        Args:
+            path: State file, created if missing; every process must use the same path
+        """
+        if fcntl is None:
+            raise RuntimeError("File-locked rate limiting requires fcntl (Unix)")
+        super().__init__(max_requests, period, burst=burst)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _update(self, take: bool, hold: float = 0.0, adjust: int = 0) -> float:
+        """
+        Refill, then optionally take a token, empty the bucket for `hold`
+        seconds or adjust the refill rate, under the file lock; returns the
+        wait for a token
+        """
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            now = time.time()
+            raw = os.pread(self._fd, self._STATE.size, 0)
+            if len(raw) == self._STATE.size:
+                tokens, updated, rate = self._STATE.unpack(raw)
+            else:
+                tokens, updated, rate = self.capacity, now, self.nominal_rate
+            # State left by a process with another budget must not exceed ours
+            rate = min(self.nominal_rate, max(self.nominal_rate * self.MIN_RATE_FACTOR, rate))
+
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * rate)
+            rate = self._adjusted_rate(rate, adjust)
+            tokens = min(tokens, -hold * rate) if hold > 0 else tokens
+            wait = 0.0
+            if take:
+                if tokens >= 1.0:
+                    tokens -= 1.0
+                else:
+                    wait = (1.0 - tokens) / rate
+
+            os.pwrite(self._fd, self._STATE.pack(tokens, now, rate), 0)
+            self._tokens = tokens
+            self.refill_rate = rate
+            return wait
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @property
+    def tokens(self) -> float:
+        self._update(take=False)
+        return self._tokens
+
+    async def _try_take(self) -> float:
+        # The lock is only held for a read-modify-write of 16 bytes
+        return self._update(take=True)
+
+    async def pause(self, seconds: float):
+        self._update(take=False, hold=seconds)
+
+    async def slow_down(self):
+        before = self.refill_rate
+        self._update(take=False, adjust=-1)
+        self._log_slow_down(before)
+
+    async def speed_up(self):
+        # refill_rate mirrors the shared rate as of this worker's last take
+        if self.refill_rate < self.nominal_rate:
+            self._update(take=False, adjust=1)
+
+    def _refill(self):
+        # Shared state is refilled on every update; nothing to do locally
+        pass
+
+    async def close(self):
+        os.close(self._fd)
+
+
+class RedisTokenBucket(TokenBucket):
+    """
+    Token bucket shared by every process that can reach one Redis server.
+
+    Refill, take and rate changes run atomically in a Lua script using the
+    server clock, so hosts with skewed clocks still share one budget, and
+    the refill rate is stored with the tokens so every host refills at it.
+    """
+
+    BACKEND = "redis"
+
+    SCRIPT = """
+        local capacity = tonumber(ARGV[1])
+        local nominal = tonumber(ARGV[2])
+        local take = tonumber(ARGV[3])
+        local hold = tonumber(ARGV[4])
+        local adjust = tonumber(ARGV[5])
+        local min_rate = nominal * tonumber(ARGV[6])
+        local step = nominal * tonumber(ARGV[7])
+        local clock = redis.call('TIME')
+        local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated', 'rate')
+        local tokens = tonumber(state[1]) or capacity
+        local updated = tonumber(state[2]) or now
+        local rate = math.min(nominal, math.max(min_rate, tonumber(state[3]) or nominal))
+        tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+        if adjust < 0 then
+            rate = math.max(min_rate, rate / 2)
+        elseif adjust > 0 then
+            rate = math.min(nominal, rate + step)
+        end
+        if hold > 0 then
+            tokens = math.min(tokens, -hold * rate)
+        end
+        local wait = 0
+        if take == 1 then
+            if tokens >= 1 then
+                tokens = tokens - 1
+            else
+                wait = (1 - tokens) / rate
+            end
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now), 'rate', tostring(rate))
+        redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+        return {tostring(tokens), tostring(wait), tostring(rate)}
+    """
+
+    def __init__(self, client: Any, key: str, max_requests: int, period: float, burst: int = 10):
+        """
+        Args:
+            client: redis.asyncio.Redis (or compatible) client
+            key: Redis key holding the bucket state
+        """
+        super().__init__(max_requests, period, burst=burst)
+        self.client = client
+        self.key = key
+        self._script = client.register_script(self.SCRIPT)
+
+    async def _update(self, take: bool, hold: float = 0.0, adjust: int = 0) -> float:
+        tokens, wait, rate = await self._script(
+            keys=[self.key],
+            args=[
+                self.capacity, self.nominal_rate, int(take), hold, adjust,
+                self.MIN_RATE_FACTOR, self.RECOVERY_STEP,
+            ],
+        )
+        self._tokens = float(tokens)
+        self.refill_rate = float(rate)
+        return float(wait)
+
+    @property
+    def tokens(self) -> float:
+        """Token level as of the last round trip (see available())"""
+        return self._tokens
+
+    async def available(self) -> float:
+        await self._update(take=False)
+        return self._tokens
+
+    async def _try_take(self) -> float:
+        return await self._update(take=True)
+
+    async def pause(self, seconds: float):
+        await self._update(take=False, hold=seconds)
+
+    async def slow_down(self):
+        before = self.refill_rate
+        await self._update(take=False, adjust=-1)
+        self._log_slow_down(before)
+
+    async def speed_up(self):
+        # refill_rate mirrors the shared rate as of this worker's last take
+        if self.refill_rate < self.nominal_rate:
+            await self._update(take=False, adjust=1)
+
+    def _refill(self):
+        # Refilled by the server script on every update
+        pass
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_bucket(
+    store: str,
+    name: str,
+    max_requests: int,
+    period: float,
+    burst: int = 10
+) -> TokenBucket:
+    """
+    Build a token bucket from a RATE_LIMIT_STORE style setting.
+
+    Args:
+        store: "" for a per-process bucket, a redis:// URL for a bucket shared
+            across hosts, or a directory for a file-locked bucket shared by all
+            processes on this host
+        name: Bucket name (file name or Redis key suffix)
+    """
+    if not store:
+        return TokenBucket(max_requests, period, burst=burst)
+
+    if store.startswith(("redis://", "rediss://", "unix://")):
+        if redis_asyncio is None:
+            raise RuntimeError("The redis package is required for Redis rate limiting")
+        return RedisTokenBucket(
+            redis_asyncio.from_url(store), f"polalfa:ratelimit:{name}",
+            max_requests, period, burst=burst
+        )
+
+    if fcntl is None:
+        logger.warning("fcntl unavailable, rate limiting per process only")
+        return TokenBucket(max_requests, period, burst=burst)
+    return FileTokenBucket(
+        os.path.join(store, f"{name}.bucket"), max_requests, period, burst=burst
+    )
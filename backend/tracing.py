@@ -0,0 +1,241 @@
+"""
+Request Tracing
+Opt-in span trees and CPU profiles for a single request
+"""
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+import uuid
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # Optional: statistical profiler with readable async call stacks
+    PyinstrumentProfiler = None
+
+logger = logging.getLogger(__name__)
+
+# Span new spans attach to; None (no trace running) turns span() into a no-op
+_current_span: ContextVar[Optional["Span"]] = ContextVar("polalfa_current_span", default=None)
+
+_DISABLED = nullcontext()
+
+DEBUG_MODES = ("trace", "cprofile", "pyinstrument")
+
+
+class Span:
+    """One timed operation in a trace, with attributes and child spans"""
+
+    __slots__ = ("name", "attrs", "start", "end", "children")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self, origin: float) -> Dict:
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+class _SpanContext:
+    """Opens a child span of the current one for the duration of a block"""
+
+    __slots__ = ("span", "parent", "token")
+
+    def __init__(self, parent: Span, name: str, attrs: Dict[str, Any]):
+        self.parent = parent
+        self.span = Span(name, attrs)
+
+    def __enter__(self) -> Span:
+        self.parent.children.append(self.span)
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end = time.perf_counter()
+        if exc_type is not None:
+            self.span.attrs["error"] = exc_type.__name__
+        _current_span.reset(self.token)
+        return False
+
+
+def span(name: str, **attrs):
+    """
+    Context manager recording a span under the current one.
+
+    Outside a trace this returns a shared no-op context, so instrumented
+    code only pays for one ContextVar lookup.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return _DISABLED
+    return _SpanContext(parent, name, attrs)
+
+
+def annotate(**attrs):
+    """Add attributes to the current span (no-op outside a trace)"""
+    current = _current_span.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+class Trace:
+    """
+    Root of a span tree.
+
+    Spans opened while the trace is active, including in tasks created
+    inside it (they inherit the context), become part of the tree.
+    """
+
+    def __init__(self, name: str, **attrs):
+        self.trace_id = uuid.uuid4().hex
+        self.root = Span(name, attrs)
+        self._token = None
+
+    def __enter__(self) -> "Trace":
+        self.root.start = time.perf_counter()
+        self._token = _current_span.set(self.root)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.root.end = time.perf_counter()
+        _current_span.reset(self._token)
+        return False
+
+    def slowest(self, name: str, count: int = 10) -> List[Dict]:
+        """The `count` longest spans with a given name, longest first"""
+        spans = sorted(
+            (s for s in self.root.walk() if s.name == name),
+            key=lambda s: s.duration,
+            reverse=True,
+        )
+        return [
+            {"duration_ms": round(s.duration * 1000, 3), **s.attrs}
+            for s in spans[:count]
+        ]
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "duration_ms": round(self.root.duration * 1000, 3),
+            "slowest_wallets": self.slowest("wallet"),
+            "slowest_upstream_calls": self.slowest("upstream"),
+            "spans": self.root.to_dict(self.root.start),
+        }
+
+
+# cProfile and pyinstrument hook the interpreter globally: one profile at a time
+_profile_lock = asyncio.Lock()
+
+
+def _cprofile_summary(profiler: cProfile.Profile, count: int = 30) -> List[Dict]:
+    """Functions with the most cumulative CPU time"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, calls, self_time, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}({function})",
+            "calls": calls,
+            "cpu_ms_self": round(self_time * 1000, 3),
+            "cpu_ms_cumulative": round(cumulative * 1000, 3),
+        })
+    rows.sort(key=lambda row: row["cpu_ms_cumulative"], reverse=True)
+    return rows[:count]
+
+
+def check_debug_mode(mode: str):
+    """Raise ValueError unless mode can be used in this process"""
+    if mode not in DEBUG_MODES:
+        raise ValueError(f"Unknown debug mode {mode!r}, expected one of {', '.join(DEBUG_MODES)}")
+    if mode == "pyinstrument" and PyinstrumentProfiler is None:
+        raise ValueError("debug=pyinstrument needs the pyinstrument package")
+
+
+async def run_traced(
+    work: Callable[[], Awaitable[Any]],
+    mode: str,
+    name: str,
+    trace_dir: str = "",
+    **attrs
+) -> Tuple[Any, Dict]:
+    """
+    Await work() inside a Trace, optionally under a CPU profiler.
+
+    Args:
+        work: Produces the awaitable to trace (created inside the trace so
+            its tasks inherit it)
+        mode: "trace", "cprofile" (CPU time per function, measured with
+            process time so awaits do not count) or "pyinstrument"
+        name: Root span name
+        trace_dir: If set, the trace is written to <trace_dir>/<trace_id>.json
+            and the profile next to it (.prof for cProfile, .html for pyinstrument)
+
+    Returns:
+        (work's result, trace report)
+    """
+    check_debug_mode(mode)
+
+    profile_lock = _profile_lock if mode != "trace" else nullcontext()
+    async with profile_lock:
+        profiler = None
+        if mode == "cprofile":
+            profiler = cProfile.Profile(time.process_time)
+        elif mode == "pyinstrument":
+            profiler = PyinstrumentProfiler(async_mode="enabled")
+
+        with Trace(name, **attrs) as trace:
+            if mode == "cprofile":
+                profiler.enable()
+            elif mode == "pyinstrument":
+                profiler.start()
+            try:
+                result = await work()
+            finally:
+                if mode == "cprofile":
+                    profiler.disable()
+                elif mode == "pyinstrument":
+                    profiler.stop()
+
+    report = trace.to_dict()
+    if mode == "cprofile":
+        report["profile"] = _cprofile_summary(profiler)
+    elif mode == "pyinstrument":
+        report["profile"] = profiler.output_text(unicode=False, color=False)
+
+    if trace_dir:
+        os.makedirs(trace_dir, exist_ok=True)
+        path = os.path.join(trace_dir, trace.trace_id)
+        with open(f"{path}.json", "w") as f:
+            json.dump(report, f)
+        if mode == "cprofile":
+            profiler.dump_stats(f"{path}.prof")
+        elif mode == "pyinstrument":
+            with open(f"{path}.html", "w") as f:
+                f.write(profiler.output_html())
+        logger.info(f"Trace {trace.trace_id} written to {path}.json")
+
+    return result, report
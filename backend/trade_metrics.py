@@ -0,0 +1,415 @@
+"""
+Vectorized Trade Metrics
+Parses a wallet's trades once into NumPy columns and computes per-market aggregates
+"""
+import logging
+from typing import AsyncIterable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from polymarket_client import Trade
+
+logger = logging.getLogger(__name__)
+
+# Side codes used in TradeColumns.side
+BUY = 1
+SELL = -1
+OTHER = 0
+
+
+class TradeColumns:
+    """
+    Columnar representation of a wallet's trades.
+
+    Every trade is parsed exactly once. Markets and (market, asset_id) pairs are
+    mapped to dense integer indexes so that per-market totals can be computed
+    with grouped NumPy reductions instead of Python loops.
+
+    Columns (one entry per trade, in input order):
+    - market_idx: index into market_ids, -1 when the trade has no market
+    - asset_idx: index into asset_keys, -1 when the trade has no market
+    - side: BUY, SELL or OTHER
+    - size, price: floats; price is NaN when the trade had no price
+    - timestamp: int64, 0 when missing
+    """
+
+    def __init__(
+        self,
+        market_ids: List[str],
+        asset_keys: List[Tuple[int, str]],
+        market_idx: np.ndarray,
+        asset_idx: np.ndarray,
+        side: np.ndarray,
+        size: np.ndarray,
+        price: np.ndarray,
+        timestamp: np.ndarray,
+        maker: Optional[str]
+    ):
+        self.market_ids = market_ids
+        self.asset_keys = asset_keys
+        self.market_idx = market_idx
+        self.asset_idx = asset_idx
+        self.side = side
+        self.size = size
+        self.price = price
+        self.timestamp = timestamp
+        self.maker = maker
+
+    def __len__(self) -> int:
+        return len(self.size)
+
+    @classmethod
+    async def from_trades(cls, trades: AsyncIterable[Trade]) -> "TradeColumns":
+        """Load streamed Trade records into columns"""
+        market_lookup: Dict[str, int] = {}
+        asset_lookup: Dict[Tuple[int, str], int] = {}
+        market_idx: List[int] = []
+        asset_idx: List[int] = []
+        side: List[int] = []
+        size: List[float] = []
+        price: List[float] = []
+        timestamp: List[int] = []
+        maker: Optional[str] = None
+        first = True
+
+        async for trade in trades:
+            if first:
+                maker = trade.maker
+                first = False
+
+            if trade.market:
+                m = market_lookup.setdefault(trade.market, len(market_lookup))
+                asset_key = (m, trade.asset_id)
+                a = asset_lookup.setdefault(asset_key, len(asset_lookup))
+            else:
+                m = a = -1
+            market_idx.append(m)
+            asset_idx.append(a)
+
+            side.append(BUY if trade.side == "BUY" else SELL if trade.side == "SELL" else OTHER)
+            size.append(trade.size)
+            price.append(trade.price if trade.price is not None else np.nan)
+            timestamp.append(trade.timestamp or 0)
+
+        return cls(
+            market_ids=list(market_lookup),
+            asset_keys=list(asset_lookup),
+            market_idx=np.asarray(market_idx, dtype=np.int64),
+            asset_idx=np.asarray(asset_idx, dtype=np.int64),
+            side=np.asarray(side, dtype=np.int8),
+            size=np.asarray(size, dtype=np.float64),
+            price=np.asarray(price, dtype=np.float64),
+            timestamp=np.asarray(timestamp, dtype=np.int64),
+            maker=maker,
+        )
+
+    def aggregate(self) -> Tuple[Dict[str, Dict], Dict]:
+        """
+        Per-market totals plus wallet-level summary.
+
+        np.bincount accumulates weights in input order, so totals are
+        bit-for-bit identical to summing trade by trade.
+
+        Returns:
+            (Dict[market_id, market_data], wallet-level trade summary)
+        """
+        n_markets = len(self.market_ids)
+        n_assets = len(self.asset_keys)
+
+        buy = self.side == BUY
+        sell = self.side == SELL
+        # Missing prices count as 0 for stake/PnL and as 1.0 for volume
+        notional = self.size * np.nan_to_num(self.price, nan=0.0)
+        volume = self.size * np.nan_to_num(self.price, nan=1.0)
+
+        has_market = self.market_idx >= 0
+        m = self.market_idx[has_market]
+        a = self.asset_idx[has_market]
+        buy_m, sell_m = buy[has_market], sell[has_market]
+        size_m, notional_m = self.size[has_market], notional[has_market]
+
+        # Stake: BUY -> size * price, anything else -> size being sold
+        stake = np.bincount(
+            m, weights=np.where(buy_m, notional_m, size_m), minlength=n_markets
+        )
+        cash_flow = np.bincount(
+            m,
+            weights=np.where(buy_m, -notional_m, np.where(sell_m, notional_m, 0.0)),
+            minlength=n_markets,
+        )
+        buy_size = np.bincount(m, weights=np.where(buy_m, size_m, 0.0), minlength=n_markets)
+        weighted_price_sum = np.bincount(
+            m, weights=np.where(buy_m, notional_m, 0.0), minlength=n_markets
+        )
+
+        # Net position per (market, asset); only assets moved by BUY/SELL count
+        positions = np.bincount(
+            a,
+            weights=np.where(buy_m, size_m, np.where(sell_m, -size_m, 0.0)),
+            minlength=n_assets,
+        )
+        asset_traded = np.bincount(
+            a, weights=(buy_m | sell_m).astype(np.float64), minlength=n_assets
+        )
+
+        last_timestamp = np.zeros(n_markets, dtype=np.int64)
+        np.maximum.at(last_timestamp, m, self.timestamp[has_market])
+
+        market_positions: List[Dict[str, float]] = [{} for _ in range(n_markets)]
+        for asset_index, (market_index, asset_id) in enumerate(self.asset_keys):
+            if asset_traded[asset_index] > 0:
+                market_positions[market_index][asset_id] = float(positions[asset_index])
+
+        trade_count = np.bincount(m, minlength=n_markets)
+
+        markets = {
+            market_id: {
+                "trade_count": int(trade_count[i]),
+                "total_stake": float(stake[i]),
+                "positions": market_positions[i],
+                "cash_flow": float(cash_flow[i]),
+                "buy_size": float(buy_size[i]),
+                "weighted_price_sum": float(weighted_price_sum[i]),
+                "last_timestamp": int(last_timestamp[i]) or None,
+            }
+            for i, market_id in enumerate(self.market_ids)
+        }
+
+        # Single-bin bincount keeps the sequential summation order
+        total_volume = np.bincount(
+            np.zeros(len(self), dtype=np.int64), weights=volume, minlength=1
+        )[0]
+        last_ts = int(self.timestamp.max()) if len(self) else 0
+
+        summary = {
+            "trade_count": len(self),
+            "total_volume": float(total_volume),
+            "last_timestamp": last_ts or None,
+            "maker": self.maker,
+        }
+        return markets, summary
+
+
+class WindowedAggregates:
+    """
+    Per-market partial aggregates in time buckets counted back from end_ts.
+
+    Trades are bucketed once by age (daily by default, plus an edge at every
+    requested window length), and each bucket holds partial sums per market.
+    Prefix sums over buckets then give the totals for any window ending at
+    end_ts whose length is a bucket edge, so 7d/30d/90d (or any whole-day
+    window up to the horizon) come from a single pass over the trades.
+    """
+
+    def __init__(
+        self,
+        columns: TradeColumns,
+        end_ts: int,
+        horizon: int,
+        windows: Tuple[int, ...] = (),
+        bucket_seconds: int = 86400
+    ):
+        """
+        Args:
+            columns: Parsed trades covering at least [end_ts - horizon, end_ts]
+            end_ts: Window end (Unix seconds)
+            horizon: Longest window length in seconds
+            windows: Extra window lengths (seconds) that must be answerable exactly
+            bucket_seconds: Regular bucket width
+        """
+        self.columns = columns
+        self.end_ts = end_ts
+        self.edges = np.unique(np.concatenate([
+            np.arange(bucket_seconds, horizon + 1, bucket_seconds, dtype=np.int64),
+            np.asarray([w for w in windows if 0 < w <= horizon] + [horizon], dtype=np.int64),
+        ]))
+        n_buckets = len(self.edges)
+        n_markets = len(columns.market_ids)
+        n_assets = len(columns.asset_keys)
+
+        # Age of each trade; bucket i holds ages in (edges[i-1], edges[i]]
+        age = end_ts - columns.timestamp
+        bucket = np.searchsorted(self.edges, age, side="left")
+        in_range = (age >= 0) & (bucket < n_buckets)
+        order = np.arange(len(columns), dtype=np.int64)
+
+        buy = columns.side == BUY
+        sell = columns.side == SELL
+        notional = columns.size * np.nan_to_num(columns.price, nan=0.0)
+        volume = columns.size * np.nan_to_num(columns.price, nan=1.0)
+
+        # Wallet-level partials per bucket
+        b_all = bucket[in_range]
+        self._trade_count = self._prefix_sum(np.bincount(b_all, minlength=n_buckets))
+        self._volume = self._prefix_sum(
+            np.bincount(b_all, weights=volume[in_range], minlength=n_buckets)
+        )
+        last_ts = np.zeros(n_buckets, dtype=np.int64)
+        np.maximum.at(last_ts, b_all, columns.timestamp[in_range])
+        self._last_ts = np.maximum.accumulate(last_ts)
+
+        # Per-market partials: flat index market * n_buckets + bucket
+        keep = in_range & (columns.market_idx >= 0)
+        b = bucket[keep]
+        m_flat = columns.market_idx[keep] * n_buckets + b
+        a_flat = columns.asset_idx[keep] * n_buckets + b
+        buy_k, sell_k = buy[keep], sell[keep]
+        size_k, notional_k = columns.size[keep], notional[keep]
+        market_shape = (n_markets, n_buckets)
+        asset_shape = (n_assets, n_buckets)
+
+        def per_market(weights: Optional[np.ndarray] = None) -> np.ndarray:
+            partial = np.bincount(m_flat, weights=weights, minlength=n_markets * n_buckets)
+            return self._prefix_sum(partial.reshape(market_shape))
+
+        self._market_count = per_market()
+        self._stake = per_market(np.where(buy_k, notional_k, size_k))
+        self._cash_flow = per_market(
+            np.where(buy_k, -notional_k, np.where(sell_k, notional_k, 0.0))
+        )
+        self._buy_size = per_market(np.where(buy_k, size_k, 0.0))
+        self._weighted_price_sum = per_market(np.where(buy_k, notional_k, 0.0))
+
+        market_last = np.zeros(n_markets * n_buckets, dtype=np.int64)
+        np.maximum.at(market_last, m_flat, columns.timestamp[keep])
+        self._market_last = np.maximum.accumulate(market_last.reshape(market_shape), axis=1)
+
+        # First trade index per market keeps the input market order per window
+        market_first = np.full(n_markets * n_buckets, len(columns), dtype=np.int64)
+        np.minimum.at(market_first, m_flat, order[keep])
+        self._market_first = np.minimum.accumulate(market_first.reshape(market_shape), axis=1)
+
+        positions = np.bincount(
+            a_flat,
+            weights=np.where(buy_k, size_k, np.where(sell_k, -size_k, 0.0)),
+            minlength=n_assets * n_buckets,
+        )
+        self._positions = self._prefix_sum(positions.reshape(asset_shape))
+        asset_traded = np.bincount(
+            a_flat, weights=(buy_k | sell_k).astype(np.float64), minlength=n_assets * n_buckets
+        )
+        self._asset_traded = self._prefix_sum(asset_traded.reshape(asset_shape))
+
+    @staticmethod
+    def _prefix_sum(partials: np.ndarray) -> np.ndarray:
+        """Running totals over buckets (last axis), youngest bucket first"""
+        return np.cumsum(partials, axis=-1)
+
+    def window(self, seconds: int) -> Tuple[Dict[str, Dict], Dict]:
+        """
+        Aggregates for trades in [end_ts - seconds, end_ts].
+
+        Returns:
+            (Dict[market_id, market_data], wallet-level trade summary), in the
+            same shape as TradeColumns.aggregate
+        """
+        k = int(np.searchsorted(self.edges, seconds))
+        if k >= len(self.edges) or self.edges[k] != seconds:
+            raise ValueError(f"Window of {seconds}s does not fall on a bucket edge")
+
+        columns = self.columns
+        active = np.flatnonzero(self._market_count[:, k] > 0)
+        active = active[np.argsort(self._market_first[active, k], kind="stable")]
+
+        market_positions: Dict[int, Dict[str, float]] = {int(i): {} for i in active}
+        for asset_index, (market_index, asset_id) in enumerate(columns.asset_keys):
+            if market_index in market_positions and self._asset_traded[asset_index, k] > 0:
+                market_positions[market_index][asset_id] = float(self._positions[asset_index, k])
+
+        markets = {
+            columns.market_ids[i]: {
+                "trade_count": int(self._market_count[i, k]),
+                "total_stake": float(self._stake[i, k]),
+                "positions": market_positions[int(i)],
+                "cash_flow": float(self._cash_flow[i, k]),
+                "buy_size": float(self._buy_size[i, k]),
+                "weighted_price_sum": float(self._weighted_price_sum[i, k]),
+                "last_timestamp": int(self._market_last[i, k]) or None,
+            }
+            for i in active
+        }
+
+        trade_count = int(self._trade_count[k])
+        summary = {
+            "trade_count": trade_count,
+            "total_volume": float(self._volume[k]),
+            "last_timestamp": int(self._last_ts[k]) or None,
+            "maker": columns.maker if trade_count else None,
+        }
+        return markets, summary
+
+
+# Per-market fields that are plain sums over trades
+ADDITIVE_FIELDS = ("trade_count", "total_stake", "cash_flow", "buy_size", "weighted_price_sum")
+
+
+# Removing trades leaves float residue where a sum should be exactly zero
+RESIDUE = 1e-9
+
+
+def _latest(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    return max(a or 0, b or 0) or None
+
+
+def _snap(value: float) -> float:
+    return 0.0 if abs(value) < RESIDUE else value
+
+
+def merge_aggregates(
+    markets: Dict[str, Dict],
+    summary: Dict,
+    delta_markets: Dict[str, Dict],
+    delta_summary: Dict,
+    sign: int = 1
+):
+    """
+    Fold a delta produced by TradeColumns.aggregate into running aggregates.
+
+    sign=1 adds newly seen trades; sign=-1 removes trades that fell out of the
+    time window. Removed trades are always older than the remaining ones, so
+    last-trade timestamps only need updating on addition, and sums left within
+    RESIDUE of zero after a removal are set to 0.0 so a market that broke even
+    is not counted as profitable. Markets whose trades all expired are
+    dropped, and every touched market loses its cached "evaluated" PnL so it
+    gets re-evaluated.
+
+    Updates markets and summary in place.
+    """
+    for market_id, delta in delta_markets.items():
+        market = markets.get(market_id)
+        if market is None:
+            if sign > 0:
+                markets[market_id] = {**delta, "positions": dict(delta["positions"])}
+            continue
+
+        for field in ADDITIVE_FIELDS:
+            market[field] += sign * delta[field]
+        positions = market["positions"]
+        for asset_id, position in delta["positions"].items():
+            positions[asset_id] = positions.get(asset_id, 0.0) + sign * position
+        if sign > 0:
+            market["last_timestamp"] = _latest(market["last_timestamp"], delta["last_timestamp"])
+        else:
+            for field in ADDITIVE_FIELDS:
+                if field != "trade_count":
+                    market[field] = _snap(market[field])
+            for asset_id in delta["positions"]:
+                positions[asset_id] = _snap(positions[asset_id])
+        market.pop("evaluated", None)
+
+        if market["trade_count"] <= 0:
+            del markets[market_id]
+
+    summary["trade_count"] += sign * delta_summary["trade_count"]
+    summary["total_volume"] += sign * delta_summary["total_volume"]
+    if sign < 0:
+        summary["total_volume"] = _snap(summary["total_volume"])
+    if sign > 0 and delta_summary["trade_count"]:
+        # Trades are read newest first; the newest trade names the wallet
+        summary["maker"] = delta_summary["maker"]
+        summary["last_timestamp"] = _latest(
+            summary["last_timestamp"], delta_summary["last_timestamp"]
+        )
+    if summary["trade_count"] <= 0:
+        summary["total_volume"] = 0.0
+        summary["last_timestamp"] = None
@@ -0,0 +1,280 @@
+"""
+Local Trade Store
+SQLite copy of wallet trades, synced incrementally from the Data API
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from polymarket_client import PolymarketClient, Trade
+
+logger = logging.getLogger(__name__)
+
+
+class TradeStore:
+    """
+    Persistent per-wallet trade history.
+
+    For every wallet the store remembers which time span it has already
+    downloaded (`synced_from` .. `synced_to`). A sync only requests what lies
+    outside that span: older history when a longer window is asked for, and
+    trades newer than the high-water mark. Analyses are then answered from
+    the local database.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS trades (
+            wallet TEXT NOT NULL,
+            trade_key TEXT NOT NULL,
+            market TEXT,
+            asset_id TEXT,
+            side TEXT,
+            size REAL,
+            price REAL,
+            timestamp INTEGER,
+            maker TEXT,
+            PRIMARY KEY (wallet, trade_key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_trades_wallet_ts ON trades (wallet, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_trades_wallet_market ON trades (wallet, market);
+        CREATE TABLE IF NOT EXISTS sync_state (
+            wallet TEXT PRIMARY KEY,
+            synced_from INTEGER NOT NULL,
+            synced_to INTEGER NOT NULL,
+            synced_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS wallet_state (
+            wallet TEXT NOT NULL,
+            time_range TEXT NOT NULL,
+            state TEXT NOT NULL,
+            PRIMARY KEY (wallet, time_range)
+        );
+    """
+
+    def __init__(
+        self,
+        path: str,
+        min_sync_interval: float = 60.0,
+        sync_overlap: int = 300
+    ):
+        """
+        Args:
+            path: SQLite database file (":memory:" for a throwaway store)
+            min_sync_interval: Seconds during which a wallet is considered fresh
+                and served without contacting the Data API
+            sync_overlap: Seconds re-requested below the high-water mark to pick
+                up trades that were indexed late
+        """
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.min_sync_interval = min_sync_interval
+        self.sync_overlap = sync_overlap
+
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(self.SCHEMA)
+        self._sync_locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def _wallet_key(wallet: str) -> str:
+        return wallet.lower()
+
+    @staticmethod
+    def _trade_row(wallet: str, trade: Trade) -> Tuple:
+        # Trade id/tx hash plus fill details identify a trade across re-syncs
+        trade_key = "|".join(
+            str(value) if value is not None else ""
+            for value in (
+                trade.trade_id, trade.asset_id, trade.side,
+                trade.size, trade.price, trade.timestamp,
+            )
+        )
+        return (
+            wallet,
+            trade_key,
+            trade.market,
+            trade.asset_id,
+            trade.side,
+            trade.size,
+            trade.price,
+            trade.timestamp,
+            trade.maker,
+        )
+
+    def _get_sync_state(self, wallet: str) -> Optional[Tuple[int, int, float]]:
+        return self._db.execute(
+            "SELECT synced_from, synced_to, synced_at FROM sync_state WHERE wallet = ?",
+            (wallet,),
+        ).fetchone()
+
+    async def _download(
+        self,
+        client: PolymarketClient,
+        wallet: str,
+        wallet_address: str,
+        start_ts: int,
+        end_ts: int
+    ) -> int:
+        """Fetch trades in [start_ts, end_ts] and insert the ones not stored yet"""
+        inserted = 0
+        batch: List[Tuple] = []
+
+        def flush():
+            nonlocal inserted
+            with self._db:
+                cursor = self._db.executemany(
+                    "INSERT OR IGNORE INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+            inserted += cursor.rowcount
+            batch.clear()
+
+        async for trade in client.iter_trades(
+            maker=wallet_address,
+            start_ts=start_ts,
+            end_ts=end_ts
+        ):
+            batch.append(self._trade_row(wallet, trade))
+            if len(batch) >= 1000:
+                flush()
+        if batch:
+            flush()
+
+        return inserted
+
+    async def sync(
+        self,
+        client: PolymarketClient,
+        wallet_address: str,
+        start_ts: int,
+        end_ts: int
+    ) -> int:
+        """
+        Make sure the store holds the wallet's trades for [start_ts, end_ts].
+
+        Returns:
+            Number of newly stored trades
+        """
+        wallet = self._wallet_key(wallet_address)
+        lock = self._sync_locks.setdefault(wallet, asyncio.Lock())
+
+        async with lock:
+            state = self._get_sync_state(wallet)
+            inserted = 0
+
+            if state is None:
+                inserted += await self._download(client, wallet, wallet_address, start_ts, end_ts)
+                synced_from, synced_to, synced_at = start_ts, end_ts, time.time()
+            else:
+                synced_from, synced_to, synced_at = state
+                changed = False
+
+                # Longer window than before: backfill older history
+                if start_ts < synced_from:
+                    inserted += await self._download(
+                        client, wallet, wallet_address, start_ts, synced_from
+                    )
+                    synced_from = start_ts
+                    changed = True
+
+                # Pick up trades newer than the high-water mark
+                if end_ts > synced_to and time.time() - synced_at >= self.min_sync_interval:
+                    inserted += await self._download(
+                        client, wallet, wallet_address, synced_to - self.sync_overlap, end_ts
+                    )
+                    synced_to, synced_at = end_ts, time.time()
+                    changed = True
+
+                if not changed:
+                    return 0
+
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                    (wallet, synced_from, synced_to, synced_at),
+                )
+
+        logger.info(f"Synced {inserted} new trades for wallet {wallet_address}")
+        return inserted
+
+    def high_water_mark(self, wallet_address: str) -> int:
+        """
+        Insertion sequence number (rowid) of the wallet's latest stored trade.
+
+        Trades stored later always get a higher rowid, so it marks exactly which
+        trades a computation has already seen, including late-indexed ones.
+        """
+        row = self._db.execute(
+            "SELECT MAX(rowid) FROM trades WHERE wallet = ?",
+            (self._wallet_key(wallet_address),),
+        ).fetchone()
+        return row[0] or 0
+
+    async def iter_trades(
+        self,
+        wallet_address: str,
+        start_ts: int,
+        end_ts: int,
+        after_rowid: int = 0,
+        up_to_rowid: Optional[int] = None
+    ) -> AsyncIterator[Trade]:
+        """
+        Yield stored trades for a wallet within [start_ts, end_ts], newest first.
+
+        after_rowid / up_to_rowid restrict the result to trades stored within a
+        range of high-water marks (see high_water_mark).
+        """
+        query = """
+            SELECT market, asset_id, side, size, price, timestamp, maker
+            FROM trades
+            WHERE wallet = ? AND timestamp >= ? AND timestamp <= ? AND rowid > ?
+        """
+        params = [self._wallet_key(wallet_address), start_ts, end_ts, after_rowid]
+        if up_to_rowid is not None:
+            query += " AND rowid <= ?"
+            params.append(up_to_rowid)
+        cursor = self._db.execute(query + " ORDER BY timestamp DESC", params)
+
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            for market, asset_id, side, size, price, timestamp, maker in rows:
+                yield Trade(
+                    market=market,
+                    asset_id=asset_id,
+                    side=side,
+                    size=size,
+                    price=price,
+                    timestamp=timestamp,
+                    maker=maker,
+                )
+            # Let other tasks run between chunks of a long history
+            await asyncio.sleep(0)
+
+    def load_wallet_state(self, wallet_address: str, time_range: str) -> Optional[Dict]:
+        """Saved incremental metric state for a wallet and range, if any"""
+        row = self._db.execute(
+            "SELECT state FROM wallet_state WHERE wallet = ? AND time_range = ?",
+            (self._wallet_key(wallet_address), time_range),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_wallet_state(self, wallet_address: str, time_range: str, state: Dict):
+        """Persist incremental metric state for a wallet and range"""
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO wallet_state VALUES (?, ?, ?)",
+                (self._wallet_key(wallet_address), time_range, json.dumps(state)),
+            )
+
+    def close(self):
+        """Close the database connection"""
+        self._db.close()
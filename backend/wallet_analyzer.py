@@ -2,15 +2,24 @@
 Wallet Analysis Logic
 Computes profitability, hit rate, and trader score for Polymarket wallets
 """
+import asyncio
+import heapq
 import logging
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 from datetime import datetime, timedelta
-from collections import defaultdict
 
-from polymarket_client import PolymarketClient
+from cache import AsyncTTLCache, CacheBackend
+from heavy_hitters import SpaceSaving
+from metrics import STAGE_SECONDS, timed_stage
+from polymarket_client import PolymarketClient, Trade, UpstreamUnavailableError
+from tracing import span
+from trade_metrics import TradeColumns, WindowedAggregates, merge_aggregates
+from trade_store import TradeStore
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class WalletAnalyzer:
     """
@@ -22,8 +31,71 @@ class WalletAnalyzer:
     - Trader score (composite metric)
     """
 
-    def __init__(self, client: PolymarketClient):
+    # Max market metadata lookups awaited concurrently per wallet
+    METADATA_CONCURRENCY = 10
+
+    # Max wallets analyzed concurrently across all callers of this analyzer
+    WALLET_CONCURRENCY = 5
+
+    # Candidate discovery: Data API pages read per pass (None = every trade in
+    # the window), spread over this many time slices of the window
+    DISCOVERY_MAX_PAGES: Optional[int] = 40
+    DISCOVERY_SLICES = 8
+    # Space-Saving counters kept per requested candidate
+    DISCOVERY_CAPACITY_FACTOR = 10
+    # Holder discovery: most traded open markets read, and holders per market
+    DISCOVERY_HOLDER_MARKETS = 50
+    DISCOVERY_HOLDERS_PER_MARKET = 100
+    DISCOVERY_MODES = ("trades", "holders")
+
+    # Finished (wallet, range) analyses kept for repeat requests
+    RESULT_CACHE_SIZE = 1000
+    RESULT_TTL = 60.0
+
+    def __init__(
+        self,
+        client: PolymarketClient,
+        trade_store: Optional[TradeStore] = None,
+        result_ttl: Optional[float] = None,
+        shared_cache: Optional[CacheBackend] = None,
+        discovery: str = "trades"
+    ):
+        """
+        Args:
+            client: Polymarket API client
+            trade_store: Optional local trade store for incremental analysis
+            result_ttl: Seconds a finished analysis is reused (default RESULT_TTL;
+                0 only coalesces concurrent requests)
+            shared_cache: Optional cache shared with other worker processes,
+                so an analysis computed by one worker is reused by all
+            discovery: How ranking finds candidates: "trades" scans the trade
+                stream of the window, "holders" reads the holders of the most
+                traded open markets (see _discover_candidates)
+        """
+        if discovery not in self.DISCOVERY_MODES:
+            raise ValueError(f"Unknown discovery mode {discovery!r}")
+
         self.client = client
+        self.discovery = discovery
+        self.trade_store = trade_store
+        self.result_ttl = self.RESULT_TTL if result_ttl is None else result_ttl
+        self.result_cache = AsyncTTLCache(
+            max_size=self.RESULT_CACHE_SIZE, name="wallet_analyses", shared=shared_cache
+        )
+        self._wallet_slots: Optional[asyncio.Semaphore] = None
+
+    def _window_seconds(self, time_range: str) -> int:
+        """
+        Length of a time range in seconds.
+
+        Accepts the standard "7d", "30d", "90d" as well as custom "<n>d" and
+        "<n>h" windows; anything else falls back to 30 days.
+        """
+        unit_seconds = {"d": 86400, "h": 3600}
+        unit = time_range[-1:]
+        if unit in unit_seconds and time_range[:-1].isdigit() and int(time_range[:-1]) > 0:
+            return int(time_range[:-1]) * unit_seconds[unit]
+        return 30 * 86400
 
     def _get_time_range_timestamps(self, time_range: str) -> tuple[int, int]:
         """
@@ -38,14 +110,12 @@ class WalletAnalyzer:
         now = datetime.utcnow()
         end_ts = int(now.timestamp())
 
-        days_map = {"7d": 7, "30d": 30, "90d": 90}
-        days = days_map.get(time_range, 30)
-
-        start = now - timedelta(days=days)
+        start = now - timedelta(seconds=self._window_seconds(time_range))
         start_ts = int(start.timestamp())
 
         return start_ts, end_ts
 
+    @timed_stage("rank_wallets")
     async def rank_wallets(
         self,
         time_range: str,
@@ -58,10 +128,13 @@ class WalletAnalyzer:
         """
         Discover and rank wallets over a period using existing analysis logic.
 
-        Strategy (MVP, on-the-fly):
-        1. Pull a recent slice of trades in the given time window.
-        2. Aggregate by maker to find active wallets (using volume + trade count).
-        3. Analyze the most active wallets with the existing per-wallet analysis.
+        Strategy (on-the-fly):
+        1. Discover candidates (see _discover_candidates): the makers with
+           the most volume in the window, or the largest holders of the most
+           traded open markets.
+        2. Load each candidate's trade aggregates and drop those that cannot
+           pass the filters below (cheap: no market metadata needed).
+        3. Finish the per-wallet analysis for the survivors only.
         4. Filter out noisy wallets (low volume, too few resolved markets, or
            performance dominated by one lucky market).
         5. Rank by trader_score, then ROI and hit rate as tie-breakers.
@@ -76,65 +149,415 @@ class WalletAnalyzer:
                 fraction of resolved stake, the wallet is discarded to avoid
                 one-off lucky wins.
         """
-        start_ts, end_ts = self._get_time_range_timestamps(time_range)
+        filters = {
+            "min_resolved_markets": min_resolved_markets,
+            "min_volume": min_volume,
+            "max_single_market_weight": max_single_market_weight,
+        }
+        candidate_wallets = await self._discover_candidates(time_range, limit * 3)
+        analyses = await self._for_each_wallet(
+            candidate_wallets,
+            lambda wallet_address: self._analyze_candidate(wallet_address, time_range, filters),
+        )
+
+        return self._filter_and_rank(analyses, limit=limit, offset=offset, **filters)
 
-        # Grab a slice of recent trades to discover active makers.
-        trade_slice = await self.client.get_trades(
-            limit=1000,
-            offset=offset,
-            start_ts=start_ts,
-            end_ts=end_ts,
+    @timed_stage("rank_wallets_windows")
+    async def rank_wallets_windows(
+        self,
+        time_ranges: Sequence[str] = ("7d", "30d", "90d"),
+        limit: int = 50,
+        min_resolved_markets: int = 3,
+        min_volume: float = 50.0,
+        max_single_market_weight: float = 0.6,
+    ) -> Dict[str, List[Dict]]:
+        """
+        Rank wallets for several time ranges at once.
+
+        Candidates discovered for every range are pooled, and each candidate's
+        history is fetched and aggregated once for all ranges (see
+        analyze_wallet_windows) instead of once per range. Filters, the cheap
+        pre-filter stage and ordering are the same as rank_wallets.
+
+        Returns:
+            Dict[time_range, ranked analyses]
+        """
+        if self.discovery == "holders":
+            # Holders are a current snapshot, the same for every range
+            discovered = [await self._discover_holders(limit * 3)]
+        else:
+            discovered = await asyncio.gather(
+                *(self._discover_candidates(time_range, limit * 3) for time_range in time_ranges)
+            )
+        candidate_wallets = list(dict.fromkeys(
+            wallet for candidates in discovered for wallet in candidates
+        ))
+
+        filters = {
+            "min_resolved_markets": min_resolved_markets,
+            "min_volume": min_volume,
+            "max_single_market_weight": max_single_market_weight,
+        }
+        per_wallet = await self._for_each_wallet(
+            candidate_wallets,
+            lambda wallet: self.analyze_wallet_windows(wallet, time_ranges, filters),
         )
 
-        maker_volume: Dict[str, float] = defaultdict(float)
+        return {
+            time_range: self._filter_and_rank(
+                [windows[time_range] for windows in per_wallet if time_range in windows],
+                limit=limit,
+                offset=0,
+                **filters,
+            )
+            for time_range in time_ranges
+        }
 
-        for trade in trade_slice:
-            maker = trade.get("maker")
-            if not maker:
-                continue
-            size = float(trade.get("size", 0))
-            price = float(trade.get("price", 1.0))
-            maker_volume[maker] += size * price
+    async def _analyze_candidate(
+        self,
+        wallet_address: str,
+        time_range: str,
+        filters: Dict
+    ) -> Optional[Dict]:
+        """
+        analyze_wallet for ranking, with a cheap first stage.
+
+        The candidate's trade aggregates are loaded first; if they show the
+        wallet cannot pass the ranking filters, it is dropped (None) before
+        any market metadata is requested. Like analyze_wallet_shared, it goes
+        through the single-flight result cache, so workers reuse each other's
+        candidate analyses.
+        """
+        async def load() -> Optional[Dict]:
+            start_ts, end_ts = self._get_time_range_timestamps(time_range)
+            state = await self._load_wallet_state(wallet_address, time_range, start_ts, end_ts)
 
-        # Take the most active makers as candidates (oversample to reduce noise).
-        sorted_makers = sorted(
-            maker_volume.items(), key=lambda item: item[1], reverse=True
+            if not self._may_pass_filters(state["markets"], state["summary"], **filters):
+                if self.trade_store is not None:
+                    self.trade_store.save_wallet_state(wallet_address, time_range, state)
+                return None
+
+            return await self._complete_analysis(wallet_address, time_range, state)
+
+        return await self.result_cache.get_or_load(
+            (wallet_address.lower(), time_range),
+            load,
+            ttl_for=lambda _: self.result_ttl,
         )
-        candidate_wallets = [maker for maker, _ in sorted_makers[: limit * 3]]
 
-        analyses: List[Dict] = []
-        for wallet in candidate_wallets:
-            try:
-                analysis = await self.analyze_wallet(wallet_address=wallet, time_range=time_range)
+    @timed_stage("prefilter")
+    def _may_pass_filters(
+        self,
+        markets_data: Dict[str, Dict],
+        trade_summary: Dict,
+        min_resolved_markets: int,
+        min_volume: float,
+        max_single_market_weight: float
+    ) -> bool:
+        """
+        Cheap pre-filter on trade aggregates alone.
 
-                # Filter: minimum activity and resolution depth
-                if analysis["resolved_markets"] < min_resolved_markets:
-                    continue
-                if analysis["total_volume_traded"] < min_volume:
+        Only rejects wallets that _filter_and_rank would reject too, given
+        the market metadata already cached locally (no requests are made):
+        markets cached as open cannot count as resolved, and a market cached
+        as resolved bounds the largest resolved-stake share from below.
+        """
+        if round(trade_summary["total_volume"], 2) < min_volume:
+            return False
+
+        possibly_resolved = 0
+        possibly_resolved_stake = 0.0
+        largest_resolved_stake = 0.0
+        for market_id, data in markets_data.items():
+            market = self.client.cached_market(market_id)
+            if market is not None and not market.get("resolved", False):
+                continue
+            stake = round(data["total_stake"], 2)
+            possibly_resolved += 1
+            possibly_resolved_stake += stake
+            if market is not None:
+                largest_resolved_stake = max(largest_resolved_stake, stake)
+
+        if possibly_resolved < min_resolved_markets:
+            return False
+        if possibly_resolved_stake > 0:
+            if largest_resolved_stake / possibly_resolved_stake > max_single_market_weight:
+                return False
+        return True
+
+    async def _discover_candidates(self, time_range: str, count: int) -> List[str]:
+        """Ranking candidates for a time window, by the analyzer's discovery mode"""
+        if self.discovery == "holders":
+            return await self._discover_holders(count)
+        return await self._discover_traders(time_range, count)
+
+    @timed_stage("discovery_trades")
+    async def _discover_traders(self, time_range: str, count: int) -> List[str]:
+        """
+        Most active makers in a time window, by traded volume.
+
+        The window is split into DISCOVERY_SLICES equal time slices that are
+        paged through concurrently, each up to its share of
+        DISCOVERY_MAX_PAGES (None scans every trade in the window), so the
+        sample covers the whole window rather than only its newest trades.
+        Makers are counted in a Space-Saving sketch, keeping memory constant
+        however many trades are scanned.
+
+        Args:
+            time_range: Window to look at
+            count: Number of candidates to return
+
+        Returns:
+            Wallet addresses, most active first
+        """
+        start_ts, end_ts = self._get_time_range_timestamps(time_range)
+        sketch = SpaceSaving(count * self.DISCOVERY_CAPACITY_FACTOR)
+
+        slices = self.DISCOVERY_SLICES
+        pages_per_slice = (
+            None if self.DISCOVERY_MAX_PAGES is None
+            else max(1, self.DISCOVERY_MAX_PAGES // slices)
+        )
+        window = (end_ts - start_ts + 1) / slices
+        bounds = [start_ts + round(i * window) for i in range(slices)] + [end_ts + 1]
+
+        async def scan(slice_start: int, slice_end: int):
+            async for trade in self.client.iter_trades(
+                start_ts=slice_start,
+                end_ts=slice_end,
+                max_pages=pages_per_slice
+            ):
+                if not trade.maker:
                     continue
+                price = trade.price if trade.price is not None else 1.0
+                sketch.add(trade.maker, trade.size * price)
+
+        await asyncio.gather(*(
+            scan(bounds[i], bounds[i + 1] - 1)
+            for i in range(slices)
+            if bounds[i + 1] > bounds[i]
+        ))
+
+        logger.info(
+            f"Discovery for {time_range} scanned {sketch.total_weight:.0f} volume, "
+            f"tracking {len(sketch)} makers"
+        )
+        return [hitter.key for hitter in sketch.top(count)]
+
+    @timed_stage("discovery_holders")
+    async def _discover_holders(self, count: int) -> List[str]:
+        """
+        Largest holders across the most traded open markets.
 
-                # Filter: guard against single lucky market dominating results
-                resolved_markets = [m for m in analysis["markets"] if m["resolved"]]
-                if resolved_markets:
-                    stakes = [m["stake"] for m in resolved_markets]
-                    total_stake = sum(stakes)
-                    if total_stake > 0:
-                        if max(stakes) / total_stake > max_single_market_weight:
-                            continue
-
-                analyses.append(analysis)
-            except Exception as exc:  # noqa: PERF203 - keep broad catch for resilience
-                logger.warning(f"Skipping wallet {wallet} during ranking: {exc}")
+        Reads the DISCOVERY_HOLDER_MARKETS open markets with the highest 24h
+        volume, fetches their holders concurrently and merges them into one
+        deduplicated set, weighted by total balance. That is one Gamma request
+        plus one Data API request per market, instead of paging through the
+        trade stream. The market listing also warms the metadata cache.
+
+        Args:
+            count: Number of candidates to return
+
+        Returns:
+            Wallet addresses, largest combined balance first
+        """
+        markets = await self.client.get_markets(
+            limit=self.DISCOVERY_HOLDER_MARKETS,
+            active=True,
+            closed=False,
+            order="volume24hr",
+            ascending=False
+        )
+        await self.client.share_markets(markets)
+        market_ids = [
+            condition_id for market in markets
+            if (condition_id := self.client.market_condition_id(market))
+        ]
+
+        responses = await asyncio.gather(
+            *(
+                self.client.get_holders(market_id, limit=self.DISCOVERY_HOLDERS_PER_MARKET)
+                for market_id in market_ids
+            ),
+            return_exceptions=True
+        )
+
+        # lowercased address -> [address as first seen, combined balance]
+        balances: Dict[str, List] = {}
+        failures: List[Exception] = []
+        for market_id, response in zip(market_ids, responses):
+            if isinstance(response, Exception):
+                logger.error(f"Error fetching holders for market {market_id}: {response}")
+                failures.append(response)
+                continue
+            for wallet, balance in self.client.holder_balances(response):
+                entry = balances.setdefault(wallet.lower(), [wallet, 0.0])
+                entry[1] += balance
+
+        if not balances:
+            unavailable = [e for e in failures if isinstance(e, UpstreamUnavailableError)]
+            if unavailable:
+                raise unavailable[0]
+
+        logger.info(
+            f"Holder discovery read {len(market_ids)} markets, found {len(balances)} wallets"
+        )
+        ranked = heapq.nlargest(count, balances.values(), key=lambda entry: entry[1])
+        return [wallet for wallet, _ in ranked]
+
+    @timed_stage("rank")
+    def _filter_and_rank(
+        self,
+        analyses: List[Dict],
+        limit: int,
+        offset: int,
+        min_resolved_markets: int,
+        min_volume: float,
+        max_single_market_weight: float,
+    ) -> List[Dict]:
+        """Drop noisy wallets and order the rest by trader score, ROI, hit rate"""
+        kept: List[Dict] = []
+        for analysis in analyses:
+            # Filter: minimum activity and resolution depth
+            if analysis["resolved_markets"] < min_resolved_markets:
+                continue
+            if analysis["total_volume_traded"] < min_volume:
                 continue
 
+            # Filter: guard against single lucky market dominating results
+            resolved_markets = [m for m in analysis["markets"] if m["resolved"]]
+            if resolved_markets:
+                stakes = [m["stake"] for m in resolved_markets]
+                total_stake = sum(stakes)
+                if total_stake > 0:
+                    if max(stakes) / total_stake > max_single_market_weight:
+                        continue
+
+            kept.append(analysis)
+
         ranked = sorted(
-            analyses,
+            kept,
             key=lambda a: (a["trader_score"], a["roi"], a["hit_rate"]),
             reverse=True,
         )
 
         return ranked[offset : offset + limit]
 
+    async def analyze_wallets(
+        self,
+        wallet_addresses: List[str],
+        time_range: str
+    ) -> List[Dict]:
+        """
+        Analyze several wallets concurrently.
+
+        Wallets share the analyzer-wide WALLET_CONCURRENCY slots, and every
+        upstream call still draws from the client's rate limiter, so parallel
+        requests cannot exceed the global budget. A wallet that fails is logged
+        and left out without affecting the others. Cancelling the caller
+        cancels all wallets still in progress.
+
+        Args:
+            wallet_addresses: Polymarket proxy wallet addresses
+            time_range: "7d", "30d", or "90d"
+
+        Returns:
+            Analyses of the wallets that succeeded, in input order
+        """
+        return await self._for_each_wallet(
+            wallet_addresses,
+            lambda wallet_address: self.analyze_wallet_shared(wallet_address, time_range),
+        )
+
+    async def _run_in_slot(
+        self,
+        wallet_address: str,
+        analyze: Callable[[str], Awaitable[T]]
+    ) -> Tuple[Optional[T], Optional[Exception]]:
+        """Run analyze under a wallet slot; returns (result, error), never raises"""
+        if self._wallet_slots is None:
+            self._wallet_slots = asyncio.Semaphore(self.WALLET_CONCURRENCY)
+
+        with span("wallet", wallet=wallet_address):
+            async with self._wallet_slots:
+                try:
+                    return await analyze(wallet_address), None
+                except Exception as exc:  # noqa: BLE001 - isolate per-wallet failures
+                    logger.error(f"Error analyzing wallet {wallet_address}: {exc}")
+                    return None, exc
+
+    async def iter_wallet_analyses(
+        self,
+        wallet_addresses: List[str],
+        time_range: str
+    ) -> AsyncIterator[Tuple[str, Optional[Dict], Optional[Exception]]]:
+        """
+        Analyze several wallets concurrently, yielding each as it completes.
+
+        Same concurrency, caching and isolation as analyze_wallets, but
+        results arrive in completion order so callers can forward them
+        early. Closing the iterator cancels the wallets still in progress.
+
+        Yields:
+            (wallet_address, analysis or None, error or None)
+        """
+        async def run(wallet_address: str):
+            result, error = await self._run_in_slot(
+                wallet_address,
+                lambda address: self.analyze_wallet_shared(address, time_range),
+            )
+            return wallet_address, result, error
+
+        tasks = [asyncio.ensure_future(run(wallet_address)) for wallet_address in wallet_addresses]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def analyze_wallet_shared(self, wallet_address: str, time_range: str) -> Dict:
+        """
+        analyze_wallet behind a single-flight result cache.
+
+        Concurrent requests for the same (wallet, range) await one shared
+        computation, and its result is reused for result_ttl seconds.
+        """
+        key = (wallet_address.lower(), time_range)
+
+        async def load() -> Dict:
+            return await self.analyze_wallet(wallet_address, time_range)
+
+        analysis = await self.result_cache.get_or_load(key, load, ttl_for=lambda _: self.result_ttl)
+        if analysis is None:
+            # Joined a ranking candidate load that pre-filtered the wallet out
+            analysis = await self.result_cache.get_or_load(key, load, ttl_for=lambda _: self.result_ttl)
+        return analysis
+
+    async def _for_each_wallet(
+        self,
+        wallet_addresses: List[str],
+        analyze: Callable[[str], Awaitable[T]]
+    ) -> List[T]:
+        """
+        Run analyze for every wallet under the shared concurrency slots.
+
+        Failures are logged and dropped; results keep input order. If every
+        wallet failed because the upstream API is unavailable, that error is
+        raised rather than returning an empty result.
+        """
+        outcomes = await asyncio.gather(
+            *(self._run_in_slot(wallet_address, analyze) for wallet_address in wallet_addresses)
+        )
+        succeeded = [result for result, _ in outcomes if result is not None]
+        unavailable = [
+            error for _, error in outcomes if isinstance(error, UpstreamUnavailableError)
+        ]
+        if not succeeded and unavailable:
+            raise unavailable[0]
+        return succeeded
+
+    @timed_stage("analyze_wallet")
     async def analyze_wallet(
         self,
         wallet_address: str,
@@ -155,101 +578,285 @@ class WalletAnalyzer:
         # Get time range
         start_ts, end_ts = self._get_time_range_timestamps(time_range)
 
-        # Fetch trades for this wallet in the time range
-        trades = await self.client.get_trades(
-            maker=wallet_address,
-            limit=1000,  # Fetch up to 1000 trades
-            start_ts=start_ts,
-            end_ts=end_ts
-        )
-
-        logger.info(f"Found {len(trades)} trades for wallet {wallet_address}")
+        # Per-market aggregates of every trade in the time range
+        state = await self._load_wallet_state(wallet_address, time_range, start_ts, end_ts)
 
-        # Fetch activity to get more context
-        activity = await self.client.get_activity(
-            user=wallet_address,
-            limit=1000
+        logger.info(
+            f"Found {state['summary']['trade_count']} trades for wallet {wallet_address}"
         )
 
-        # Group trades by market
-        markets_data = await self._group_trades_by_market(trades, activity)
+        return await self._complete_analysis(wallet_address, time_range, state)
+
+    async def _complete_analysis(self, wallet_address: str, time_range: str, state: Dict) -> Dict:
+        """Enrich loaded trade aggregates with market metadata and compute metrics"""
+        markets_data, trade_summary = state["markets"], state["summary"]
 
         # Fetch market metadata for resolved markets
         markets_with_metadata = await self._enrich_with_market_metadata(markets_data)
 
+        # Keep aggregates and evaluated PnL for the next incremental run
+        if self.trade_store is not None:
+            self.trade_store.save_wallet_state(wallet_address, time_range, state)
+
         # Calculate metrics
         metrics = self._calculate_metrics(
             markets_with_metadata,
-            trades,
+            trade_summary,
             wallet_address=wallet_address
         )
+        metrics["analyzed_at"] = datetime.utcnow().isoformat() + "Z"
 
         return metrics
 
-    async def _group_trades_by_market(
+    @timed_stage("analyze_wallet_windows")
+    async def analyze_wallet_windows(
         self,
-        trades: List[Dict],
-        activity: List[Dict]
+        wallet_address: str,
+        time_ranges: Sequence[str] = ("7d", "30d", "90d"),
+        filters: Optional[Dict] = None
     ) -> Dict[str, Dict]:
+        """
+        Analyze a wallet for several time ranges from one pass over its trades.
+
+        Trades for the longest range are read once and bucketed by age (see
+        trade_metrics.WindowedAggregates); each shorter range is then a prefix
+        of the same buckets. Market metadata is fetched once for the markets
+        of all analyzed ranges and shared by them.
+
+        Args:
+            wallet_address: Polymarket proxy wallet address
+            time_ranges: Ranges to analyze, e.g. ("7d", "30d", "90d")
+            filters: Ranking filters (see _may_pass_filters); ranges that
+                cannot pass them are left out before any metadata is fetched
+
+        Returns:
+            Dict[time_range, wallet analysis]
+        """
+        logger.info(f"Analyzing wallet {wallet_address} for ranges {', '.join(time_ranges)}")
+
+        windows = {time_range: self._window_seconds(time_range) for time_range in time_ranges}
+        horizon = max(windows.values())
+        end_ts = int(datetime.utcnow().timestamp())
+        start_ts = end_ts - horizon
+
+        with STAGE_SECONDS.time(stage="load_trades"):
+            if self.trade_store is None:
+                trades = self.client.iter_trades(
+                    maker=wallet_address,
+                    start_ts=start_ts,
+                    end_ts=end_ts
+                )
+            else:
+                await self.trade_store.sync(self.client, wallet_address, start_ts, end_ts)
+                trades = self.trade_store.iter_trades(wallet_address, start_ts, end_ts)
+
+            columns = await TradeColumns.from_trades(trades)
+        buckets = WindowedAggregates(
+            columns, end_ts, horizon, windows=tuple(windows.values())
+        )
+        logger.info(f"Found {len(columns)} trades for wallet {wallet_address}")
+
+        aggregates = {
+            time_range: buckets.window(seconds) for time_range, seconds in windows.items()
+        }
+        if filters is not None:
+            aggregates = {
+                time_range: (markets_data, trade_summary)
+                for time_range, (markets_data, trade_summary) in aggregates.items()
+                if self._may_pass_filters(markets_data, trade_summary, **filters)
+            }
+
+        # One metadata lookup covering every remaining window's markets
+        market_ids = dict.fromkeys(
+            market_id for markets_data, _ in aggregates.values() for market_id in markets_data
+        )
+        metadata = await self._fetch_market_metadata(list(market_ids)) if market_ids else {}
+
+        analyses = {}
+        for time_range, (markets_data, trade_summary) in aggregates.items():
+            markets_with_metadata = await self._enrich_with_market_metadata(
+                markets_data, metadata
+            )
+            analyses[time_range] = self._calculate_metrics(
+                markets_with_metadata,
+                trade_summary,
+                wallet_address=wallet_address
+            )
+            analyses[time_range]["analyzed_at"] = datetime.utcnow().isoformat() + "Z"
+
+        return analyses
+
+    @timed_stage("load_trades")
+    async def _load_wallet_state(
+        self,
+        wallet_address: str,
+        time_range: str,
+        start_ts: int,
+        end_ts: int
+    ) -> Dict:
+        """
+        Per-market aggregates for the wallet's trades in [start_ts, end_ts].
+
+        Without a trade store, trades stream from the API and are aggregated
+        from scratch. With one, the saved state for (wallet, range) is brought
+        up to date instead: trades stored since its high-water mark are folded
+        in, as are older stored trades newer than its window end, and trades
+        that slid out of the window are subtracted, so the work is
+        proportional to the change rather than the full history.
+
+        The state covers exactly the stored trades with rowid <= high_water
+        and window_start <= timestamp <= window_end.
+
+        Returns:
+            {"window_start", "window_end", "high_water", "markets", "summary"}
+        """
+        if self.trade_store is None:
+            markets, summary = await self._group_trades_by_market(
+                self.client.iter_trades(
+                    maker=wallet_address,
+                    start_ts=start_ts,
+                    end_ts=end_ts
+                )
+            )
+            return {
+                "window_start": start_ts,
+                "window_end": end_ts,
+                "high_water": None,
+                "markets": markets,
+                "summary": summary,
+            }
+
+        store = self.trade_store
+        await store.sync(self.client, wallet_address, start_ts, end_ts)
+        high_water = store.high_water_mark(wallet_address)
+        state = store.load_wallet_state(wallet_address, time_range)
+
+        if (
+            state is None
+            or "window_end" not in state
+            or start_ts < state["window_start"]
+            or end_ts < state["window_end"]
+        ):
+            markets, summary = await self._group_trades_by_market(
+                store.iter_trades(wallet_address, start_ts, end_ts, up_to_rowid=high_water)
+            )
+            return {
+                "window_start": start_ts,
+                "window_end": end_ts,
+                "high_water": high_water,
+                "markets": markets,
+                "summary": summary,
+            }
+
+        markets, summary = state["markets"], state["summary"]
+        old_start, old_end, old_high_water = state["window_start"], state["window_end"], state["high_water"]
+
+        # Trades stored since the last run
+        if high_water > old_high_water:
+            added = await self._group_trades_by_market(
+                store.iter_trades(
+                    wallet_address,
+                    start_ts,
+                    end_ts,
+                    after_rowid=old_high_water,
+                    up_to_rowid=high_water
+                )
+            )
+            merge_aggregates(markets, summary, *added, sign=1)
+
+        # Trades stored before the last run but newer than its window (e.g.
+        # synced by a concurrent analysis that ran later)
+        if end_ts > old_end:
+            caught_up = await self._group_trades_by_market(
+                store.iter_trades(
+                    wallet_address,
+                    max(start_ts, old_end + 1),
+                    end_ts,
+                    up_to_rowid=old_high_water
+                )
+            )
+            merge_aggregates(markets, summary, *caught_up, sign=1)
+
+        # Trades that were in the previous window but are now too old
+        if start_ts > old_start:
+            expired = await self._group_trades_by_market(
+                store.iter_trades(
+                    wallet_address,
+                    old_start,
+                    min(start_ts - 1, old_end),
+                    up_to_rowid=old_high_water
+                )
+            )
+            merge_aggregates(markets, summary, *expired, sign=-1)
+
+        state["window_start"] = start_ts
+        state["window_end"] = end_ts
+        state["high_water"] = high_water
+        return state
+
+    async def _group_trades_by_market(
+        self,
+        trades: AsyncIterator[Trade]
+    ) -> Tuple[Dict[str, Dict], Dict]:
         """
         Group trades by market and calculate per-market stats.
 
+        Trades are parsed once into NumPy columns (see trade_metrics) and the
+        per-market stake, positions, cash flow and entry price sums are
+        computed with grouped reductions.
+
         Returns:
-            Dict[market_id, market_data]
-        """
-        markets = defaultdict(lambda: {
-            "trades": [],
-            "total_stake": 0.0,
-            "pnl": 0.0,
-            "resolved": False,
-            "outcome": None,
-        })
-
-        for trade in trades:
-            # Parse trade data
-            # Expected fields from Polymarket Data API /trades endpoint:
-            # - market (condition_id)
-            # - asset_id
-            # - side (BUY/SELL)
-            # - size (amount)
-            # - price
-            # - timestamp
-            # - maker, taker
-            market_id = trade.get("market") or trade.get("condition_id")
-            if not market_id:
-                continue
+            (Dict[market_id, market_data], wallet-level trade summary)
+        """
+        columns = await TradeColumns.from_trades(trades)
+        return columns.aggregate()
 
-            size = float(trade.get("size", 0))
-            price = float(trade.get("price", 0))
-            side = trade.get("side", "")
+    @timed_stage("market_metadata")
+    async def _fetch_market_metadata(self, market_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Market metadata for every id (None where it cannot be found).
+        """
+        # Bulk lookup first (local cache + batched Gamma queries) ...
+        known_markets = await self.client.get_markets_by_ids(market_ids)
 
-            markets[market_id]["trades"].append(trade)
+        semaphore = asyncio.Semaphore(self.METADATA_CONCURRENCY)
 
-            # Calculate stake (approximation)
-            # For BUY: stake = size * price
-            # For SELL: stake is the size being sold
-            if side == "BUY":
-                markets[market_id]["total_stake"] += size * price
-            else:
-                markets[market_id]["total_stake"] += size
+        async def fetch(market_id: str) -> Optional[Dict]:
+            if market_id in known_markets:
+                return known_markets[market_id]
+            async with semaphore:
+                # ... then point queries for anything the bulk lookup missed
+                return await self.client.get_market_by_id(market_id)
 
-        return dict(markets)
+        # gather preserves input order, so results line up with market_ids
+        market_infos = await asyncio.gather(*(fetch(market_id) for market_id in market_ids))
+        return dict(zip(market_ids, market_infos))
 
     async def _enrich_with_market_metadata(
         self,
-        markets_data: Dict[str, Dict]
+        markets_data: Dict[str, Dict],
+        metadata: Optional[Dict[str, Optional[Dict]]] = None
     ) -> List[Dict]:
         """
         Fetch market metadata and enrich market data.
 
+        Args:
+            markets_data: Per-market aggregates
+            metadata: Already fetched metadata (see _fetch_market_metadata);
+                fetched here when not given
+
         Returns:
             List of enriched market dictionaries
         """
+        market_ids = list(markets_data.keys())
+        if metadata is None:
+            metadata = await self._fetch_market_metadata(market_ids)
+
         enriched_markets = []
 
-        for market_id, data in markets_data.items():
-            # Fetch market info from Gamma API
-            market_info = await self.client.get_market_by_id(market_id)
+        for market_id in market_ids:
+            data = markets_data[market_id]
+            market_info = metadata.get(market_id)
 
             if not market_info:
                 # Skip markets we can't find metadata for
@@ -268,47 +875,34 @@ class WalletAnalyzer:
             category = market_info.get("category", "uncategorized")
             resolved = market_info.get("resolved", False)
             outcome = market_info.get("outcome")
-            closed = market_info.get("closed", False)
-
-            # Calculate PnL for resolved markets
-            pnl = 0.0
-            if resolved and outcome:
-                pnl = self._calculate_market_pnl(
-                    trades=data["trades"],
-                    outcome=outcome,
-                    market_info=market_info
-                )
 
-            # Get last trade time
-            last_trade = None
-            if data["trades"]:
-                last_trade = max(
-                    data["trades"],
-                    key=lambda t: t.get("timestamp", 0)
-                )
+            # Calculate PnL for resolved markets, reusing the previous result
+            # unless the market traded or its resolution changed since then
+            evaluated = data.get("evaluated")
+            if evaluated and (evaluated["resolved"], evaluated["outcome"]) == (resolved, outcome):
+                pnl = evaluated["pnl"]
+            else:
+                pnl = 0.0
+                if resolved and outcome:
+                    pnl = self._calculate_market_pnl(
+                        positions=data["positions"],
+                        cash_flow=data["cash_flow"],
+                        outcome=outcome,
+                        market_info=market_info
+                    )
+                data["evaluated"] = {"resolved": resolved, "outcome": outcome, "pnl": pnl}
 
             # Get entry/exit prices (approximation)
             entry_price = 0.0
             exit_price = None
 
-            if data["trades"]:
-                # Average entry price (weighted by size)
-                total_buy_size = 0.0
-                weighted_price_sum = 0.0
+            # Average entry price (weighted by size)
+            if data["buy_size"] > 0:
+                entry_price = data["weighted_price_sum"] / data["buy_size"]
 
-                for trade in data["trades"]:
-                    if trade.get("side") == "BUY":
-                        size = float(trade.get("size", 0))
-                        price = float(trade.get("price", 0))
-                        total_buy_size += size
-                        weighted_price_sum += size * price
-
-                if total_buy_size > 0:
-                    entry_price = weighted_price_sum / total_buy_size
-
-                # Exit price: if resolved, outcome determines final price
-                if resolved:
-                    exit_price = 1.0 if outcome else 0.0
+            # Exit price: if resolved, outcome determines final price
+            if resolved:
+                exit_price = 1.0 if outcome else 0.0
 
             enriched_markets.append({
                 "market_id": market_id,
@@ -321,14 +915,15 @@ class WalletAnalyzer:
                 "entry_price": entry_price,
                 "exit_price": exit_price,
                 "resolved_at": market_info.get("end_date_iso") if resolved else None,
-                "last_trade_time": last_trade.get("timestamp") if last_trade else None,
+                "last_trade_time": data["last_timestamp"],
             })
 
         return enriched_markets
 
     def _calculate_market_pnl(
         self,
-        trades: List[Dict],
+        positions: Dict[str, float],
+        cash_flow: float,
         outcome: str,
         market_info: Dict
     ) -> float:
@@ -343,32 +938,14 @@ class WalletAnalyzer:
         This is an approximation. Real PnL would require tracking exact positions.
 
         Args:
-            trades: List of trades for this market
+            positions: Net tokens held per asset_id after all trades
+            cash_flow: Cash received from sells minus cash paid for buys
             outcome: Resolution outcome (e.g., "YES", "NO", or token index)
             market_info: Market metadata
 
         Returns:
             Estimated PnL
         """
-        # Track net position per outcome token
-        positions = defaultdict(float)
-        cash_flow = 0.0
-
-        for trade in trades:
-            side = trade.get("side", "")
-            size = float(trade.get("size", 0))
-            price = float(trade.get("price", 0))
-            asset_id = trade.get("asset_id", "")
-
-            if side == "BUY":
-                # Bought tokens
-                positions[asset_id] += size
-                cash_flow -= size * price  # Cash out
-            elif side == "SELL":
-                # Sold tokens
-                positions[asset_id] -= size
-                cash_flow += size * price  # Cash in
-
         # Determine winning token
         # Outcome can be YES/NO or a token index
         # For binary markets, outcome might be the winning token ID
@@ -396,10 +973,11 @@ class WalletAnalyzer:
         pnl = cash_flow + final_value
         return pnl
 
+    @timed_stage("calculate_metrics")
     def _calculate_metrics(
         self,
         markets: List[Dict],
-        all_trades: List[Dict],
+        trade_summary: Dict,
         wallet_address: str
     ) -> Dict:
         """
@@ -416,7 +994,7 @@ class WalletAnalyzer:
 
         Args:
             markets: List of enriched market dictionaries
-            all_trades: All trades for this wallet
+            trade_summary: Wallet-level totals from _group_trades_by_market
 
         Returns:
             Dictionary with calculated metrics
@@ -432,10 +1010,7 @@ class WalletAnalyzer:
         hit_rate = profitable_count / resolved_count if resolved_count > 0 else 0.0
 
         # Total volume traded
-        total_volume = sum(
-            float(trade.get("size", 0)) * float(trade.get("price", 1.0))
-            for trade in all_trades
-        )
+        total_volume = trade_summary["total_volume"]
 
         # Realized PnL (sum of PnL on resolved markets)
         realized_pnl = sum(m["pnl"] for m in resolved_markets)
@@ -448,12 +1023,10 @@ class WalletAnalyzer:
 
         # Last trade time
         last_trade_time = None
-        if all_trades:
-            latest = max(all_trades, key=lambda t: t.get("timestamp", 0))
-            timestamp = latest.get("timestamp")
-            if timestamp:
-                # Convert to ISO format
-                last_trade_time = datetime.fromtimestamp(timestamp).isoformat() + "Z"
+        timestamp = trade_summary["last_timestamp"]
+        if timestamp:
+            # Convert to ISO format
+            last_trade_time = datetime.fromtimestamp(timestamp).isoformat() + "Z"
 
         # Trader Score
         # Formula: 0.4 * normalized_roi + 0.4 * hit_rate + 0.2 * recency_score
@@ -498,11 +1071,7 @@ class WalletAnalyzer:
             for m in markets
         ]
 
-        wallet_id = (
-            all_trades[0].get("maker")
-            if all_trades and all_trades[0].get("maker")
-            else wallet_address
-        )
+        wallet_id = trade_summary["maker"] or wallet_address
 
         return {
             "wallet": wallet_id,
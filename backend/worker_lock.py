@@ -0,0 +1,62 @@
+"""
+Worker election
+A non-blocking exclusive file lock that picks the one worker process on a
+host that runs the background loops
+"""
+import logging
+import os
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerLock:
+    """
+    Exclusive flock held by at most one process at a time.
+
+    The lock is released when the holder closes it or exits (even on a
+    crash), so a worker that keeps calling try_acquire() takes over from a
+    holder that went away.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """Take the lock if it is free; True when this process holds it"""
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            logger.warning("fcntl unavailable, every worker runs the background tasks")
+            self._fd = -1
+            return True
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        if self._fd >= 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
@@ -0,0 +1,137 @@
+"""
+Benchmark: PolymarketClient HTTP path against a local mock Data API
+
+Serves /trades pages from a local aiohttp server and compares the client's
+tuned session (shared keep-alive pool, timeouts, orjson decoding) with a
+default aiohttp session decoding through response.json().
+
+Usage:
+    python benchmarks/client_pool.py [--requests 400] [--page-size 1000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from polymarket_client import PolymarketClient  # noqa: E402
+from rate_limiter import TokenBucket  # noqa: E402
+
+
+def make_page(page_size: int) -> bytes:
+    """A /trades page shaped like the real Data API response"""
+    trades = [
+        {
+            "id": f"0x{i:064x}",
+            "transactionHash": f"0x{i:064x}",
+            "market": f"0x{i % 37:064x}",
+            "asset_id": str(10**70 + i % 74),
+            "side": "BUY" if i % 3 else "SELL",
+            "size": f"{(i % 500) + 0.25:.2f}",
+            "price": f"{(i % 97 + 1) / 100:.2f}",
+            "timestamp": 1_700_000_000 + i,
+            "maker": "0x1234567890abcdef1234567890abcdef12345678",
+            "taker": "0xabcdefabcdefabcdefabcdefabcdefabcdefabcd",
+            "outcome": "Yes" if i % 2 else "No",
+            "title": "Will the benchmark finish before lunch?",
+            "slug": "will-the-benchmark-finish-before-lunch",
+        }
+        for i in range(page_size)
+    ]
+    return json.dumps(trades).encode()
+
+
+async def start_server(page: bytes):
+    async def trades(request: web.Request) -> web.Response:
+        return web.Response(body=page, content_type="application/json")
+
+    # Kept-alive connections serve many requests; each socket is counted once
+    connections = set()
+
+    async def count_connection(request: web.Request, response: web.StreamResponse):
+        if request.transport is not None:
+            connections.add(id(request.transport))
+
+    app = web.Application()
+    app.router.add_get("/trades", trades)
+    app.on_response_prepare.append(count_connection)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", connections
+
+
+async def run_concurrently(count: int, concurrency: int, fetch) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await fetch()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    return time.perf_counter() - started
+
+
+async def bench_default_session(url: str, count: int, concurrency: int) -> float:
+    async with aiohttp.ClientSession() as session:
+        async def fetch():
+            async with session.get(url) as response:
+                response.raise_for_status()
+                await response.json()
+
+        return await run_concurrently(count, concurrency, fetch)
+
+
+async def bench_client(base: str, count: int, concurrency: int) -> float:
+    client = PolymarketClient()
+    # Measure the HTTP path, not the upstream rate budget
+    client.data_limiter = TokenBucket(10**9, 1.0, burst=10**6)
+    client.DATA_API_BASE = base
+    await client.start()
+    try:
+        return await run_concurrently(
+            count, concurrency, lambda: client._get(f"{base}/trades")
+        )
+    finally:
+        await client.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=PolymarketClient.MAX_IN_FLIGHT)
+    args = parser.parse_args()
+
+    page = make_page(args.page_size)
+    runner, base, connections = await start_server(page)
+    print(f"{args.requests} requests, {len(page) / 1024:.0f} KiB pages, concurrency {args.concurrency}")
+
+    try:
+        for name, bench in (
+            ("default session + response.json", lambda: bench_default_session(
+                f"{base}/trades", args.requests, args.concurrency)),
+            ("PolymarketClient._get", lambda: bench_client(
+                base, args.requests, args.concurrency)),
+        ):
+            connections.clear()
+            elapsed = await bench()
+            print(
+                f"{name:<34} {elapsed:6.2f}s  {args.requests / elapsed:7.1f} req/s  "
+                f"{len(connections):3d} connections"
+            )
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
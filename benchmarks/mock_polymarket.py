@@ -0,0 +1,287 @@
+"""
+Mock Polymarket APIs for offline benchmarks
+
+Serves the Gamma API (/gamma/markets, /gamma/markets/{id}) and the Data
+API (/data/trades, /data/activity, /data/holders) from a fixture on a
+local aiohttp server, with configurable latency, a per-window
+rate limit answered with 429 + Retry-After, and random 429 injection.
+
+Fixtures are either synthetic (make_fixture, deterministic for a seed) or
+recorded from the live APIs (see record_fixture.py) and loaded with
+load_fixture. Both have the same shape:
+
+    {
+        "trades": [raw /trades objects],
+        "markets": [raw Gamma market objects],
+        "holders": {condition_id: raw /holders response}
+    }
+"""
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+# Path prefixes standing in for the two upstream hosts
+GAMMA_PREFIX = "/gamma"
+DATA_PREFIX = "/data"
+
+
+def make_fixture(
+    wallets: int = 20,
+    trades_per_wallet: int = 200,
+    markets: int = 50,
+    max_age_days: int = 90,
+    history_sizes: Sequence[int] = (),
+    seed: int = 1
+) -> Dict:
+    """
+    Deterministic synthetic fixture.
+
+    Every wallet trades `trades_per_wallet` times across a random subset of
+    `markets` markets within the last `max_age_days` days; two thirds of the
+    markets are resolved. One extra wallet is added per `history_sizes`
+    entry, with exactly that many trades. Timestamps are relative to now
+    (MockPolymarket rebases them again when the server starts).
+    """
+    rng = random.Random(seed)
+    market_ids = [f"0x{i:064x}" for i in range(1, markets + 1)]
+    market_objects = []
+    for i, condition_id in enumerate(market_ids):
+        resolved = i % 3 != 0
+        market_objects.append({
+            "conditionId": condition_id,
+            "question": f"Synthetic market {i}?",
+            "category": ("politics", "sports", "crypto")[i % 3],
+            "active": not resolved,
+            "closed": resolved,
+            "resolved": resolved,
+            "outcome": rng.choice(("Yes", "No")) if resolved else None,
+            "volume24hr": rng.uniform(0, 1e6) if not resolved else 0,
+        })
+
+    now = int(time.time())
+    trades = []
+    holders: Dict[str, Dict[str, float]] = defaultdict(dict)
+    trade_counts = [trades_per_wallet] * wallets + list(history_sizes)
+    for w, trade_count in enumerate(trade_counts):
+        wallet = f"0x{w + 1:040x}"
+        traded = rng.sample(market_ids, k=min(len(market_ids), rng.randint(3, 15)))
+        for t in range(trade_count):
+            market = rng.choice(traded)
+            outcome = rng.choice(("yes", "no"))
+            size = round(rng.uniform(1, 500), 2)
+            trades.append({
+                "id": f"0x{w:032x}{t:032x}",
+                "market": market,
+                "asset_id": f"{market}-{outcome}",
+                "side": "BUY" if rng.random() < 0.7 else "SELL",
+                "size": f"{size:.2f}",
+                "price": f"{rng.uniform(0.02, 0.98):.2f}",
+                "timestamp": now - rng.randint(0, max_age_days * 86400),
+                "maker": wallet,
+            })
+            holders[market][wallet] = holders[market].get(wallet, 0.0) + size
+
+    holder_responses = {
+        market: [{
+            "token": f"{market}-yes",
+            "holders": [
+                {"proxyWallet": wallet, "amount": round(amount, 2)}
+                for wallet, amount in sorted(by_wallet.items(), key=lambda item: -item[1])
+            ],
+        }]
+        for market, by_wallet in holders.items()
+    }
+    return {"trades": trades, "markets": market_objects, "holders": holder_responses}
+
+
+def load_fixture(path: str) -> Dict:
+    """Read a fixture written by record_fixture.py (or by hand)"""
+    with open(path) as f:
+        fixture = json.load(f)
+    fixture.setdefault("holders", {})
+    return fixture
+
+
+@dataclass
+class MockConfig:
+    # Added to every response: fixed part plus uniform jitter, in seconds
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Requests allowed per rate_window seconds before answering 429 (0 = unlimited)
+    rate_limit: int = 0
+    rate_window: float = 10.0
+    # Probability of answering any request with 429
+    throttle_probability: float = 0.0
+    retry_after: float = 0.0
+    seed: int = 1
+
+
+@dataclass
+class MockPolymarket:
+    """
+    Local stand-in for the Gamma and Data APIs.
+
+    Both APIs are served from one origin under their own prefixes, so a
+    client's GAMMA_API_BASE and DATA_API_BASE point at `gamma_url` and
+    `data_url` and it still routes each request to its own rate limiter and
+    circuit breaker. Trade timestamps
+    are shifted so the newest fixture trade is "now", keeping recorded
+    fixtures inside the analyzer's 7d/30d/90d windows.
+    """
+
+    fixture: Dict
+    config: MockConfig = field(default_factory=MockConfig)
+
+    def __post_init__(self):
+        shift = 0
+        timestamps = [trade["timestamp"] for trade in self.fixture["trades"]]
+        if timestamps:
+            shift = max(0, int(time.time()) - max(timestamps))
+        trades = [
+            {**trade, "timestamp": trade["timestamp"] + shift}
+            for trade in self.fixture["trades"]
+        ]
+        trades.sort(key=lambda trade: trade["timestamp"], reverse=True)
+
+        self.trades = trades
+        self.trades_by_maker: Dict[str, List[Dict]] = defaultdict(list)
+        for trade in trades:
+            self.trades_by_maker[(trade.get("maker") or "").lower()].append(trade)
+        self.markets = {
+            market.get("conditionId") or market.get("condition_id"): market
+            for market in self.fixture["markets"]
+        }
+        self.holders = self.fixture.get("holders", {})
+
+        self.requests: Counter = Counter()
+        self.throttled = 0
+        self._window: List[float] = []
+        self._rng = random.Random(self.config.seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+        self.gamma_url = ""
+        self.data_url = ""
+
+    def reset_counters(self):
+        self.requests.clear()
+        self.throttled = 0
+        self._window.clear()
+
+    @web.middleware
+    async def _upstream_behaviour(self, request: web.Request, handler):
+        """Count, delay and (maybe) throttle every request"""
+        route = request.match_info.route.resource
+        self.requests[route.canonical if route is not None else request.path] += 1
+
+        config = self.config
+        if config.latency or config.jitter:
+            await asyncio.sleep(config.latency + self._rng.uniform(0, config.jitter))
+
+        now = time.monotonic()
+        throttle = self._rng.random() < config.throttle_probability
+        if config.rate_limit:
+            self._window = [t for t in self._window if now - t < config.rate_window]
+            if len(self._window) >= config.rate_limit:
+                throttle = True
+            else:
+                self._window.append(now)
+        if throttle:
+            self.throttled += 1
+            return web.Response(status=429, headers={"Retry-After": f"{config.retry_after:g}"})
+
+        return await handler(request)
+
+    @staticmethod
+    def _page(items: List, request: web.Request) -> List:
+        limit = int(request.query.get("limit", 100))
+        offset = int(request.query.get("offset", 0))
+        return items[offset:offset + limit]
+
+    async def _trades(self, request: web.Request) -> web.Response:
+        query = request.query
+        trades = self.trades
+        if "maker" in query:
+            trades = self.trades_by_maker.get(query["maker"].lower(), [])
+        if "market" in query:
+            trades = [trade for trade in trades if trade["market"] == query["market"]]
+        start_ts = int(query.get("start_ts", 0))
+        end_ts = int(query.get("end_ts", 2**62))
+        trades = [trade for trade in trades if start_ts <= trade["timestamp"] <= end_ts]
+        return web.json_response(self._page(trades, request))
+
+    async def _activity(self, request: web.Request) -> web.Response:
+        user = request.query.get("user", "").lower()
+        events = [
+            {**trade, "type": "TRADE", "proxyWallet": trade["maker"]}
+            for trade in self.trades_by_maker.get(user, [])
+        ]
+        return web.json_response(self._page(events, request))
+
+    async def _markets(self, request: web.Request) -> web.Response:
+        markets = list(self.markets.values())
+        condition_ids = request.query.getall("condition_ids", [])
+        if condition_ids:
+            markets = [self.markets[cid] for cid in condition_ids if cid in self.markets]
+        for flag in ("active", "closed"):
+            if flag in request.query:
+                wanted = request.query[flag] == "true"
+                markets = [market for market in markets if bool(market.get(flag)) == wanted]
+        if "order" in request.query:
+            markets.sort(
+                key=lambda market: market.get(request.query["order"]) or 0,
+                reverse=request.query.get("ascending") != "true",
+            )
+        return web.json_response(self._page(markets, request))
+
+    async def _market(self, request: web.Request) -> web.Response:
+        market = self.markets.get(request.match_info["condition_id"])
+        if market is None:
+            return web.json_response({"error": "market not found"}, status=404)
+        return web.json_response(market)
+
+    async def _holders(self, request: web.Request) -> web.Response:
+        return web.json_response(self.holders.get(request.query.get("market"), []))
+
+    async def start(self) -> str:
+        """Start serving on a free local port; returns the base URL"""
+        app = web.Application(middlewares=[self._upstream_behaviour])
+        app.router.add_get(f"{GAMMA_PREFIX}/markets", self._markets)
+        app.router.add_get(f"{GAMMA_PREFIX}/markets/{{condition_id}}", self._market)
+        app.router.add_get(f"{DATA_PREFIX}/trades", self._trades)
+        app.router.add_get(f"{DATA_PREFIX}/activity", self._activity)
+        app.router.add_get(f"{DATA_PREFIX}/holders", self._holders)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.gamma_url = self.base_url + GAMMA_PREFIX
+        self.data_url = self.base_url + DATA_PREFIX
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def wallets(self) -> List[str]:
+        """Fixture wallets, most trades first"""
+        return sorted(
+            (wallet for wallet in self.trades_by_maker if wallet),
+            key=lambda wallet: -len(self.trades_by_maker[wallet]),
+        )
+
+    def wallet_with_history(self, trades: int) -> str:
+        """The wallet whose trade count is closest to `trades`"""
+        return min(self.wallets(), key=lambda wallet: abs(len(self.trades_by_maker[wallet]) - trades))
+
+    def request_summary(self) -> Tuple[int, Dict[str, int]]:
+        return sum(self.requests.values()), dict(self.requests)
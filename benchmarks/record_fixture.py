@@ -0,0 +1,77 @@
+"""
+Record a benchmark fixture from the live Polymarket APIs
+
+Downloads the trades of the given wallets, metadata for every market they
+traded, and holders of the most traded open markets, then writes them in the
+fixture format served by mock_polymarket.py. Needs network access; the
+benchmarks replaying the fixture do not.
+
+Usage:
+    python benchmarks/record_fixture.py 0xWallet1 0xWallet2 --output fixture.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import asdict
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from polymarket_client import PolymarketClient  # noqa: E402
+
+
+async def record(wallets, days: int, holder_markets: int) -> dict:
+    client = PolymarketClient(rate_limit_store="")
+    await client.start()
+    try:
+        end_ts = int(time.time())
+        start_ts = end_ts - days * 86400
+
+        trades = []
+        for wallet in wallets:
+            async for trade in client.iter_trades(maker=wallet, start_ts=start_ts, end_ts=end_ts):
+                raw = asdict(trade)
+                raw["id"] = raw.pop("trade_id")
+                trades.append(raw)
+            print(f"{wallet}: {sum(t['maker'] == wallet for t in trades)} trades")
+
+        open_markets = await client.get_markets(
+            limit=holder_markets, active=True, closed=False, order="volume24hr", ascending=False
+        )
+        holders = {}
+        for market in open_markets:
+            condition_id = client.market_condition_id(market)
+            if condition_id:
+                holders[condition_id] = await client.get_holders(condition_id)
+
+        traded = {trade["market"] for trade in trades if trade["market"]}
+        markets = await client.get_markets_by_ids(sorted(traded))
+        for market in open_markets:
+            condition_id = client.market_condition_id(market)
+            if condition_id:
+                markets.setdefault(condition_id, market)
+        print(f"{len(markets)} markets, holders for {len(holders)} markets")
+
+        return {"trades": trades, "markets": list(markets.values()), "holders": holders}
+    finally:
+        await client.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("wallets", nargs="+")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--holder-markets", type=int, default=20)
+    parser.add_argument("--output", default="fixture.json")
+    args = parser.parse_args()
+
+    fixture = await record(args.wallets, args.days, args.holder_markets)
+    with open(args.output, "w") as f:
+        json.dump(fixture, f)
+    print(f"Fixture written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
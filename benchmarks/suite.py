@@ -0,0 +1,303 @@
+"""
+Benchmark suite: analysis, ranking and HTTP endpoints against a mock Polymarket
+
+Runs every scenario offline against benchmarks/mock_polymarket.py and reports
+latency (median/p95), throughput and upstream requests per operation. Each
+iteration starts with a fresh client and analyzer, so caches are cold.
+
+The client's own rate limiter is lifted unless --real-rate-limit is given, so
+timings measure the pipeline rather than the 100 req/60s budget; use
+--mock-rate-limit / --throttle to exercise the 429 path instead.
+
+Usage:
+    python benchmarks/suite.py                      # synthetic fixture
+    python benchmarks/suite.py --fixture rec.json   # recorded fixture
+    python benchmarks/suite.py --check              # compare with baselines.json
+    python benchmarks/suite.py --update-baselines
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(CURRENT_DIR, "..", "backend"))
+
+# main.py reads its configuration at import time: no background tasks or
+# on-disk state, and rank inline so /api/top-wallets measures the ranking
+for _name, _value in (
+    ("TRADE_STORE_PATH", ""),
+    ("JOB_STORE_PATH", ""),
+    ("RATE_LIMIT_STORE", ""),
+    ("SHARED_CACHE_URL", ""),
+    ("LEADERBOARD_REFRESH_INTERVAL", "0"),
+    ("MARKET_PREFETCH_INTERVAL", "0"),
+):
+    os.environ[_name] = _value
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from mock_polymarket import MockConfig, MockPolymarket, load_fixture, make_fixture  # noqa: E402
+from polymarket_client import PolymarketClient  # noqa: E402
+from rate_limiter import TokenBucket  # noqa: E402
+from wallet_analyzer import WalletAnalyzer  # noqa: E402
+
+BASELINES_PATH = os.path.join(CURRENT_DIR, "baselines.json")
+
+# Per-request logs (and retry warnings under --throttle) would dominate the timings
+logging.getLogger().setLevel(logging.ERROR)
+
+
+class Suite:
+    """Scenario runner bound to one running mock server"""
+
+    def __init__(self, mock: MockPolymarket, iterations: int, real_rate_limit: bool):
+        self.mock = mock
+        self.iterations = iterations
+        self.real_rate_limit = real_rate_limit
+        self.results: Dict[str, Dict] = {}
+
+    def make_client(self) -> PolymarketClient:
+        client = PolymarketClient()
+        client.GAMMA_API_BASE = self.mock.gamma_url
+        client.DATA_API_BASE = self.mock.data_url
+        # Keep retries short so injected 429s cost milliseconds, not seconds
+        client.RETRY_BASE_DELAY = 0.01
+        client.RETRY_MAX_DELAY = 0.1
+        if not self.real_rate_limit:
+            client.gamma_limiter = TokenBucket(10**9, 1.0, burst=10**6)
+            client.data_limiter = TokenBucket(10**9, 1.0, burst=10**6)
+        return client
+
+    async def measure(
+        self,
+        name: str,
+        operation: Callable[[WalletAnalyzer], Awaitable[int]]
+    ):
+        """
+        Run operation `iterations` times, each with a fresh analyzer.
+
+        operation returns how many items (wallets) it handled, for throughput.
+        """
+        latencies: List[float] = []
+        items = 0
+        self.mock.reset_counters()
+
+        for _ in range(self.iterations):
+            client = self.make_client()
+            await client.start()
+            try:
+                analyzer = WalletAnalyzer(client)
+                started = time.perf_counter()
+                items += await operation(analyzer)
+                latencies.append(time.perf_counter() - started)
+            finally:
+                await client.close()
+
+        requests, _ = self.mock.request_summary()
+        total = sum(latencies)
+        result = {
+            "median_ms": round(statistics.median(latencies) * 1000, 2),
+            "p95_ms": round(sorted(latencies)[math.ceil(len(latencies) * 0.95) - 1] * 1000, 2),
+            "items_per_s": round(items / total, 2) if total else 0.0,
+            "requests_per_op": round(requests / self.iterations, 1),
+            "throttled_per_op": round(self.mock.throttled / self.iterations, 1),
+        }
+        self.results[name] = result
+        print(
+            f"{name:<38} {result['median_ms']:9.1f} {result['p95_ms']:9.1f} "
+            f"{result['items_per_s']:9.1f} {result['requests_per_op']:8.1f} "
+            f"{result['throttled_per_op']:7.1f}"
+        )
+
+
+async def run_scenarios(suite: Suite, wallet_counts: List[int], history_sizes: List[int]):
+    history_wallets = {}
+    for size in history_sizes:
+        wallet = suite.mock.wallet_with_history(size)
+        history_wallets[len(suite.mock.trades_by_maker[wallet])] = wallet
+    # Batches use the regular wallets, not the oversized histories
+    wallets = [wallet for wallet in suite.mock.wallets() if wallet not in history_wallets.values()]
+
+    for trades, wallet in sorted(history_wallets.items()):
+        async def analyze_one(analyzer: WalletAnalyzer, wallet=wallet) -> int:
+            await analyzer.analyze_wallet(wallet, "90d")
+            return 1
+
+        await suite.measure(f"analyze_wallet[{trades} trades, 90d]", analyze_one)
+
+    for count in sorted({min(count, len(wallets)) for count in wallet_counts}):
+        batch = wallets[:count]
+
+        async def analyze_many(analyzer: WalletAnalyzer, batch=batch) -> int:
+            return len(await analyzer.analyze_wallets(batch, "30d"))
+
+        await suite.measure(f"analyze_wallets[{len(batch)} wallets]", analyze_many)
+
+    async def rank(analyzer: WalletAnalyzer) -> int:
+        return len(await analyzer.rank_wallets("30d", limit=10, min_resolved_markets=1))
+
+    await suite.measure("rank_wallets[30d, limit 10]", rank)
+
+    async def rank_by_holders(analyzer: WalletAnalyzer) -> int:
+        analyzer.discovery = "holders"
+        return len(await analyzer.rank_wallets("30d", limit=10, min_resolved_markets=1))
+
+    await suite.measure("rank_wallets[holders, limit 10]", rank_by_holders)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        batch = wallets[:10]
+
+        async def post_analyze(analyzer: WalletAnalyzer) -> int:
+            main.wallet_analyzer = analyzer
+            response = await http.post(
+                "/api/analyze-wallets", json={"wallets": batch, "range": "30d"}
+            )
+            response.raise_for_status()
+            return len(response.json()["wallets"])
+
+        await suite.measure(f"POST /api/analyze-wallets[{len(batch)}]", post_analyze)
+
+        async def post_analyze_stream(analyzer: WalletAnalyzer) -> int:
+            main.wallet_analyzer = analyzer
+            events = 0
+            async with http.stream(
+                "POST", "/api/analyze-wallets?stream=ndjson",
+                json={"wallets": batch, "range": "30d"}
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    events += line.startswith('{"type": "wallet"')
+            return events
+
+        await suite.measure(f"POST /api/analyze-wallets?stream[{len(batch)}]", post_analyze_stream)
+
+        async def get_top(analyzer: WalletAnalyzer) -> int:
+            main.wallet_analyzer = analyzer
+            response = await http.get("/api/top-wallets", params={"range": "30d", "limit": 10})
+            response.raise_for_status()
+            return len(response.json()["wallets"])
+
+        await suite.measure("GET /api/top-wallets[30d, limit 10]", get_top)
+
+
+def check_baselines(results: Dict[str, Dict], baselines: Dict[str, Dict], tolerance: float) -> List[str]:
+    """
+    Regressions against stored baselines.
+
+    Median latency may grow by `tolerance` (a fraction) before it counts;
+    upstream requests per operation are deterministic for a fixture, so any
+    increase counts.
+    """
+    regressions = []
+    for name, baseline in baselines.items():
+        result = results.get(name)
+        if result is None:
+            continue
+        if result["median_ms"] > baseline["median_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: median {result['median_ms']:.1f}ms vs baseline {baseline['median_ms']:.1f}ms"
+            )
+        if result["requests_per_op"] > baseline["requests_per_op"]:
+            regressions.append(
+                f"{name}: {result['requests_per_op']} upstream requests/op "
+                f"vs baseline {baseline['requests_per_op']}"
+            )
+    return regressions
+
+
+async def run(args) -> int:
+    if args.fixture:
+        fixture = load_fixture(args.fixture)
+    else:
+        fixture = make_fixture(
+            wallets=max(args.wallets),
+            trades_per_wallet=args.trades_per_wallet,
+            markets=args.markets,
+            history_sizes=args.history_sizes,
+        )
+
+    mock = MockPolymarket(fixture, MockConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.mock_rate_limit,
+        throttle_probability=args.throttle,
+    ))
+    await mock.start()
+    print(
+        f"{len(mock.trades)} trades, {len(mock.markets)} markets, "
+        f"{args.iterations} iterations, latency {args.latency * 1000:.0f}ms"
+        f"{f' +{args.jitter * 1000:.0f}ms' if args.jitter else ''}"
+    )
+    print(f"{'scenario':<38} {'median ms':>9} {'p95 ms':>9} {'items/s':>9} {'reqs/op':>8} {'429/op':>7}")
+
+    suite = Suite(mock, args.iterations, args.real_rate_limit)
+    try:
+        await run_scenarios(suite, args.wallets, args.history_sizes)
+    finally:
+        await mock.stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(suite.results, f, indent=2, sort_keys=True)
+
+    if args.update_baselines:
+        with open(args.baselines, "w") as f:
+            json.dump(suite.results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baselines written to {args.baselines}")
+
+    if args.check:
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+        regressions = check_baselines(suite.results, baselines, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baselines}")
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixture", help="Recorded fixture JSON (default: synthetic)")
+    parser.add_argument(
+        "--wallets", type=lambda value: [int(v) for v in value.split(",")], default=[1, 5, 10],
+        help="Batch sizes for analyze_wallets, comma separated (largest = synthetic wallets)",
+    )
+    parser.add_argument(
+        "--history-sizes", type=lambda value: [int(v) for v in value.split(",")],
+        default=[100, 1000, 10000],
+        help="Trade counts of the single wallets timed by analyze_wallet, comma separated",
+    )
+    parser.add_argument("--trades-per-wallet", type=int, default=500)
+    parser.add_argument("--markets", type=int, default=60)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock response latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency (s)")
+    parser.add_argument("--mock-rate-limit", type=int, default=0,
+                        help="Requests per 10s the mock serves before answering 429")
+    parser.add_argument("--throttle", type=float, default=0.0,
+                        help="Probability of a random 429 per request")
+    parser.add_argument("--real-rate-limit", action="store_true",
+                        help="Keep the client's 100 req/60s token buckets")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument("--check", action="store_true", help="Fail on regressions against baselines")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed median latency growth for --check (fraction)")
+    parser.add_argument("--update-baselines", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
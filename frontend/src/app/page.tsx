@@ -1,7 +1,6 @@
 'use client'
 
 import { useState } from 'react'
-import axios from 'axios'
 import WalletInputForm from '@/components/WalletInputForm'
 import Leaderboard from '@/components/Leaderboard'
 import TopWalletsLeaderboard from '@/components/TopWalletsLeaderboard'
@@ -37,30 +36,68 @@ export interface AnalysisResponse {
   wallets: WalletAnalysis[]
 }
 
+export interface WalletFailure {
+  wallet: string
+  detail: string
+}
+
 export default function Home() {
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState<string | null>(null)
   const [results, setResults] = useState<AnalysisResponse | null>(null)
+  const [failures, setFailures] = useState<WalletFailure[]>([])
 
   const handleAnalyze = async (wallets: string[], range: string) => {
     setLoading(true)
     setError(null)
     setResults(null)
+    setFailures([])
 
     try {
       const apiUrl = process.env.NEXT_PUBLIC_API_BASE_URL || 'http://localhost:8000'
-      const response = await axios.post<AnalysisResponse>(
-        `${apiUrl}/api/analyze-wallets`,
-        {
-          wallets,
-          range,
+      const response = await fetch(`${apiUrl}/api/analyze-wallets?stream=ndjson`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ wallets, range }),
+      })
+      if (!response.ok || !response.body) {
+        const body = await response.json().catch(() => null)
+        throw new Error(body?.detail || `Request failed with status ${response.status}`)
+      }
+
+      // Show each wallet as soon as the backend finishes it; the final
+      // summary event replaces the partial list with the ranked response
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      const partial: WalletAnalysis[] = []
+      const failed: WalletFailure[] = []
+      let buffer = ''
+
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+
+        const lines = buffer.split('\n')
+        buffer = lines.pop() ?? ''
+        for (const line of lines) {
+          if (!line.trim()) continue
+          const event = JSON.parse(line)
+          if (event.type === 'wallet') {
+            partial.push(event.data)
+            partial.sort((a, b) => b.trader_score - a.trader_score)
+            setResults({ range, wallets: [...partial] })
+          } else if (event.type === 'error') {
+            failed.push(event.data)
+            setFailures([...failed])
+          } else if (event.type === 'summary') {
+            setResults(event.data)
+          }
         }
-      )
-      setResults(response.data)
+      }
     } catch (err: any) {
       console.error('Error analyzing wallets:', err)
-      const errorMessage = err.response?.data?.detail || err.message || 'Failed to analyze wallets'
-      setError(errorMessage)
+      setError(err.message || 'Failed to analyze wallets')
     } finally {
       setLoading(false)
     }
@@ -85,7 +122,7 @@ export default function Home() {
             <ul className="list-disc list-inside space-y-1">
               <li>Leaderboard pulls recent trades and ranks by trader score.</li>
               <li>Filters out low-activity or one-off lucky wallets.</li>
-              <li>Analyze panel reuses the classic /api/analyze-wallets endpoint.</li>
+              <li>Analyze panel streams /api/analyze-wallets results as each wallet finishes.</li>
             </ul>
           </div>
         </header>
@@ -105,7 +142,23 @@ export default function Home() {
           </div>
         )}
 
-        {results && !loading && (
+        {failures.length > 0 && (
+          <div className="card-panel rounded-2xl p-4 border border-amber-500/50 bg-amber-900/10 text-amber-100 text-sm">
+            <p className="font-semibold mb-2">
+              {failures.length} wallet{failures.length === 1 ? '' : 's'} could not be analyzed
+            </p>
+            <ul className="space-y-1">
+              {failures.map((failure) => (
+                <li key={failure.wallet}>
+                  <span style={{ fontFamily: 'var(--font-mono)' }}>{failure.wallet}</span>
+                  <span className="text-amber-100/70">: {failure.detail}</span>
+                </li>
+              ))}
+            </ul>
+          </div>
+        )}
+
+        {results && (
           <section className="space-y-4">
             <Leaderboard data={results} />
           </section>
@@ -27,6 +27,7 @@ const RANGE_OPTIONS: Array<{ value: '7d' | '30d' | '90d'; label: string }> = [
 export default function TopWalletsLeaderboard({ defaultRange = '30d', limit = 20 }: Props) {
   const [range, setRange] = useState<'7d' | '30d' | '90d'>(defaultRange)
   const [wallets, setWallets] = useState<TopWallet[]>([])
+  const [generatedAt, setGeneratedAt] = useState<string | null>(null)
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState<string | null>(null)
 
@@ -43,13 +44,18 @@ export default function TopWalletsLeaderboard({ defaultRange = '30d', limit = 20
       setLoading(true)
       setError(null)
       try {
-        const response = await axios.get<{ range: string; wallets: TopWallet[] }>(
+        const response = await axios.get<{
+          range: string
+          wallets: TopWallet[]
+          generated_at?: string | null
+        }>(
           `${apiUrl}/api/top-wallets`,
           {
             params: { range, limit },
           }
         )
         setWallets(response.data.wallets)
+        setGeneratedAt(response.data.generated_at ?? null)
       } catch (err: any) {
         const detail = err.response?.data?.detail || err.message || 'Failed to load top wallets'
         setError(detail)
@@ -72,6 +78,11 @@ export default function TopWalletsLeaderboard({ defaultRange = '30d', limit = 20
           <p className="text-sm text-foreground/70 mt-1">
             Ranked by trader score with ROI and hit rate tie-breakers.
           </p>
+          {generatedAt && (
+            <p className="text-xs text-foreground/50 mt-1">
+              Updated {new Date(generatedAt).toLocaleString()}
+            </p>
+          )}
         </div>
         <div className="flex gap-2 bg-panel/60 rounded-xl p-1 border border-border">
           {RANGE_OPTIONS.map(option => (
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+# Ensure backend modules are importable when running from repo root
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+# main.py reads its configuration at import time: no on-disk state or
+# background tasks in tests
+for _name, _value in (
+    ("TRADE_STORE_PATH", ""),
+    ("JOB_STORE_PATH", ""),
+    ("RATE_LIMIT_STORE", ""),
+    ("SHARED_CACHE_URL", ""),
+    ("LEADERBOARD_REFRESH_INTERVAL", "0"),
+    ("MARKET_PREFETCH_INTERVAL", "0"),
+):
+    os.environ[_name] = _value
+
+import main  # noqa: E402
+from job_queue import JobQueue  # noqa: E402
+from tracing import PyinstrumentProfiler  # noqa: E402
+
+try:
+    import httpx
+except ImportError:  # httpx is only needed to call the app in-process
+    httpx = None
+
+
+def make_analysis(wallet: str, trader_score: float) -> dict:
+    return {
+        "wallet": wallet,
+        "hit_rate": 0.5,
+        "roi": 0.1,
+        "realized_pnl": 10.0,
+        "total_volume_traded": 100.0,
+        "last_trade_time": None,
+        "trader_score": trader_score,
+        "resolved_markets": 2,
+        "profitable_markets": 1,
+        "markets": [],
+        "analyzed_at": "2026-01-01T00:00:00Z",
+    }
+
+
+class StubAnalyzer:
+    """Answers from fixed scores; wallets without one fail"""
+
+    def __init__(self, scores: dict):
+        self.scores = scores
+
+    async def analyze_wallets(self, wallet_addresses, time_range):
+        return [
+            make_analysis(wallet, self.scores[wallet])
+            for wallet in wallet_addresses
+            if wallet in self.scores
+        ]
+
+    async def iter_wallet_analyses(self, wallet_addresses, time_range):
+        for wallet in wallet_addresses:
+            try:
+                yield wallet, await self.analyze_wallet_shared(wallet, time_range), None
+            except RuntimeError as error:
+                yield wallet, None, error
+
+    async def analyze_wallet_shared(self, wallet_address, time_range):
+        await asyncio.sleep(0)
+        if wallet_address not in self.scores:
+            raise RuntimeError("no such wallet")
+        return make_analysis(wallet_address, self.scores[wallet_address])
+
+
+@unittest.skipUnless(httpx, "httpx not installed")
+class ApiTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.original_analyzer, self.original_job_queue = main.wallet_analyzer, main.job_queue
+        main.wallet_analyzer = StubAnalyzer({"0xa": 0.2, "0xb": 0.9})
+        main.job_queue = JobQueue(main.wallet_analyzer, ":memory:", poll_interval=0.01)
+        self.job_workers = asyncio.create_task(main.job_queue.run())
+        self.http = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.http.aclose()
+        self.job_workers.cancel()
+        await asyncio.gather(self.job_workers, return_exceptions=True)
+        main.job_queue.close()
+        main.wallet_analyzer, main.job_queue = self.original_analyzer, self.original_job_queue
+
+    async def test_analyze_wallets_answers_304_for_a_matching_etag(self):
+        body = {"wallets": ["0xa", "0xb"], "range": "30d"}
+
+        first = await self.http.post("/api/analyze-wallets", json=body)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([w["wallet"] for w in first.json()["wallets"]], ["0xb", "0xa"])
+        etag = first.headers["etag"]
+        self.assertEqual(first.headers["last-modified"], "Thu, 01 Jan 2026 00:00:00 GMT")
+
+        cached = await self.http.post("/api/analyze-wallets", json=body, headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.headers["etag"], etag)
+        self.assertEqual(cached.content, b"")
+
+        stale = await self.http.post("/api/analyze-wallets", json=body, headers={"If-None-Match": '"other"'})
+        self.assertEqual(stale.status_code, 200)
+
+        since = await self.http.post(
+            "/api/analyze-wallets", json=body,
+            headers={"If-Modified-Since": first.headers["last-modified"]},
+        )
+        self.assertEqual(since.status_code, 304)
+
+    async def test_streaming_sends_wallet_and_error_events_then_a_ranked_summary(self):
+        body = {"wallets": ["0xa", "0xmissing", "0xb"], "range": "30d"}
+
+        response = await self.http.post("/api/analyze-wallets?stream=ndjson", json=body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+        events = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(
+            [(event["type"], event["data"].get("wallet")) for event in events],
+            [("wallet", "0xa"), ("error", "0xmissing"), ("wallet", "0xb"), ("summary", None)],
+        )
+        self.assertEqual(events[1]["data"]["detail"], "no such wallet")
+        self.assertEqual([w["wallet"] for w in events[-1]["data"]["wallets"]], ["0xb", "0xa"])
+
+        sse = await self.http.post("/api/analyze-wallets?stream=sse", json=body)
+        self.assertTrue(sse.headers["content-type"].startswith("text/event-stream"))
+        self.assertEqual(
+            [line for line in sse.text.splitlines() if line.startswith("event:")],
+            ["event: wallet", "event: error", "event: wallet", "event: summary"],
+        )
+
+    async def test_debug_trace_is_attached_and_unknown_modes_are_rejected(self):
+        body = {"wallets": ["0xa", "0xb"], "range": "30d"}
+
+        traced = await self.http.post("/api/analyze-wallets?debug=trace", json=body)
+        self.assertEqual(traced.status_code, 200)
+        self.assertEqual(traced.json()["trace"]["trace_id"], traced.headers["x-trace-id"])
+        self.assertNotIn("etag", traced.headers)
+
+        unknown = await self.http.post("/api/analyze-wallets?debug=flamegraph", json=body)
+        self.assertEqual(unknown.status_code, 422)
+        if PyinstrumentProfiler is None:
+            missing = await self.http.post("/api/analyze-wallets?debug=pyinstrument", json=body)
+            self.assertEqual(missing.status_code, 400)
+
+    async def test_job_endpoints_submit_report_progress_and_cancel(self):
+        submitted = await self.http.post(
+            "/api/jobs", json={"wallets": ["0xa", " 0xb ", "0xa", "0xmissing"], "range": "7d"}
+        )
+        self.assertEqual(submitted.status_code, 202)
+        job_id = submitted.json()["job_id"]
+        self.assertEqual(submitted.json()["total"], 3)
+
+        for _ in range(200):
+            job = (await self.http.get(f"/api/jobs/{job_id}")).json()
+            if job["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(job["status"], "completed")
+        self.assertEqual((job["completed"], job["failed"], job["pending"]), (2, 1, 0))
+        self.assertEqual([w["wallet"] for w in job["wallets"]], ["0xb", "0xa"])
+        self.assertEqual(job["failures"], [{"wallet": "0xmissing", "detail": "no such wallet"}])
+
+        page = (await self.http.get(f"/api/jobs/{job_id}", params={"limit": 1, "offset": 1})).json()
+        self.assertEqual([w["wallet"] for w in page["wallets"]], ["0xa"])
+
+        # Finished jobs cannot be cancelled; their results stay available
+        cancelled = await self.http.delete(f"/api/jobs/{job_id}")
+        self.assertEqual(cancelled.json()["status"], "completed")
+
+        self.assertEqual((await self.http.get("/api/jobs/unknown")).status_code, 404)
+        self.assertEqual((await self.http.delete("/api/jobs/unknown")).status_code, 404)
+
+    async def test_job_submission_rejects_blank_wallet_lists(self):
+        response = await self.http.post("/api/jobs", json={"wallets": ["  ", ""], "range": "7d"})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(main.job_queue._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
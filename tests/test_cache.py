@@ -0,0 +1,166 @@
+import asyncio
+import os
+import sys
+import unittest
+
+# Ensure backend modules are importable when running from repo root
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+from cache import AsyncTTLCache, MemoryCacheBackend, RedisCacheBackend  # noqa: E402
+
+try:
+    import fakeredis
+except ImportError:  # fakeredis is only needed for the Redis backend test
+    fakeredis = None
+
+
+class AsyncTTLCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def test_evicts_least_recently_used(self):
+        cache = AsyncTTLCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.evictions, 1)
+
+    async def test_expired_entries_are_misses(self):
+        cache = AsyncTTLCache()
+        cache.set("open", {"resolved": False}, ttl=0.0)
+        cache.set("resolved", {"resolved": True}, ttl=None)
+
+        self.assertIsNone(cache.get("open"))
+        self.assertEqual(cache.get("resolved"), {"resolved": True})
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    async def test_concurrent_loads_are_coalesced(self):
+        cache = AsyncTTLCache()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"question": "Will it rain?"}
+
+        results = await asyncio.gather(
+            *(cache.get_or_load("m1", loader) for _ in range(5))
+        )
+
+        self.assertEqual(calls, 1)
+        self.assertTrue(all(r == {"question": "Will it rain?"} for r in results))
+        self.assertEqual(cache.coalesced, 4)
+
+        # Subsequent lookups are served from the cache
+        await cache.get_or_load("m1", loader)
+        self.assertEqual(calls, 1)
+
+    async def test_load_is_cancelled_with_its_last_waiter(self):
+        cache = AsyncTTLCache()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def loader():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        first = asyncio.ensure_future(cache.get_or_load("m1", loader))
+        second = asyncio.ensure_future(cache.get_or_load("m1", loader))
+        await started.wait()
+
+        first.cancel()
+        await asyncio.sleep(0)
+        self.assertFalse(cancelled.is_set())
+
+        second.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        await asyncio.sleep(0)
+        self.assertEqual(cache._in_flight, {})
+
+    async def test_caller_after_last_waiter_cancels_starts_a_new_load(self):
+        cache = AsyncTTLCache()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                await asyncio.sleep(10)
+            return {"question": "Will it rain?"}
+
+        first = asyncio.ensure_future(cache.get_or_load("m1", loader))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        first.cancel()
+        # Arrives before the cancelled load's done callback has run
+        second = asyncio.ensure_future(cache.get_or_load("m1", loader))
+
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.assertEqual(await second, {"question": "Will it rain?"})
+        self.assertEqual(calls, 2)
+        await asyncio.sleep(0)
+        self.assertEqual(cache._in_flight, {})
+
+    async def test_missing_values_are_not_cached(self):
+        cache = AsyncTTLCache()
+
+        async def loader():
+            return None
+
+        self.assertIsNone(await cache.get_or_load("missing", loader))
+        self.assertEqual(len(cache), 0)
+
+
+class SharedCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def test_workers_reuse_each_others_loads(self):
+        shared = MemoryCacheBackend()
+        worker_a = AsyncTTLCache(name="markets", shared=shared)
+        worker_b = AsyncTTLCache(name="markets", shared=shared)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            return {"question": "Will it rain?"}
+
+        await worker_a.get_or_load("m1", loader)
+        value = await worker_b.get_or_load("m1", loader)
+
+        self.assertEqual(calls, 1)
+        self.assertEqual(value, {"question": "Will it rain?"})
+        self.assertEqual(worker_b.shared_hits, 1)
+        # Now held locally by worker b as well
+        self.assertEqual(worker_b.get("m1"), value)
+
+    @unittest.skipUnless(fakeredis, "fakeredis not installed")
+    async def test_redis_backend_round_trip_and_expiry(self):
+        backend = RedisCacheBackend(fakeredis.FakeAsyncRedis())
+        cache = AsyncTTLCache(name="wallet_analyses", shared=backend)
+
+        await cache.set_many_shared([
+            (("0xabc", "7d"), {"roi": 0.5}, None),
+            (("0xabc", "30d"), {"roi": 0.1}, 0.05),
+        ])
+        other = AsyncTTLCache(name="wallet_analyses", shared=backend)
+        found = await other.get_many_shared([("0xabc", "7d"), ("0xabc", "30d"), ("0xdef", "7d")])
+        self.assertEqual(found, {("0xabc", "7d"): {"roi": 0.5}, ("0xabc", "30d"): {"roi": 0.1}})
+
+        await asyncio.sleep(0.1)
+        found = await AsyncTTLCache(name="wallet_analyses", shared=backend).get_many_shared(
+            [("0xabc", "30d")]
+        )
+        self.assertEqual(found, {})
+        await backend.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import random
+import sys
+import unittest
+from collections import Counter
+
+# Ensure backend modules are importable when running from repo root
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+from heavy_hitters import SpaceSaving  # noqa: E402
+
+
+class SpaceSavingTests(unittest.TestCase):
+    def test_exact_while_under_capacity(self):
+        sketch = SpaceSaving(capacity=10)
+        for key, weight in [("a", 5.0), ("b", 1.0), ("a", 2.0), ("c", 3.0)]:
+            sketch.add(key, weight)
+
+        top = sketch.top(2)
+
+        self.assertEqual([(h.key, h.weight, h.count) for h in top], [("a", 7.0, 2), ("c", 3.0, 1)])
+        self.assertEqual(top[0].error, 0.0)
+
+    def test_finds_heavy_keys_in_long_tail_with_bounded_memory(self):
+        rng = random.Random(3)
+        stream = [(f"heavy{i}", 50.0) for i in range(5) for _ in range(40)]
+        stream += [(f"tail{rng.randint(0, 5000)}", rng.uniform(0, 5)) for _ in range(20000)]
+        rng.shuffle(stream)
+
+        sketch = SpaceSaving(capacity=50)
+        truth = Counter()
+        for key, weight in stream:
+            sketch.add(key, weight)
+            truth[key] += weight
+
+        self.assertLessEqual(len(sketch), 50)
+        self.assertEqual(
+            {h.key for h in sketch.top(5)},
+            {key for key, _ in truth.most_common(5)},
+        )
+        for hitter in sketch.top(5):
+            # Estimates never undercount and overcount by at most the error
+            self.assertGreaterEqual(hitter.weight, truth[hitter.key] - 1e-6)
+            self.assertLessEqual(hitter.weight - hitter.error, truth[hitter.key] + 1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from typing import Dict, List
+
+# Ensure backend modules are importable when running from repo root
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+from job_queue import JobQueue  # noqa: E402
+from polymarket_client import UpstreamUnavailableError  # noqa: E402
+
+
+class ScriptedAnalyzer:
+    """Scores wallets by a fixed table and records every analysis."""
+
+    def __init__(self, scores: Dict[str, float]):
+        self.scores = scores
+        self.analyzed: List[str] = []
+        self.unavailable_once = set()
+
+    async def analyze_wallet_shared(self, wallet_address: str, time_range: str) -> Dict:
+        await asyncio.sleep(0)
+        if wallet_address in self.unavailable_once:
+            self.unavailable_once.discard(wallet_address)
+            raise UpstreamUnavailableError("data API unavailable", retry_after=0)
+        self.analyzed.append(wallet_address)
+        if wallet_address not in self.scores:
+            raise RuntimeError("no such wallet")
+        return {"wallet": wallet_address, "trader_score": self.scores[wallet_address]}
+
+
+class JobQueueTests(unittest.IsolatedAsyncioTestCase):
+    async def wait_for_status(self, queue: JobQueue, job_id: str, status: str) -> Dict:
+        for _ in range(200):
+            job = queue.get(job_id, limit=100)
+            if job["status"] == status:
+                return job
+            await asyncio.sleep(0.01)
+        self.fail(f"job never reached {status}: {job}")
+
+    async def test_job_runs_to_completion_with_ranked_results_and_failures(self):
+        analyzer = ScriptedAnalyzer({"0xa": 0.2, "0xb": 0.9, "0xc": 0.5})
+        analyzer.unavailable_once.add("0xc")
+        queue = JobQueue(analyzer, ":memory:", workers=2, poll_interval=0.01)
+
+        job = queue.submit(["0xa", "0xb", "0xa", "0xmissing", "0xc"], "30d")
+        self.assertEqual((job["status"], job["total"], job["pending"]), ("queued", 4, 4))
+
+        worker = asyncio.create_task(queue.run())
+        try:
+            job = await self.wait_for_status(queue, job["job_id"], "completed")
+        finally:
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+
+        self.assertEqual((job["completed"], job["failed"], job["pending"]), (3, 1, 0))
+        self.assertEqual([w["wallet"] for w in job["wallets"]], ["0xb", "0xc", "0xa"])
+        self.assertEqual(job["failures"], [{"wallet": "0xmissing", "detail": "no such wallet"}])
+        # The upstream outage was retried rather than recorded as a failure
+        self.assertEqual(analyzer.analyzed.count("0xc"), 1)
+
+        page = queue.get(job["job_id"], offset=1, limit=1)
+        self.assertEqual([w["wallet"] for w in page["wallets"]], ["0xc"])
+
+    async def test_rejects_wallet_lists_that_are_blank_after_stripping(self):
+        queue = JobQueue(ScriptedAnalyzer({}), ":memory:")
+
+        with self.assertRaises(ValueError):
+            queue.submit(["  ", ""], "7d")
+        self.assertEqual(queue._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0], 0)
+
+    async def test_jobs_survive_restart_and_cancel_skips_pending_wallets(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "jobs.db")
+            analyzer = ScriptedAnalyzer({"0xa": 0.1, "0xb": 0.2, "0xc": 0.3})
+
+            queue = JobQueue(analyzer, path)
+            kept = queue.submit(["0xa", "0xb"], "7d")["job_id"]
+            cancelled = queue.submit(["0xc"], "7d")["job_id"]
+            # A wallet claimed by a worker that died before finishing it
+            self.assertIsNotNone(queue._claim())
+            queue.close()
+
+            restarted = JobQueue(analyzer, path, poll_interval=0.01, lease_timeout=0)
+            self.assertEqual(restarted.cancel(cancelled)["status"], "cancelled")
+
+            worker = asyncio.create_task(restarted.run())
+            try:
+                job = await self.wait_for_status(restarted, kept, "completed")
+            finally:
+                worker.cancel()
+                await asyncio.gather(worker, return_exceptions=True)
+                restarted.close()
+
+            self.assertEqual([w["wallet"] for w in job["wallets"]], ["0xb", "0xa"])
+            self.assertNotIn("0xc", analyzer.analyzed)
+
+
+if __name__ == "__main__":
+    unittest.main()
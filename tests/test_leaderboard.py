@@ -0,0 +1,100 @@
+import asyncio
+import os
+import sys
+import unittest
+from typing import Dict, List
+
+# Ensure backend modules are importable when running from repo root
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+from cache import MemoryCacheBackend  # noqa: E402
+from leaderboard import Leaderboard  # noqa: E402
+
+
+class CountingAnalyzer:
+    """Ranks a fixed list of wallets and counts ranking runs."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def rank_wallets(self, time_range: str, limit: int, offset: int) -> List[Dict]:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return [{"wallet": f"0x{i}", "range": time_range} for i in range(limit)]
+
+    async def rank_wallets_windows(self, time_ranges, limit: int) -> Dict[str, List[Dict]]:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {
+            time_range: [{"wallet": f"0x{i}", "range": time_range} for i in range(limit)]
+            for time_range in time_ranges
+        }
+
+
+class LeaderboardTests(unittest.IsolatedAsyncioTestCase):
+    async def test_pages_are_served_from_one_snapshot(self):
+        analyzer = CountingAnalyzer()
+        leaderboard = Leaderboard(analyzer, size=30)
+
+        first = await leaderboard.get_page("7d", limit=10, offset=0)
+        second = await leaderboard.get_page("7d", limit=10, offset=10)
+
+        self.assertEqual(analyzer.calls, 1)
+        self.assertEqual(first[0], second[0])
+        self.assertEqual([w["wallet"] for w in second[1]], [f"0x{i}" for i in range(10, 20)])
+
+    async def test_concurrent_first_requests_share_one_refresh(self):
+        analyzer = CountingAnalyzer()
+        leaderboard = Leaderboard(analyzer, size=5)
+
+        await asyncio.gather(
+            *(leaderboard.get_page("30d", limit=5, offset=0) for _ in range(4))
+        )
+
+        self.assertEqual(analyzer.calls, 1)
+        self.assertIsNone(leaderboard.snapshot("90d"))
+
+    async def test_refresh_all_publishes_every_range_from_one_pass(self):
+        analyzer = CountingAnalyzer()
+        leaderboard = Leaderboard(analyzer, size=3)
+
+        await leaderboard.refresh_all()
+        generated_at, wallets = await leaderboard.get_page("90d", limit=3, offset=0)
+
+        self.assertEqual(analyzer.calls, 1)
+        self.assertEqual(wallets[0]["range"], "90d")
+        self.assertEqual(leaderboard.snapshot("7d")["generated_at"], generated_at)
+
+    async def test_first_requests_wait_for_the_running_full_refresh(self):
+        analyzer = CountingAnalyzer()
+        leaderboard = Leaderboard(analyzer, size=3)
+
+        refresh = asyncio.ensure_future(leaderboard.refresh_all())
+        await asyncio.sleep(0)
+        pages = await asyncio.gather(
+            *(leaderboard.get_page(time_range, limit=3, offset=0) for time_range in ("7d", "90d"))
+        )
+        await refresh
+
+        self.assertEqual(analyzer.calls, 1)
+        self.assertEqual([wallets[0]["range"] for _, wallets in pages], ["7d", "90d"])
+        self.assertEqual(leaderboard._refreshing, {})
+
+    async def test_workers_serve_the_snapshots_published_by_the_refreshing_worker(self):
+        shared = MemoryCacheBackend()
+        refreshing = Leaderboard(CountingAnalyzer(), size=3, shared=shared)
+        follower_analyzer = CountingAnalyzer()
+        follower = Leaderboard(follower_analyzer, size=3, shared=shared)
+
+        await refreshing.refresh_all()
+        generated_at, wallets = await follower.get_page("30d", limit=2, offset=0)
+
+        self.assertEqual(follower_analyzer.calls, 0)
+        self.assertEqual(generated_at, refreshing.snapshot("30d")["generated_at"])
+        self.assertEqual([w["wallet"] for w in wallets], ["0x0", "0x1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import sys
+import unittest
+
+# Ensure backend modules are importable when running from repo root
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+from metrics import STAGE_SECONDS, Registry, timed_stage  # noqa: E402
+
+
+class RegistryTests(unittest.TestCase):
+    def test_renders_counters_and_cumulative_histogram_buckets(self):
+        registry = Registry()
+        requests = registry.counter("requests_total", "Requests", ("endpoint", "status"))
+        latency = registry.histogram("latency_seconds", "Latency", ("endpoint",), buckets=(0.1, 1.0))
+
+        requests.inc(endpoint="/trades", status="200")
+        requests.inc(2, endpoint="/trades", status="429")
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, endpoint='/a"b')
+
+        lines = registry.render().splitlines()
+
+        self.assertIn("# TYPE requests_total counter", lines)
+        self.assertIn('requests_total{endpoint="/trades",status="200"} 1', lines)
+        self.assertIn('requests_total{endpoint="/trades",status="429"} 2', lines)
+        self.assertIn('latency_seconds_bucket{endpoint="/a\\"b",le="0.1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{endpoint="/a\\"b",le="1"} 3', lines)
+        self.assertIn('latency_seconds_bucket{endpoint="/a\\"b",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_sum{endpoint="/a\\"b"} 3.65', lines)
+        self.assertIn('latency_seconds_count{endpoint="/a\\"b"} 4', lines)
+
+    def test_rejects_wrong_labels_and_duplicate_names(self):
+        registry = Registry()
+        counter = registry.counter("events_total", "Events", ("kind",))
+
+        with self.assertRaises(ValueError):
+            counter.inc(other="x")
+        with self.assertRaises(ValueError):
+            registry.counter("events_total", "Events again")
+
+
+class TimedStageTests(unittest.IsolatedAsyncioTestCase):
+    async def test_times_sync_and_async_functions(self):
+        @timed_stage("test_sync")
+        def compute(x):
+            return x * 2
+
+        @timed_stage("test_async")
+        async def fetch(x):
+            await asyncio.sleep(0.01)
+            return x + 1
+
+        self.assertEqual(compute(2), 4)
+        self.assertEqual(await fetch(2), 3)
+
+        self.assertEqual(STAGE_SECONDS.count(stage="test_sync"), 1)
+        self.assertEqual(STAGE_SECONDS.count(stage="test_async"), 1)
+        self.assertGreaterEqual(STAGE_SECONDS.total(stage="test_async"), 0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,247 @@
+import os
+import sys
+import unittest
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# Ensure backend modules are importable when running from repo root
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+from metrics import UPSTREAM_REQUESTS, UPSTREAM_THROTTLED  # noqa: E402
+from polymarket_client import PolymarketClient, Trade, UpstreamUnavailableError  # noqa: E402
+
+
+class ListingPolymarketClient(PolymarketClient):
+    """Client whose Gamma listing is served from memory."""
+
+    def __init__(self, markets: List[Dict]):
+        super().__init__()
+        self.markets = markets
+        self.listing_calls: List[Dict] = []
+
+    async def get_markets(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        active: Optional[bool] = None,
+        closed: Optional[bool] = None,
+        condition_ids: Optional[List[str]] = None,
+        order: Optional[str] = None,
+        ascending: Optional[bool] = None,
+    ) -> List[Dict]:
+        self.listing_calls.append({"offset": offset, "condition_ids": condition_ids, "order": order})
+        markets = self.markets
+        if condition_ids is not None:
+            markets = [m for m in markets if m["conditionId"] in condition_ids]
+        return markets[offset:offset + limit]
+
+    async def _fetch_market(self, condition_id: str) -> Optional[Dict]:
+        raise AssertionError("point query should not be needed")
+
+
+def make_markets(count: int) -> List[Dict]:
+    return [
+        {"conditionId": f"0x{i}", "question": f"Market {i}", "resolved": i % 2 == 0}
+        for i in range(count)
+    ]
+
+
+class MarketPrefetchTests(unittest.IsolatedAsyncioTestCase):
+    async def test_prefetch_pages_listing_into_cache(self):
+        client = ListingPolymarketClient(make_markets(25))
+
+        cached = await client.prefetch_markets(page_size=10)
+
+        self.assertEqual(cached, 25)
+        self.assertEqual([c["offset"] for c in client.listing_calls], [0, 10, 20])
+        self.assertEqual(client.listing_calls[0]["order"], "volume24hr")
+        market = await client.get_market_by_id("0x7")
+        self.assertEqual(market["question"], "Market 7")
+
+    async def test_prefetch_cannot_evict_resolved_markets(self):
+        class SmallCacheClient(ListingPolymarketClient):
+            MARKET_CACHE_SIZE = 40
+            PREFETCH_PAGE_SIZE = 5
+            PREFETCH_MAX_PAGES = 2
+
+        open_markets = [
+            {"conditionId": f"0xopen{i}", "question": f"Open {i}", "resolved": False}
+            for i in range(100)
+        ]
+        client = SmallCacheClient(open_markets)
+        client.cache_markets(make_markets(60)[::2])
+
+        cached = await client.prefetch_markets()
+
+        self.assertEqual(cached, 10)
+        self.assertEqual(client.market_cache.evictions, 0)
+        self.assertEqual(client.cached_market("0x0")["question"], "Market 0")
+
+    async def test_bulk_lookup_batches_misses_and_reuses_cache(self):
+        client = ListingPolymarketClient(make_markets(30))
+        client.cache_markets(make_markets(5))
+
+        found = await client.get_markets_by_ids(
+            [f"0x{i}" for i in range(30)] + ["0xunknown"], batch_size=10
+        )
+
+        self.assertEqual(len(found), 30)
+        # 25 uncached ids plus one unknown id -> 3 batches of at most 10
+        self.assertEqual(len(client.listing_calls), 3)
+        self.assertNotIn("0x0", client.listing_calls[0]["condition_ids"])
+
+
+class RateBudgetTests(unittest.TestCase):
+    def test_both_apis_share_one_per_ip_budget(self):
+        client = PolymarketClient()
+        gamma, data = client.gamma_limiter, client.data_limiter
+
+        self.assertEqual(gamma.max_requests + data.max_requests, PolymarketClient.RATE_LIMIT_REQUESTS)
+        self.assertEqual(gamma.capacity + data.capacity, PolymarketClient.RATE_LIMIT_BURST)
+        self.assertLess(gamma.max_requests, data.max_requests)
+
+
+class PagedTradesClient(PolymarketClient):
+    """Client whose /trades endpoint is served from memory."""
+
+    def __init__(self, trades: List[Dict]):
+        super().__init__()
+        self.trades = [Trade.from_api(trade) for trade in trades]
+        self.offsets: List[int] = []
+
+    async def get_trades(
+        self,
+        market: Optional[str] = None,
+        maker: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+    ) -> List[Trade]:
+        self.offsets.append(offset)
+        return self.trades[offset:offset + limit]
+
+
+class TradePaginationTests(unittest.IsolatedAsyncioTestCase):
+    async def test_iter_trades_reads_past_the_first_page(self):
+        client = PagedTradesClient([{"id": str(i)} for i in range(25)])
+
+        trades = [trade async for trade in client.iter_trades(maker="0xabc", page_size=10)]
+
+        self.assertEqual([t.trade_id for t in trades], [str(i) for i in range(25)])
+        self.assertEqual(client.offsets, [0, 10, 20])
+
+    async def test_iter_trades_respects_max_pages(self):
+        client = PagedTradesClient([{"id": str(i)} for i in range(25)])
+
+        trades = [
+            trade async for trade in client.iter_trades(page_size=10, max_pages=2)
+        ]
+
+        self.assertEqual(len(trades), 20)
+        self.assertEqual(client.offsets, [0, 10])
+
+
+class TradeRecordTests(unittest.TestCase):
+    def test_from_api_parses_numbers_and_drops_unused_fields(self):
+        trade = Trade.from_api({
+            "id": "t1",
+            "condition_id": "0xm1",
+            "asset_id": "yes",
+            "side": "BUY",
+            "size": "12.5",
+            "price": "0.25",
+            "timestamp": 1700000000,
+            "maker": "0xW",
+            "taker": "0xT",
+            "title": "Will it rain?",
+        })
+
+        self.assertEqual(trade.market, "0xm1")
+        self.assertEqual((trade.size, trade.price), (12.5, 0.25))
+        self.assertEqual(trade.trade_id, "t1")
+        self.assertFalse(hasattr(trade, "__dict__"))
+
+    def test_missing_price_is_kept_as_none(self):
+        trade = Trade.from_api({"market": "0xm1", "side": "SELL", "size": "3"})
+
+        self.assertIsNone(trade.price)
+        self.assertEqual(trade.asset_id, "")
+
+
+class ScriptedUpstreamTests(unittest.IsolatedAsyncioTestCase):
+    """Runs the real client against a local server answering from a script."""
+
+    async def start(
+        self, statuses: List[int], retry_after: Optional[str] = None, html: Optional[str] = None
+    ) -> PolymarketClient:
+        self.requests = 0
+
+        async def trades(request: web.Request) -> web.Response:
+            self.requests += 1
+            status = statuses[min(self.requests, len(statuses)) - 1]
+            if status != 200:
+                headers = {"Retry-After": retry_after} if retry_after else None
+                return web.Response(status=status, headers=headers)
+            if html is not None:
+                return web.Response(text=html, content_type="text/html")
+            return web.json_response([{"market": "m1", "size": "1", "price": "0.5"}])
+
+        app = web.Application()
+        app.router.add_get("/trades", trades)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+
+        client = PolymarketClient()
+        client.DATA_API_BASE = str(server.make_url("")).rstrip("/")
+        client.RETRY_BASE_DELAY = 0.01
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_429_is_retried_and_slows_the_limiter(self):
+        client = await self.start([429, 503, 200], retry_after="0")
+        throttled = UPSTREAM_THROTTLED.value(api="data", endpoint="/trades")
+        succeeded = UPSTREAM_REQUESTS.value(api="data", endpoint="/trades", status="200")
+
+        trades = await client.get_trades(maker="0xW")
+
+        self.assertEqual(len(trades), 1)
+        self.assertEqual(self.requests, 3)
+        self.assertLess(client.data_limiter.refill_rate, client.data_limiter.nominal_rate)
+        self.assertEqual(client.data_breaker.state, "closed")
+        self.assertEqual(UPSTREAM_THROTTLED.value(api="data", endpoint="/trades"), throttled + 1)
+        self.assertEqual(
+            UPSTREAM_REQUESTS.value(api="data", endpoint="/trades", status="200"), succeeded + 1
+        )
+
+    async def test_outage_raises_instead_of_returning_no_trades(self):
+        client = await self.start([503])
+        client.MAX_RETRIES = 2
+        client.data_breaker.failure_threshold = 3
+
+        with self.assertRaises(UpstreamUnavailableError):
+            await client.get_trades(maker="0xW")
+        self.assertEqual(self.requests, 3)
+
+        # Circuit is open now: fail fast without contacting the upstream
+        with self.assertRaises(UpstreamUnavailableError):
+            await client.get_trades(maker="0xW")
+        self.assertEqual(self.requests, 3)
+
+    async def test_non_json_body_is_a_bad_response_not_a_crash(self):
+        client = await self.start([200], html="<html>Service error</html>")
+
+        with self.assertRaises(aiohttp.ContentTypeError):
+            await client._get(f"{client.DATA_API_BASE}/trades")
+        self.assertEqual(self.requests, 1)
+        self.assertEqual(client.data_breaker.state, "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
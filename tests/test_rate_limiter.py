@@ -0,0 +1,139 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# Ensure backend modules are importable when running from repo root
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+from rate_limiter import FileTokenBucket, RedisTokenBucket, TokenBucket, fcntl  # noqa: E402
+
+try:
+    import fakeredis
+    import lupa  # noqa: F401 - fakeredis needs it for Lua scripts
+except ImportError:
+    fakeredis = None
+
+
+class TokenBucketTests(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_is_served_without_waiting(self):
+        bucket = TokenBucket(max_requests=100, period=60.0, burst=5)
+
+        started = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+
+        self.assertLess(time.monotonic() - started, 0.05)
+        self.assertLess(bucket.tokens, 1.0)
+
+    async def test_waits_for_refill_once_burst_is_spent(self):
+        # 20 requests per second after the burst of 10
+        bucket = TokenBucket(max_requests=30, period=1.0, burst=10)
+        for _ in range(10):
+            await bucket.acquire()
+
+        waited = await bucket.acquire()
+
+        self.assertGreater(waited, 0.03)
+
+    def test_rejects_burst_larger_than_budget(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(max_requests=10, period=60.0, burst=10)
+
+
+class SharedTokenBucketTests(unittest.IsolatedAsyncioTestCase):
+    @unittest.skipUnless(fcntl, "fcntl not available")
+    async def test_file_buckets_share_one_budget(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.bucket")
+            # Two instances stand in for two worker processes
+            worker_a = FileTokenBucket(path, max_requests=15, period=1.0, burst=5)
+            worker_b = FileTokenBucket(path, max_requests=15, period=1.0, burst=5)
+
+            for _ in range(3):
+                await worker_a.acquire()
+            for _ in range(2):
+                await worker_b.acquire()
+
+            self.assertLess(await worker_a.available(), 1.0)
+            waited = await worker_a.acquire()
+            self.assertGreater(waited, 0.02)
+
+            await worker_a.close()
+            await worker_b.close()
+
+    @unittest.skipUnless(fcntl, "fcntl not available")
+    async def test_file_buckets_share_backoff(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.bucket")
+            worker_a = FileTokenBucket(path, max_requests=15, period=1.0, burst=5)
+            worker_b = FileTokenBucket(path, max_requests=15, period=1.0, burst=5)
+
+            await worker_a.slow_down()
+            await worker_b.acquire()
+            self.assertEqual(worker_b.refill_rate, worker_b.nominal_rate / 2)
+
+            await worker_b.speed_up()
+            await worker_a.acquire()
+            self.assertAlmostEqual(worker_a.refill_rate, worker_a.nominal_rate * 0.55)
+
+            await worker_a.close()
+            await worker_b.close()
+
+    @unittest.skipUnless(fcntl, "fcntl not available")
+    async def test_stored_rate_is_clamped_to_nominal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.bucket")
+            # State left behind by a run with a larger budget
+            with open(path, "wb") as f:
+                f.write(FileTokenBucket._STATE.pack(0.0, time.time(), 1.5))
+
+            bucket = FileTokenBucket(path, max_requests=27, period=60.0, burst=3)
+            await bucket.available()
+            self.assertAlmostEqual(bucket.refill_rate, bucket.nominal_rate)
+
+            with open(path, "wb") as f:
+                f.write(FileTokenBucket._STATE.pack(0.0, time.time(), 0.0))
+            await bucket.available()
+            self.assertAlmostEqual(bucket.refill_rate, bucket.nominal_rate * TokenBucket.MIN_RATE_FACTOR)
+
+            await bucket.close()
+
+    @unittest.skipUnless(fakeredis, "fakeredis with Lua support not installed")
+    async def test_redis_buckets_share_one_budget(self):
+        server = fakeredis.FakeServer()
+        worker_a = RedisTokenBucket(
+            fakeredis.FakeAsyncRedis(server=server), "bucket", max_requests=15, period=1.0, burst=5
+        )
+        worker_b = RedisTokenBucket(
+            fakeredis.FakeAsyncRedis(server=server), "bucket", max_requests=15, period=1.0, burst=5
+        )
+
+        for _ in range(5):
+            await worker_a.acquire()
+
+        self.assertLess(await worker_b.available(), 1.0)
+        waited = await worker_b.acquire()
+        self.assertGreater(waited, 0.02)
+        stats = await worker_b.stats()
+        self.assertEqual((stats["backend"], stats["capacity"]), ("redis", 5.0))
+
+        await worker_a.slow_down()
+        await worker_b.available()
+        self.assertEqual(worker_b.refill_rate, worker_b.nominal_rate / 2)
+
+    @unittest.skipUnless(fakeredis, "fakeredis with Lua support not installed")
+    async def test_redis_stored_rate_is_clamped_to_nominal(self):
+        client = fakeredis.FakeAsyncRedis()
+        await client.hset("bucket", mapping={"tokens": 0, "updated": time.time(), "rate": 1.5})
+        bucket = RedisTokenBucket(client, "bucket", max_requests=27, period=60.0, burst=3)
+
+        await bucket.available()
+        self.assertAlmostEqual(bucket.refill_rate, bucket.nominal_rate)
+
+
+if __name__ == "__main__":
+    unittest.main()
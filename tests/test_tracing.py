@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+# Ensure backend modules are importable when running from repo root
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+from tracing import Trace, annotate, run_traced, span  # noqa: E402
+
+
+class TracingTests(unittest.IsolatedAsyncioTestCase):
+    async def test_spans_are_shared_no_ops_outside_a_trace(self):
+        first = span("upstream", url="/trades")
+        second = span("wallet", wallet="0xabc")
+
+        self.assertIs(first, second)
+        with first:
+            annotate(status=200)
+
+    async def test_spans_from_gathered_tasks_nest_under_their_parent(self):
+        async def analyze(wallet: str, delay: float):
+            with span("wallet", wallet=wallet):
+                await asyncio.sleep(delay)
+                with span("upstream", endpoint="/trades"):
+                    annotate(status=200)
+
+        with Trace("analyze_wallets") as trace:
+            with span("batch"):
+                await asyncio.gather(analyze("0xfast", 0), analyze("0xslow", 0.02))
+
+        report = trace.to_dict()
+        batch = report["spans"]["children"][0]
+        self.assertEqual(batch["name"], "batch")
+        self.assertEqual(
+            sorted(child["attrs"]["wallet"] for child in batch["children"]),
+            ["0xfast", "0xslow"],
+        )
+        self.assertEqual(batch["children"][0]["children"][0]["attrs"], {"endpoint": "/trades", "status": 200})
+        self.assertEqual([w["wallet"] for w in report["slowest_wallets"]], ["0xslow", "0xfast"])
+        self.assertEqual(len(report["slowest_upstream_calls"]), 2)
+
+    async def test_run_traced_writes_cprofile_report_to_trace_dir(self):
+        async def work():
+            with span("calculate_metrics"):
+                return sum(i * i for i in range(10000))
+
+        with tempfile.TemporaryDirectory() as trace_dir:
+            result, report = await run_traced(work, "cprofile", "analyze", trace_dir, wallets=1)
+
+            self.assertEqual(result, sum(i * i for i in range(10000)))
+            self.assertEqual(report["spans"]["attrs"], {"wallets": 1})
+            self.assertEqual(report["spans"]["children"][0]["name"], "calculate_metrics")
+            self.assertTrue(report["profile"])
+            self.assertIn("cpu_ms_cumulative", report["profile"][0])
+            self.assertEqual(
+                sorted(os.listdir(trace_dir)),
+                [f"{report['trace_id']}.json", f"{report['trace_id']}.prof"],
+            )
+
+    async def test_run_traced_rejects_unknown_modes(self):
+        async def work():
+            return None
+
+        with self.assertRaises(ValueError):
+            await run_traced(work, "flamegraph", "analyze")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import random
+import sys
+import unittest
+from typing import AsyncIterator, Dict, List
+
+# Ensure backend modules are importable when running from repo root
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+from polymarket_client import Trade  # noqa: E402
+from trade_metrics import TradeColumns, WindowedAggregates  # noqa: E402
+
+
+async def iterate(items: List[Dict]) -> AsyncIterator[Trade]:
+    for item in items:
+        yield Trade.from_api(item)
+
+
+class TradeColumnsTests(unittest.IsolatedAsyncioTestCase):
+    async def test_aggregates_per_market_totals(self):
+        trades = [
+            {"market": "m1", "asset_id": "yes", "side": "BUY", "size": "10", "price": "0.4",
+             "timestamp": 100, "maker": "0xW"},
+            {"market": "m1", "asset_id": "yes", "side": "SELL", "size": "4", "price": "0.5",
+             "timestamp": 300},
+            {"market": "m2", "asset_id": "no", "side": "BUY", "size": "5", "price": "0.2",
+             "timestamp": 200},
+            # No market: only counts towards wallet volume (price defaults to 1.0)
+            {"side": "BUY", "size": "3", "timestamp": 50},
+        ]
+
+        columns = await TradeColumns.from_trades(iterate(trades))
+        markets, summary = columns.aggregate()
+
+        self.assertEqual(list(markets), ["m1", "m2"])
+        m1 = markets["m1"]
+        self.assertAlmostEqual(m1["total_stake"], 10 * 0.4 + 4)
+        self.assertAlmostEqual(m1["cash_flow"], -4.0 + 2.0)
+        self.assertAlmostEqual(m1["positions"]["yes"], 6.0)
+        self.assertAlmostEqual(m1["weighted_price_sum"] / m1["buy_size"], 0.4)
+        self.assertEqual(m1["last_timestamp"], 300)
+
+        self.assertEqual(summary["trade_count"], 4)
+        self.assertAlmostEqual(summary["total_volume"], 4.0 + 2.0 + 1.0 + 3.0)
+        self.assertEqual(summary["last_timestamp"], 300)
+        self.assertEqual(summary["maker"], "0xW")
+
+    async def test_empty_history(self):
+        columns = await TradeColumns.from_trades(iterate([]))
+        markets, summary = columns.aggregate()
+
+        self.assertEqual(markets, {})
+        self.assertEqual(summary["total_volume"], 0.0)
+        self.assertIsNone(summary["last_timestamp"])
+
+
+class WindowedAggregatesTests(unittest.IsolatedAsyncioTestCase):
+    async def test_windows_match_separate_aggregation(self):
+        rng = random.Random(7)
+        end_ts = 10_000_000
+        day = 86400
+        trades = [
+            {
+                "market": f"m{rng.randint(0, 9)}",
+                "asset_id": rng.choice(["yes", "no"]),
+                "side": rng.choice(["BUY", "SELL"]),
+                "size": str(rng.randint(1, 50)),
+                "price": str(rng.randint(1, 99) / 100),
+                "timestamp": end_ts - rng.randint(0, 90 * day),
+                "maker": "0xW",
+            }
+            for _ in range(400)
+        ]
+        trades.sort(key=lambda t: t["timestamp"], reverse=True)
+
+        columns = await TradeColumns.from_trades(iterate(trades))
+        windows = WindowedAggregates(columns, end_ts, 90 * day, windows=(7 * day, 30 * day))
+
+        for days in (7, 30, 90):
+            recent = [t for t in trades if t["timestamp"] >= end_ts - days * day]
+            expected_markets, expected_summary = (
+                await TradeColumns.from_trades(iterate(recent))
+            ).aggregate()
+            markets, summary = windows.window(days * day)
+
+            self.assertEqual(list(markets), list(expected_markets))
+            self.assertEqual(summary["trade_count"], expected_summary["trade_count"])
+            self.assertAlmostEqual(summary["total_volume"], expected_summary["total_volume"])
+            for market_id, expected in expected_markets.items():
+                actual = markets[market_id]
+                self.assertEqual(actual["trade_count"], expected["trade_count"])
+                self.assertEqual(actual["last_timestamp"], expected["last_timestamp"])
+                self.assertEqual(set(actual["positions"]), set(expected["positions"]))
+                for field in ("total_stake", "cash_flow", "buy_size", "weighted_price_sum"):
+                    self.assertAlmostEqual(actual[field], expected[field])
+
+    async def test_rejects_window_off_bucket_edge(self):
+        columns = await TradeColumns.from_trades(iterate([]))
+        windows = WindowedAggregates(columns, 1_000_000, 7 * 86400)
+
+        with self.assertRaises(ValueError):
+            windows.window(3600)
+
+
+if __name__ == "__main__":
+    unittest.main()
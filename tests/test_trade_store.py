@@ -0,0 +1,101 @@
+import os
+import sys
+import unittest
+from typing import Dict, List, Optional, Tuple
+
+# Ensure backend modules are importable when running from repo root
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+from polymarket_client import PolymarketClient, Trade  # noqa: E402
+from trade_store import TradeStore  # noqa: E402
+
+
+class RecordingClient(PolymarketClient):
+    """Serves a fixed trade history and records requested time spans."""
+
+    def __init__(self, trades: List[Dict]):
+        super().__init__()
+        self.trades = trades
+        self.requested: List[Tuple[Optional[int], Optional[int]]] = []
+
+    async def get_trades(
+        self,
+        market: Optional[str] = None,
+        maker: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+    ) -> List[Trade]:
+        if offset == 0:
+            self.requested.append((start_ts, end_ts))
+        matching = [t for t in self.trades if start_ts <= t["timestamp"] <= end_ts]
+        return [Trade.from_api(t) for t in matching[offset:offset + limit]]
+
+
+def make_trade(timestamp: int) -> Dict:
+    return {
+        "id": f"t{timestamp}",
+        "market": "0xm1",
+        "asset_id": "yes",
+        "side": "BUY",
+        "size": "10",
+        "price": "0.4",
+        "timestamp": timestamp,
+        "maker": "0xWallet",
+    }
+
+
+class TradeStoreTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.store = TradeStore(":memory:", min_sync_interval=0.0, sync_overlap=5)
+
+    async def asyncTearDown(self):
+        self.store.close()
+
+    async def test_first_sync_downloads_window_and_serves_from_store(self):
+        client = RecordingClient([make_trade(ts) for ts in (100, 150, 200)])
+
+        inserted = await self.store.sync(client, "0xWallet", 100, 300)
+        trades = [t async for t in self.store.iter_trades("0xwallet", 120, 300)]
+
+        self.assertEqual(inserted, 3)
+        self.assertEqual([t.timestamp for t in trades], [200, 150])
+        self.assertEqual(trades[0].size, 10.0)
+        self.assertEqual(trades[0].price, 0.4)
+
+    async def test_resync_only_requests_newer_trades(self):
+        client = RecordingClient([make_trade(ts) for ts in (100, 150, 200)])
+        await self.store.sync(client, "0xWallet", 100, 300)
+        client.trades.append(make_trade(350))
+
+        inserted = await self.store.sync(client, "0xWallet", 100, 400)
+
+        self.assertEqual(inserted, 1)
+        self.assertEqual(client.requested, [(100, 300), (295, 400)])
+
+    async def test_longer_window_backfills_only_older_history(self):
+        client = RecordingClient([make_trade(ts) for ts in (50, 100, 150)])
+        await self.store.sync(client, "0xWallet", 100, 300)
+
+        inserted = await self.store.sync(client, "0xWallet", 0, 300)
+
+        self.assertEqual(inserted, 1)
+        self.assertEqual(client.requested, [(100, 300), (0, 100)])
+
+    async def test_fresh_wallet_is_not_resynced(self):
+        store = TradeStore(":memory:", min_sync_interval=3600.0)
+        client = RecordingClient([make_trade(100)])
+        await store.sync(client, "0xWallet", 0, 300)
+
+        inserted = await store.sync(client, "0xWallet", 0, 400)
+
+        self.assertEqual(inserted, 0)
+        self.assertEqual(len(client.requested), 1)
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
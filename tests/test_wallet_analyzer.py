@@ -1,23 +1,33 @@
+import asyncio
 import os
 import sys
+import time
 import unittest
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 
 # Ensure backend modules are importable when running from repo root
 CURRENT_DIR = os.path.dirname(__file__)
 BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
 sys.path.append(os.path.abspath(BACKEND_DIR))
 
-from polymarket_client import PolymarketClient  # noqa: E402
+from cache import AsyncTTLCache, MemoryCacheBackend  # noqa: E402
+from polymarket_client import PolymarketClient, Trade  # noqa: E402
+from trade_store import TradeStore  # noqa: E402
 from wallet_analyzer import WalletAnalyzer  # noqa: E402
 
 
+async def iterate(items: List[Dict]) -> AsyncIterator[Trade]:
+    for item in items:
+        yield Trade.from_api(item)
+
+
 class StubPolymarketClient(PolymarketClient):
     """Minimal PolymarketClient stub for testing analyzer logic."""
 
     def __init__(self):
         # Avoid initializing aiohttp session from the parent class
         self.rate_limit_delay = 0.0
+        self.market_cache = AsyncTTLCache(name="markets")
 
     async def get_trades(
         self,
@@ -27,7 +37,7 @@ class StubPolymarketClient(PolymarketClient):
         offset: int = 0,
         start_ts: Optional[int] = None,
         end_ts: Optional[int] = None,
-    ) -> List[Dict]:
+    ) -> List[Trade]:
         return []
 
     async def get_activity(
@@ -38,6 +48,78 @@ class StubPolymarketClient(PolymarketClient):
     async def get_market_by_id(self, condition_id: str) -> Optional[Dict]:
         return None
 
+    async def get_markets_by_ids(
+        self, condition_ids: List[str], batch_size: int = 50
+    ) -> Dict[str, Dict]:
+        return {}
+
+
+class SlowMetadataClient(StubPolymarketClient):
+    """Stub whose metadata lookups take time and track concurrency."""
+
+    def __init__(self, known_markets: Dict[str, Dict]):
+        super().__init__()
+        self.known_markets = known_markets
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_market_by_id(self, condition_id: str) -> Optional[Dict]:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self.known_markets.get(condition_id)
+
+
+class HistoryClient(StubPolymarketClient):
+    """Serves a mutable trade history and fixed market metadata."""
+
+    def __init__(self, trades: List[Dict], markets: Dict[str, Dict]):
+        super().__init__()
+        self.trades = trades
+        self.markets = markets
+
+    async def get_trades(
+        self,
+        market: Optional[str] = None,
+        maker: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+    ) -> List[Trade]:
+        matching = [t for t in self.trades if start_ts <= t["timestamp"] <= end_ts]
+        return [Trade.from_api(t) for t in matching[offset:offset + limit]]
+
+    async def get_market_by_id(self, condition_id: str) -> Optional[Dict]:
+        return self.markets.get(condition_id)
+
+
+class HolderClient(StubPolymarketClient):
+    """Serves a fixed market listing and per-market holders."""
+
+    def __init__(self, markets: List[Dict], holders: Dict[str, List[Dict]]):
+        super().__init__()
+        self.markets = markets
+        self.holders = holders
+        self.holder_requests: List[str] = []
+
+    async def get_markets(self, limit: int = 100, offset: int = 0, **filters) -> List[Dict]:
+        return self.markets[offset:offset + limit]
+
+    async def get_holders(self, market: str, limit: int = 100) -> List[Dict]:
+        self.holder_requests.append(market)
+        if market not in self.holders:
+            raise RuntimeError("holders unavailable")
+        return self.holders[market]
+
+
+def history_trade(trade_id: int, market: str, side: str, size: str, price: str, ts: int) -> Dict:
+    return {
+        "id": trade_id, "market": market, "asset_id": f"{market}-yes", "side": side,
+        "size": size, "price": price, "timestamp": ts, "maker": "0xW",
+    }
+
 
 class WalletAnalyzerTests(unittest.IsolatedAsyncioTestCase):
     async def test_analyze_wallet_returns_wallet_address_when_no_trades(self):
@@ -50,6 +132,329 @@ class WalletAnalyzerTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(analysis["profitable_markets"], 0)
         self.assertEqual(analysis["markets"], [])
 
+    async def test_enrichment_runs_concurrently_and_keeps_market_order(self):
+        market_ids = [f"m{i}" for i in range(12)]
+        known = {
+            market_id: {"question": f"Market {market_id}", "resolved": False}
+            for market_id in market_ids
+            if market_id != "m3"
+        }
+        client = SlowMetadataClient(known)
+        analyzer = WalletAnalyzer(client)
+        markets_data, _ = await analyzer._group_trades_by_market(
+            iterate([
+                {"market": market_id, "side": "BUY", "size": "1", "price": "0.5"}
+                for market_id in market_ids
+            ])
+        )
+
+        enriched = await analyzer._enrich_with_market_metadata(markets_data)
+
+        self.assertEqual(
+            [m["market_id"] for m in enriched],
+            [market_id for market_id in market_ids if market_id != "m3"],
+        )
+        self.assertGreater(client.max_in_flight, 1)
+        self.assertLessEqual(client.max_in_flight, WalletAnalyzer.METADATA_CONCURRENCY)
+
+    async def test_analyze_wallets_isolates_failures_and_keeps_order(self):
+        analyzer = WalletAnalyzer(StubPolymarketClient())
+        original = analyzer.analyze_wallet
+
+        async def flaky_analyze(wallet_address: str, time_range: str) -> Dict:
+            if wallet_address == "0xbad":
+                raise RuntimeError("upstream failure")
+            return await original(wallet_address, time_range)
+
+        analyzer.analyze_wallet = flaky_analyze
+
+        results = await analyzer.analyze_wallets(["0xa", "0xbad", "0xb"], "30d")
+
+        self.assertEqual([r["wallet"] for r in results], ["0xa", "0xb"])
+
+    async def test_iter_wallet_analyses_yields_in_completion_order(self):
+        analyzer = WalletAnalyzer(StubPolymarketClient())
+        delays = {"0xslow": 0.05, "0xfast": 0.0, "0xbad": 0.01}
+
+        async def timed_analyze(wallet_address: str, time_range: str) -> Dict:
+            await asyncio.sleep(delays[wallet_address])
+            if wallet_address == "0xbad":
+                raise RuntimeError("upstream failure")
+            return {"wallet": wallet_address}
+
+        analyzer.analyze_wallet = timed_analyze
+
+        events = [
+            (wallet, analysis is not None, error is not None)
+            async for wallet, analysis, error in analyzer.iter_wallet_analyses(
+                ["0xslow", "0xfast", "0xbad"], "30d"
+            )
+        ]
+
+        self.assertEqual(
+            events,
+            [("0xfast", True, False), ("0xbad", False, True), ("0xslow", True, False)],
+        )
+
+    async def test_incremental_reanalysis_only_reads_new_and_expired_trades(self):
+        markets = {
+            m: {"question": m, "resolved": True, "outcome": "YES",
+                "tokens": [{"outcome": "YES", "token_id": f"{m}-yes"}]}
+            for m in ("m1", "m2")
+        }
+        trades = [
+            history_trade(1, "m1", "BUY", "10", "0.5", 100),
+            history_trade(2, "m2", "BUY", "4", "0.25", 150),
+        ]
+        store = TradeStore(":memory:", min_sync_interval=0.0, sync_overlap=0)
+        analyzer = WalletAnalyzer(HistoryClient(trades, markets), trade_store=store)
+        analyzer._get_time_range_timestamps = lambda time_range: (0, 200)
+        await analyzer.analyze_wallet("0xW", "7d")
+
+        trades.append(history_trade(3, "m2", "SELL", "2", "0.75", 250))
+        grouped_sizes = []
+        original_group = analyzer._group_trades_by_market
+
+        async def counting_group(stream):
+            markets_data, summary = await original_group(stream)
+            grouped_sizes.append(summary["trade_count"])
+            return markets_data, summary
+
+        analyzer._group_trades_by_market = counting_group
+        # Window slides past trade 1 and picks up trade 3
+        analyzer._get_time_range_timestamps = lambda time_range: (120, 300)
+        analysis = await analyzer.analyze_wallet("0xW", "7d")
+
+        # New trade 3, no older trade past the last window end, expired trade 1
+        self.assertEqual(grouped_sizes, [1, 0, 1])
+        self.assertEqual([m["market_id"] for m in analysis["markets"]], ["m2"])
+        # m2: bought 4 @ 0.25, sold 2 @ 0.75, 2 winning tokens left
+        self.assertEqual(analysis["markets"][0]["pnl"], round(-1.0 + 1.5 + 2.0, 2))
+        self.assertEqual(analysis["total_volume_traded"], 2.5)
+        store.close()
+
+    async def test_incremental_reanalysis_keeps_stored_trades_newer_than_last_window(self):
+        markets = {
+            "m1": {"question": "m1", "resolved": True, "outcome": "YES",
+                   "tokens": [{"outcome": "YES", "token_id": "m1-yes"}]}
+        }
+        trades = [
+            history_trade(1, "m1", "BUY", "10", "0.5", 100),
+            history_trade(2, "m1", "BUY", "4", "0.25", 250),
+        ]
+        client = HistoryClient(trades, markets)
+        store = TradeStore(":memory:", min_sync_interval=0.0, sync_overlap=0)
+        # Another analysis already stored trade 2, which is newer than the first window
+        await store.sync(client, "0xW", 0, 300)
+        analyzer = WalletAnalyzer(client, trade_store=store)
+        analyzer._get_time_range_timestamps = lambda time_range: (0, 200)
+        await analyzer.analyze_wallet("0xW", "7d")
+
+        analyzer._get_time_range_timestamps = lambda time_range: (0, 300)
+        incremental = await analyzer.analyze_wallet("0xW", "7d")
+
+        from_scratch = WalletAnalyzer(client)
+        from_scratch._get_time_range_timestamps = lambda time_range: (0, 300)
+        expected = await from_scratch.analyze_wallet("0xW", "7d")
+        self.assertEqual(incremental["total_volume_traded"], 6.0)
+        self.assertEqual(incremental["markets"], expected["markets"])
+        store.close()
+
+    async def test_incremental_reanalysis_matches_full_recompute_after_expiry(self):
+        markets = {
+            "m1": {"question": "m1", "resolved": True, "outcome": "YES",
+                   "tokens": [{"outcome": "YES", "token_id": "m1-yes"}]}
+        }
+        trades = [
+            history_trade(1, "m1", "BUY", "1", "0.1", 100),
+            history_trade(2, "m1", "BUY", "1", "0.7", 150),
+        ]
+        client = HistoryClient(trades, markets)
+        store = TradeStore(":memory:", min_sync_interval=0.0, sync_overlap=0)
+        analyzer = WalletAnalyzer(client, trade_store=store)
+        analyzer._get_time_range_timestamps = lambda time_range: (0, 200)
+        await analyzer.analyze_wallet("0xW", "7d")
+
+        trades.append(history_trade(3, "m1", "SELL", "1", "0.7", 250))
+        analyzer._get_time_range_timestamps = lambda time_range: (0, 300)
+        await analyzer.analyze_wallet("0xW", "7d")
+
+        # Trade 1 expires; trades 2 and 3 net out to exactly zero PnL
+        analyzer._get_time_range_timestamps = lambda time_range: (120, 300)
+        incremental = await analyzer.analyze_wallet("0xW", "7d")
+
+        from_scratch = WalletAnalyzer(client)
+        from_scratch._get_time_range_timestamps = lambda time_range: (120, 300)
+        expected = await from_scratch.analyze_wallet("0xW", "7d")
+        self.assertEqual(incremental["hit_rate"], 0.0)
+        for field in ("hit_rate", "realized_pnl", "roi", "markets"):
+            self.assertEqual(incremental[field], expected[field])
+        store.close()
+
+    async def test_window_analyses_match_per_range_analysis(self):
+        day = 86400
+        now = int(time.time())
+        markets = {
+            m: {"question": m, "resolved": True, "outcome": "YES",
+                "tokens": [{"outcome": "YES", "token_id": f"{m}-yes"}]}
+            for m in ("m1", "m2", "m3")
+        }
+        trades = [
+            history_trade(1, "m1", "BUY", "10", "0.5", now - 3 * day),
+            history_trade(2, "m2", "BUY", "4", "0.25", now - 20 * day),
+            history_trade(3, "m2", "SELL", "2", "0.75", now - 10 * day),
+            history_trade(4, "m3", "BUY", "6", "0.4", now - 60 * day),
+        ]
+        analyzer = WalletAnalyzer(HistoryClient(trades, markets))
+
+        windows = await analyzer.analyze_wallet_windows("0xW", ("7d", "30d", "90d"))
+
+        for time_range in ("7d", "30d", "90d"):
+            expected = await analyzer.analyze_wallet("0xW", time_range)
+            actual = dict(windows[time_range])
+            self.assertIsNotNone(actual.pop("analyzed_at"))
+            expected.pop("analyzed_at")
+            self.assertEqual(actual, expected)
+        self.assertEqual(
+            [m["market_id"] for m in windows["30d"]["markets"]], ["m1", "m2"]
+        )
+
+    async def test_concurrent_identical_analyses_share_one_computation(self):
+        analyzer = WalletAnalyzer(StubPolymarketClient())
+        calls = 0
+
+        async def slow_analyze(wallet_address: str, time_range: str) -> Dict:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"wallet": wallet_address, "range": time_range}
+
+        analyzer.analyze_wallet = slow_analyze
+
+        results = await asyncio.gather(
+            *(analyzer.analyze_wallet_shared("0xABC", "7d") for _ in range(5)),
+            analyzer.analyze_wallet_shared("0xabc", "30d"),
+        )
+        again = await analyzer.analyze_wallet_shared("0xabc", "7d")
+
+        self.assertEqual(calls, 2)
+        self.assertTrue(all(result is results[0] for result in results[:5]))
+        self.assertIs(again, results[0])
+
+    async def test_ranking_candidates_reuse_analyses_from_other_workers(self):
+        markets = {
+            "m1": {"question": "m1", "resolved": True, "outcome": "YES",
+                   "tokens": [{"outcome": "YES", "token_id": "m1-yes"}]}
+        }
+        trades = [history_trade(1, "m1", "BUY", "10", "0.5", int(time.time()) - 60)]
+        shared = MemoryCacheBackend()
+        worker_a = WalletAnalyzer(HistoryClient(trades, markets), shared_cache=shared)
+        client_b = HistoryClient(trades, markets)
+        worker_b = WalletAnalyzer(client_b, shared_cache=shared)
+        trade_requests = 0
+        original_get_trades = client_b.get_trades
+
+        async def counting_get_trades(**kwargs):
+            nonlocal trade_requests
+            trade_requests += 1
+            return await original_get_trades(**kwargs)
+
+        client_b.get_trades = counting_get_trades
+        filters = {"min_resolved_markets": 1, "min_volume": 0.0, "max_single_market_weight": 1.0}
+
+        expected = await worker_a._analyze_candidate("0xW", "7d", filters)
+        analysis = await worker_b._analyze_candidate("0xW", "7d", filters)
+
+        self.assertEqual(analysis, expected)
+        self.assertEqual(trade_requests, 0)
+        self.assertEqual(worker_b.result_cache.shared_hits, 1)
+
+    async def test_discovery_scans_beyond_the_first_page(self):
+        now = int(time.time())
+        # Newest 1000 trades are small; the biggest maker only traded earlier
+        trades = [
+            {"market": "m1", "side": "BUY", "size": "1", "price": "0.5",
+             "timestamp": now - i, "maker": f"0xsmall{i % 50}"}
+            for i in range(1500)
+        ] + [
+            {"market": "m1", "side": "BUY", "size": "500", "price": "0.5",
+             "timestamp": now - 3 * 86400 - i, "maker": "0xwhale"}
+            for i in range(3)
+        ]
+        analyzer = WalletAnalyzer(HistoryClient(trades, {}))
+
+        candidates = await analyzer._discover_candidates("7d", 5)
+
+        self.assertEqual(candidates[0], "0xwhale")
+        self.assertEqual(len(candidates), 5)
+
+    async def test_holder_discovery_merges_holders_across_markets_by_balance(self):
+        client = HolderClient(
+            markets=[{"conditionId": "m1"}, {"conditionId": "m2"}, {"conditionId": "m3"}],
+            holders={
+                "m1": [{"token": "m1-yes", "holders": [
+                    {"proxyWallet": "0xA", "amount": 60},
+                    {"proxyWallet": "0xb", "amount": 50},
+                ]}],
+                "m2": [{"token": "m2-no", "holders": [
+                    {"proxyWallet": "0xa", "amount": 30},
+                    {"proxyWallet": "0xc", "amount": 100},
+                ]}],
+            },
+        )
+        analyzer = WalletAnalyzer(client, discovery="holders")
+
+        candidates = await analyzer._discover_candidates("30d", 3)
+
+        # 0xA holds 90 across two markets; m3's failed request is skipped
+        self.assertEqual(candidates, ["0xc", "0xA", "0xb"])
+        self.assertEqual(client.holder_requests, ["m1", "m2", "m3"])
+        self.assertIsNotNone(client.cached_market("m1"))
+
+    async def test_ranking_prefilter_skips_metadata_for_hopeless_candidates(self):
+        now = int(time.time())
+        markets = {
+            f"m{i}": {"question": f"m{i}", "resolved": True, "outcome": "YES",
+                      "tokens": [{"outcome": "YES", "token_id": f"m{i}-yes"}]}
+            for i in range(4)
+        }
+        trades = [
+            # 0xactive: enough volume across three markets
+            {"market": f"m{i}", "asset_id": f"m{i}-yes", "side": "BUY", "size": "100",
+             "price": "0.5", "timestamp": now - 3600 * (i + 1), "maker": "0xactive"}
+            for i in range(3)
+        ] + [
+            # 0xtiny: a single small trade
+            {"market": "m3", "asset_id": "m3-yes", "side": "BUY", "size": "1",
+             "price": "0.5", "timestamp": now - 60, "maker": "0xtiny"},
+        ]
+
+        class MakerHistoryClient(HistoryClient):
+            def __init__(self):
+                super().__init__(trades, markets)
+                self.metadata_requests: List[str] = []
+
+            async def get_trades(self, market=None, maker=None, limit=100, offset=0,
+                                 start_ts=None, end_ts=None) -> List[Trade]:
+                page = await super().get_trades(
+                    limit=len(self.trades), start_ts=start_ts, end_ts=end_ts
+                )
+                page = [t for t in page if maker is None or t.maker == maker]
+                return page[offset:offset + limit]
+
+            async def get_market_by_id(self, condition_id: str) -> Optional[Dict]:
+                self.metadata_requests.append(condition_id)
+                return await super().get_market_by_id(condition_id)
+
+        client = MakerHistoryClient()
+        analyzer = WalletAnalyzer(client)
+
+        ranked = await analyzer.rank_wallets("7d", limit=5, max_single_market_weight=1.0)
+
+        self.assertEqual([w["wallet"] for w in ranked], ["0xactive"])
+        # m3 was only traded by the pruned wallet, so its metadata was never needed
+        self.assertEqual(sorted(client.metadata_requests), ["m0", "m1", "m2"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Ensure backend modules are importable when running from repo root
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(CURRENT_DIR, "..", "backend")
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+import worker_lock  # noqa: E402
+from worker_lock import WorkerLock  # noqa: E402
+
+
+@unittest.skipUnless(worker_lock.fcntl, "fcntl not available")
+class WorkerLockTests(unittest.TestCase):
+    def test_one_holder_at_a_time_and_takeover_after_release(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "locks", "background.lock")
+            leader = WorkerLock(path)
+            follower = WorkerLock(path)
+
+            self.assertTrue(leader.try_acquire())
+            self.assertTrue(leader.try_acquire())
+            self.assertFalse(follower.try_acquire())
+
+            leader.release()
+            self.assertFalse(leader.held)
+            self.assertTrue(follower.try_acquire())
+            follower.release()
+
+
+if __name__ == "__main__":
+    unittest.main()